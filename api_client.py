@@ -1,15 +1,16 @@
-import requests
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
+from data_fetchers.transport import HttpTransport, get_transport
 
 load_dotenv()
 
 class SportsAPIClient:
-    def __init__(self):
+    def __init__(self, transport: Optional[HttpTransport] = None, base_url: Optional[str] = None):
+        self.transport = transport or get_transport()
         self.api_key = os.getenv('API_SPORTS_KEY')
-        self.base_url = "https://v3.football.api-sports.io"
+        self.base_url = base_url or "https://v3.football.api-sports.io"
         self.headers = {
             'x-rapidapi-host': "v3.football.api-sports.io",
             'x-rapidapi-key': self.api_key
@@ -23,7 +24,7 @@ class SportsAPIClient:
             'league': league_id,
             'season': season
         }
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self.transport.get(endpoint, headers=self.headers, params=params)
         return response.json()
 
     def get_h2h_matches(self, team1_id: int, team2_id: int) -> List[Dict]:
@@ -33,7 +34,7 @@ class SportsAPIClient:
             'h2h': f"{team1_id}-{team2_id}",
             'last': 10
         }
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self.transport.get(endpoint, headers=self.headers, params=params)
         return response.json()
 
     def get_team_form(self, team_id: int, last_n_matches: int = 5) -> Dict:
@@ -43,7 +44,7 @@ class SportsAPIClient:
             'team': team_id,
             'last': last_n_matches
         }
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self.transport.get(endpoint, headers=self.headers, params=params)
         return response.json()
 
     def get_league_standings(self, league_id: int, season: int) -> Dict:
@@ -53,7 +54,7 @@ class SportsAPIClient:
             'league': league_id,
             'season': season
         }
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self.transport.get(endpoint, headers=self.headers, params=params)
         return response.json()
 
     def get_player_statistics(self, player_id: int, season: int) -> Dict:
@@ -63,7 +64,7 @@ class SportsAPIClient:
             'id': player_id,
             'season': season
         }
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self.transport.get(endpoint, headers=self.headers, params=params)
         return response.json()
 
     def get_live_odds(self, fixture_id: int) -> Dict:
@@ -72,7 +73,7 @@ class SportsAPIClient:
         params = {
             'fixture': fixture_id
         }
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self.transport.get(endpoint, headers=self.headers, params=params)
         return response.json()
 
     def get_fixtures_by_date(self, date: str) -> List[Dict]:
@@ -81,7 +82,7 @@ class SportsAPIClient:
         params = {
             'date': date
         }
-        response = requests.get(endpoint, headers=self.headers, params=params)
+        response = self.transport.get(endpoint, headers=self.headers, params=params)
         return response.json()
 
 class TrendAnalyzer:
@@ -1,21 +1,34 @@
 from flask import Flask, render_template
 from betting_analyzer import BettingAnalyzer
+from snapshot_service import SnapshotService
+from profiling import register_routes, timed
+from metrics import add_metrics_endpoint, watch_snapshot_service
 import pandas as pd
 
+# Rows per sport table; only these get their display text rendered
+MAX_BETS_PER_SPORT = 50
+
 app = Flask(__name__)
 analyzer = BettingAnalyzer()
+snapshot_service = SnapshotService(analyzer).start()
+register_routes(app)
+add_metrics_endpoint(app)
+watch_snapshot_service(snapshot_service)
 
 @app.route('/')
+@timed('render')
 def index():
-    best_bets = analyzer.get_todays_best_bets()
+    # Served from the background snapshot; never runs the pipeline in the request
+    snapshot = snapshot_service.get()
     
     # Group bets by sport
-    nba_bets = [bet for bet in best_bets if bet['sport'] == 'NBA']
-    nfl_bets = [bet for bet in best_bets if bet['sport'] == 'NFL']
+    nba_bets = snapshot.bets_for('NBA', limit=MAX_BETS_PER_SPORT)
+    nfl_bets = snapshot.bets_for('NFL', limit=MAX_BETS_PER_SPORT)
     
     return render_template('index.html', 
                          nba_bets=nba_bets, 
-                         nfl_bets=nfl_bets)
+                         nfl_bets=nfl_bets,
+                         snapshot=snapshot.metadata())
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
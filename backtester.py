@@ -0,0 +1,337 @@
+"""Vectorized backtest of BettingAnalyzer's thresholds, prop adjustments and staking
+
+    backtest = Backtester.from_store(store, 'basketball_nba', results, prop_results)
+    result = backtest.run(ev_thresholds={'Moneyline': 0.05}, prop_adjustments={'Points': (1.0, 1.0)},
+                          staking='half_kelly')
+    result.summary, result.by_bet_type
+
+Preparation does the expensive part once: it picks the odds every game
+showed ``lead`` seconds before its start, scores every possible bet with
+the analyzer's own _score_games / _score_props, grades each against the
+final result, and joins it to its closing line (clv.compute_clv). run()
+then only applies EV cutoffs (and, if they change, re-scores props with
+new adjustments) over those arrays, so trying a setting on a season of
+games takes milliseconds. The prepared state is plain numpy arrays
+(``arrays`` plus string ``labels``), which from_arrays rebuilds a
+Backtester from without the history.
+
+``results`` has event_id, home_score and away_score; ``prop_results`` has
+event_id, player, market (Odds API key, e.g. player_points) and value.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import copy
+import numpy as np
+import pandas as pd
+from betting_analyzer import BettingAnalyzer
+from clv import compute_clv
+from data_fetchers.odds_api_fetcher import games_from_odds_table
+from odds import american_to_decimal, expected_value
+from profiling import timed
+from sports_config import ODDS_API_SPORTS
+
+HISTORY_COLUMNS = ['captured_at', 'event_id', 'book', 'market', 'outcome', 'description', 'point', 'price',
+                   'home_team', 'away_team', 'commence_time']
+OUTCOME_COLUMNS = ['event_id', 'book', 'market', 'outcome', 'description']
+
+# Candidate string columns, kept as integer codes into Backtester.labels
+LABEL_COLUMNS = ['event_id', 'bet_type', 'threshold', 'market', 'side', 'description']
+
+# Staking rules: None bets a flat stake, otherwise the fraction of the Kelly stake
+STAKING = {'flat': None, 'kelly': 1.0, 'half_kelly': 0.5, 'quarter_kelly': 0.25}
+
+@dataclass
+class BacktestResult:
+    """Bets a setting would have made, with headline and per-bet-type figures"""
+    bets: pd.DataFrame
+    summary: Dict
+    by_bet_type: pd.DataFrame
+
+def decision_table(history: pd.DataFrame, lead: float = 3600) -> pd.DataFrame:
+    """Each outcome's last price captured at least ``lead`` seconds before its game started"""
+    captured = pd.to_datetime(history['captured_at'], utc=True)
+    cutoff = pd.to_datetime(history['commence_time'], utc=True) - pd.Timedelta(seconds=lead)
+    rows = history[(captured <= cutoff).to_numpy()]
+    rows = rows.sort_values('captured_at', kind='stable')
+    return rows.drop_duplicates(OUTCOME_COLUMNS, keep='last').reset_index(drop=True)
+
+class OfflineFetcher:
+    """Stands in for OddsApiFetcher in an analyzer that only scores stored odds
+
+    Building a real fetcher would set up a cache, transport, rate limiter and,
+    with ODDS_HISTORY_DIR set, attach to the live history store.
+    """
+
+    def get_upcoming_games(self, *args, **kwargs):
+        raise RuntimeError("Backtest analyzers do not fetch odds")
+
+    get_player_props = get_upcoming_games
+
+def offline_analyzer(analyzer_class: type = BettingAnalyzer) -> BettingAnalyzer:
+    """An ``analyzer_class`` for scoring only, with no network or history access"""
+    return analyzer_class(fetcher=OfflineFetcher())
+
+def _grade(margin: np.ndarray) -> np.ndarray:
+    """+1 won, 0 push, -1 lost, NaN when there is no result"""
+    return np.sign(margin)
+
+def _prop_frame(decisions: pd.DataFrame) -> pd.DataFrame:
+    """Over and Under prices of every offered prop, one row per book, like get_player_props"""
+    rows = decisions[decisions['market'].astype(str).str.startswith('player_')]
+    keys = ['event_id', 'book', 'market', 'description', 'point']
+    rows = rows.astype({column: object for column in ('event_id', 'book', 'market', 'description', 'outcome')})
+    over = rows[rows['outcome'] == 'Over'][keys + ['price', 'commence_time']].rename(columns={'price': 'Over'})
+    under = rows[rows['outcome'] == 'Under'][keys + ['price']].rename(columns={'price': 'Under'})
+    props = over.merge(under, on=keys, how='outer')
+    return pd.DataFrame({
+        'Event ID': props['event_id'].to_numpy(),
+        'Player': props['description'].to_numpy(),
+        'Market': props['market'].to_numpy(),
+        'Type': props['market'].str.replace('player_', '').str.replace('_', ' ').str.title().to_numpy(),
+        'Line': props['point'].to_numpy(dtype=float),
+        'Over': props['Over'].to_numpy(dtype=float),
+        'Under': props['Under'].to_numpy(dtype=float),
+        'Bookmaker': props['book'].to_numpy(),
+        'commence_time': props['commence_time'].to_numpy(),
+    })
+
+class Backtester:
+    """Replays stored odds and final results through BettingAnalyzer's scoring"""
+
+    def __init__(self, history: pd.DataFrame, results: pd.DataFrame, sport: str = 'basketball_nba',
+                 prop_results: Optional[pd.DataFrame] = None, analyzer: Optional[BettingAnalyzer] = None,
+                 lead: float = 3600, stake: float = 1.0):
+        analyzer = analyzer or offline_analyzer()
+        sport_name = next((name for name, config in ODDS_API_SPORTS.items() if config['key'] == sport), sport)
+        self.lead = lead
+        self._setup(*self._prepare(history, results, prop_results, sport_name, analyzer), analyzer, stake)
+
+    @classmethod
+    def from_store(cls, store, sport: str, results: pd.DataFrame, prop_results: Optional[pd.DataFrame] = None,
+                   dates=None, **kwargs) -> 'Backtester':
+        """Backtest the history an OddsHistoryStore holds for ``sport`` (optionally some commence dates)"""
+        frames = [store.read_partition(sport, date, HISTORY_COLUMNS) for date in (dates or store.partitions(sport))]
+        history = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=HISTORY_COLUMNS)
+        return cls(history, results, sport, prop_results, **kwargs)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], labels: Dict[str, List[str]],
+                    analyzer: Optional[BettingAnalyzer] = None, stake: float = 1.0) -> 'Backtester':
+        """Backtester over already prepared arrays (see ``arrays`` / ``labels``), e.g. in a sweep worker"""
+        backtester = cls.__new__(cls)
+        backtester._setup(arrays, labels, analyzer or offline_analyzer(), stake)
+        return backtester
+
+    def _setup(self, arrays: Dict[str, np.ndarray], labels: Dict[str, List[str]], analyzer: BettingAnalyzer,
+               stake: float):
+        self.arrays = arrays
+        self.labels = labels
+        self.analyzer = analyzer
+        self.stake = stake
+        self._decode = {column: np.asarray(values, dtype=object) for column, values in labels.items()}
+        self._cutoff_keys = labels['threshold']
+        self.props = pd.DataFrame({'Over': arrays['prop_over'], 'Under': arrays['prop_under'],
+                                   'Type': self._decode['prop_type'][arrays['prop_type']]})
+        self._prop_scores = self._score_props(self.analyzer.PROP_ADJUSTMENTS)
+
+    @timed('backtest_prepare')
+    def _prepare(self, history: pd.DataFrame, results: pd.DataFrame, prop_results: Optional[pd.DataFrame],
+                 sport: str, analyzer: BettingAnalyzer) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        decisions = decision_table(history, self.lead)
+        featured = decisions[decisions['market'].isin(['h2h', 'spreads', 'totals'])]
+        games = games_from_odds_table(featured.assign(sport=sport))
+        scores = analyzer._score_games(games)
+
+        scored = results.astype({'event_id': str}).drop_duplicates('event_id').set_index('event_id')
+        home_score = scored['home_score'].reindex(games['Event ID'].astype(str)).to_numpy(dtype=float)
+        away_score = scored['away_score'].reindex(games['Event ID'].astype(str)).to_numpy(dtype=float)
+
+        # Spread bets back the first book's lowest-point team, as games_from_odds_table picks it
+        spreads = featured[(featured['market'] == 'spreads')
+                           & (featured['book'].astype(object)
+                              == featured['event_id'].astype(object).map(
+                                  games.set_index('Event ID')['Bookmaker']))]
+        favorite = (spreads.sort_values('point', kind='stable').astype({'event_id': object, 'outcome': object})
+                    .drop_duplicates('event_id').set_index('event_id')['outcome'])
+        favorite_is_home = (favorite.reindex(games['Event ID']).to_numpy() == games['Home'].to_numpy())
+        favorite_margin = np.where(favorite_is_home, home_score - away_score, away_score - home_score)
+        total = home_score + away_score
+
+        commence = (featured.astype({'event_id': object}).drop_duplicates('event_id')
+                    .set_index('event_id')['commence_time'].reindex(games['Event ID']).to_numpy())
+        event_ids = games['Event ID'].astype(str).to_numpy()
+
+        def game_candidates(bet_type, market, side, line, odds, probability, ev, valid, result):
+            return pd.DataFrame({
+                'event_id': event_ids, 'commence_time': commence, 'bet_type': bet_type, 'threshold': bet_type,
+                'market': market, 'side': side, 'description': '', 'line': line, 'odds': odds,
+                'probability': probability, 'expected_value': ev, 'valid': valid, 'result': result
+            })
+
+        away_pick = scores['away_pick']
+        over_pick = scores['over_pick']
+        spread_points = scores['spread_points']
+
+        # An Under is bet, paid and staked at the Under price
+        total_odds = np.where(over_pick, scores['over_odds'], np.trunc(games['Under Price'].to_numpy(dtype=float)))
+        total_valid = scores['total_valid'] & ~np.isnan(total_odds)
+        candidates = [
+            game_candidates('Moneyline', 'h2h', np.where(away_pick, 'Away', 'Home'), np.nan,
+                            scores['ml_odds'], scores['ml_prob'], scores['ml_ev'], scores['ml_valid'],
+                            _grade(np.where(away_pick, away_score - home_score, home_score - away_score))),
+            game_candidates('Spread', 'spreads', np.where(spread_points < 0, 'Favorite', 'Underdog'), spread_points,
+                            scores['spread_odds'], scores['spread_prob'], scores['spread_ev'], scores['spread_valid'],
+                            _grade(favorite_margin + spread_points)),
+            game_candidates('Total', 'totals', np.where(over_pick, 'Over', 'Under'), scores['total_points'],
+                            total_odds, scores['total_prob'], expected_value(total_odds, scores['total_prob']),
+                            total_valid,
+                            _grade(np.where(over_pick, total - scores['total_points'],
+                                            scores['total_points'] - total))),
+        ]
+
+        # Props: both sides of every offered line; probabilities depend on the adjustments, so run() fills them
+        props = _prop_frame(decisions)
+        if not props.empty:
+            values = pd.Series(dtype=float)
+            if prop_results is not None and not prop_results.empty:
+                keyed = prop_results.astype({'event_id': str, 'player': str, 'market': str})
+                values = keyed.drop_duplicates(['event_id', 'player', 'market']).set_index(
+                    ['event_id', 'player', 'market'])['value'].astype(float)
+            index = pd.MultiIndex.from_arrays([props['Event ID'].astype(str), props['Player'].astype(str),
+                                               props['Market'].astype(str)])
+            value = values.reindex(index).to_numpy(dtype=float)
+            line = props['Line'].to_numpy(dtype=float)
+            for side, odds, result in (('Over', props['Over'], _grade(value - line)),
+                                       ('Under', props['Under'], _grade(line - value))):
+                candidates.append(pd.DataFrame({
+                    'event_id': props['Event ID'].astype(str).to_numpy(),
+                    'commence_time': props['commence_time'].to_numpy(),
+                    'bet_type': 'Player Prop - ' + props['Type'].astype(str), 'threshold': 'Player Prop',
+                    'market': props['Market'].to_numpy(), 'side': side, 'description': props['Player'].to_numpy(),
+                    'line': line, 'odds': np.trunc(odds.to_numpy(dtype=float)), 'probability': np.nan,
+                    'expected_value': np.nan, 'valid': False, 'result': result
+                }))
+
+        candidates = pd.concat(candidates, ignore_index=True)
+        clv = compute_clv(candidates.assign(sport=sport), history)['clv'].to_numpy(dtype=float)
+
+        # Everything run() needs as plain arrays: numbers, and integer codes into ``labels`` for strings
+        arrays = {'commence_time': pd.DatetimeIndex(pd.to_datetime(candidates['commence_time'], utc=True)).asi8,
+                  'clv': clv, 'valid': candidates['valid'].to_numpy(dtype=bool)}
+        for column in ('line', 'odds', 'probability', 'expected_value', 'result'):
+            arrays[column] = candidates[column].to_numpy(dtype=float)
+        labels = {'sport': [sport]}
+        for column in LABEL_COLUMNS:
+            codes, labels[column] = pd.factorize(candidates[column].astype(str))
+            arrays[column] = codes.astype(np.int32)
+            labels[column] = list(labels[column])
+        prop_types, prop_labels = pd.factorize(props['Type'].astype(str))
+        labels['prop_type'] = list(prop_labels)
+        arrays['prop_type'] = prop_types.astype(np.int32)
+        arrays['prop_over'] = props['Over'].to_numpy(dtype=float)
+        arrays['prop_under'] = props['Under'].to_numpy(dtype=float)
+        return arrays, labels
+
+    @property
+    def candidates(self) -> pd.DataFrame:
+        """Every bet the analyzer could make, graded, with the analyzer's default prop scores"""
+        return self._frame(np.arange(len(self.arrays['result'])), *self._scored(None))
+
+    def _score_props(self, adjustments: Dict[str, Tuple[float, float]]) -> Optional[Dict[str, np.ndarray]]:
+        if self.props.empty:
+            return None
+        scorer = copy.copy(self.analyzer)
+        scorer.PROP_ADJUSTMENTS = adjustments
+        return scorer._score_props(self.props)
+
+    def _scored(self, prop_adjustments: Optional[Dict[str, Tuple[float, float]]]):
+        """Probability, EV and validity of every candidate; props are the trailing Over then Under rows"""
+        arrays = self.arrays
+        probability, ev, valid = arrays['probability'], arrays['expected_value'], arrays['valid']
+        if not self.props.empty:
+            scores = self._prop_scores if prop_adjustments is None else self._score_props(
+                {**self.analyzer.PROP_ADJUSTMENTS, **prop_adjustments})
+            props = slice(len(probability) - 2 * len(self.props), None)
+            probability, ev, valid = probability.copy(), ev.copy(), valid.copy()
+            probability[props] = np.concatenate([scores['over_prob'], scores['under_prob']])
+            ev[props] = np.concatenate([scores['over_ev'], scores['under_ev']])
+            valid[props] = np.concatenate([scores['over_valid'], scores['under_valid']])
+        return probability, ev, valid
+
+    def _frame(self, rows: np.ndarray, probability: np.ndarray, ev: np.ndarray, valid: np.ndarray) -> pd.DataFrame:
+        arrays = self.arrays
+        frame = pd.DataFrame({
+            'event_id': self._decode['event_id'][arrays['event_id'][rows]],
+            'commence_time': pd.to_datetime(arrays['commence_time'][rows], utc=True),
+            'sport': self.labels['sport'][0]
+        })
+        for column in LABEL_COLUMNS[1:]:
+            frame[column] = self._decode[column][arrays[column][rows]]
+        for column in ('line', 'odds', 'result', 'clv'):
+            frame[column] = arrays[column][rows]
+        frame['probability'] = probability[rows]
+        frame['expected_value'] = ev[rows]
+        frame['valid'] = valid[rows]
+        return frame
+
+    @timed('backtest_run')
+    def run(self, ev_thresholds: Optional[Dict[str, float]] = None,
+            prop_adjustments: Optional[Dict[str, Tuple[float, float]]] = None,
+            staking: str = 'flat') -> BacktestResult:
+        """Bets the analyzer would have made with these settings, and how they did
+
+        Settings not given keep the analyzer's EV_THRESHOLDS and PROP_ADJUSTMENTS.
+        ``staking`` is a STAKING rule: flat bets ``stake`` on every bet, the
+        Kelly rules bet that fraction of the Kelly stake with ``stake`` as the
+        bankroll (not compounded).
+        """
+        thresholds = {**self.analyzer.EV_THRESHOLDS, **(ev_thresholds or {})}
+        arrays = self.arrays
+        probability, ev, valid = self._scored(prop_adjustments)
+
+        cutoff = np.array([thresholds[key] for key in self._cutoff_keys], dtype=float)[arrays['threshold']]
+        result = arrays['result']
+        with np.errstate(invalid='ignore'):
+            rows = np.flatnonzero(valid & (ev > cutoff) & ~np.isnan(result))
+        rows = rows[np.argsort(arrays['commence_time'][rows], kind='stable')]
+
+        bets = self._frame(rows, probability, ev, valid).drop(columns=['threshold', 'valid'])
+        payout = american_to_decimal(bets['odds'].to_numpy(dtype=float)) - 1
+        kelly = STAKING[staking]
+        if kelly is None:
+            stakes = np.full(len(bets), self.stake)
+        else:
+            stakes = self.stake * kelly * np.maximum(bets['expected_value'].to_numpy() / payout, 0)
+        bets['stake'] = stakes
+        bets['profit'] = np.select([bets['result'] > 0, bets['result'] < 0], [stakes * payout, -stakes], 0.0)
+        bets['cumulative_profit'] = bets['profit'].cumsum()
+        bets['drawdown'] = np.maximum.accumulate(np.maximum(bets['cumulative_profit'], 0)) - bets['cumulative_profit']
+        return BacktestResult(bets, self._summary(bets), self._by_bet_type(bets))
+
+    def _summary(self, bets: pd.DataFrame) -> Dict:
+        wins = int((bets['result'] > 0).sum())
+        losses = int((bets['result'] < 0).sum())
+        staked = float(bets['stake'].sum())
+        profit = float(bets['profit'].sum())
+        clv = bets['clv'].dropna()
+        return {
+            'bets': len(bets),
+            'wins': wins,
+            'losses': losses,
+            'pushes': len(bets) - wins - losses,
+            'hit_rate': wins / (wins + losses) if wins + losses else 0.0,
+            'staked': staked,
+            'profit': profit,
+            'roi': profit / staked if staked else 0.0,
+            'mean_clv': float(clv.mean()) if len(clv) else np.nan,
+            'beat_close': float((clv > 0).mean()) if len(clv) else np.nan,
+            'max_drawdown': float(bets['drawdown'].max()) if len(bets) else 0.0
+        }
+
+    def _by_bet_type(self, bets: pd.DataFrame) -> pd.DataFrame:
+        grouped = bets.assign(won=bets['result'] > 0, decided=bets['result'] != 0).groupby('bet_type')
+        by_type = grouped.agg(bets=('profit', 'size'), wins=('won', 'sum'), decided=('decided', 'sum'),
+                              staked=('stake', 'sum'), profit=('profit', 'sum'), mean_clv=('clv', 'mean'))
+        by_type['hit_rate'] = by_type['wins'] / by_type['decided'].where(by_type['decided'] > 0)
+        by_type['roi'] = by_type['profit'] / by_type['staked'].where(by_type['staked'] > 0)
+        return by_type.drop(columns='decided')
@@ -0,0 +1,158 @@
+"""Benchmark the vectorized game EV engine against the row-by-row version
+
+    python -m benchmarks.bench_game_ev --games 10000
+"""
+from betting_analyzer import BettingAnalyzer
+from typing import Dict, List
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+def make_game_slate(n_games: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic games frame in the OddsApiFetcher numeric schema"""
+    rng = np.random.default_rng(seed)
+    favorite = -rng.integers(105, 400, n_games)
+    underdog = rng.integers(-110, 350, n_games)
+    underdog = np.where(np.abs(underdog) < 100, 100 + np.abs(underdog), underdog)
+    home_fav = rng.random(n_games) < 0.6
+    
+    games = pd.DataFrame({
+        'Sport': 'basketball_nba',
+        'Time': [f"{7 + i % 4}:{(i % 2) * 30:02d} PM EST" for i in range(n_games)],
+        'Home': [f"Home {i}" for i in range(n_games)],
+        'Away': [f"Away {i}" for i in range(n_games)],
+        'Away ML': np.where(home_fav, underdog, favorite).astype(float),
+        'Home ML': np.where(home_fav, favorite, underdog).astype(float),
+        'Spread Point': -np.round(rng.uniform(0.5, 14, n_games) * 2) / 2,
+        'Spread Price': rng.choice([-125, -115, -110, -105, 100, 105, 120, 140], n_games).astype(float),
+        'Total Point': np.round(rng.uniform(200, 240, n_games) * 2) / 2,
+        'Over Price': rng.choice([-130, -115, -110, -105, 100, 110, 125], n_games).astype(float),
+        'Under Price': rng.choice([-130, -115, -110, -105, 100, 110, 125], n_games).astype(float),
+    })
+    # Knock out some markets so missing data is exercised
+    for column in ['Away ML', 'Spread Point', 'Over Price']:
+        games.loc[rng.random(n_games) < 0.05, column] = np.nan
+    return games
+
+def _odds_to_probability(american_odds):
+    if american_odds > 0:
+        return 100 / (american_odds + 100)
+    else:
+        return abs(american_odds) / (abs(american_odds) + 100)
+
+def _calculate_expected_value(odds, probability):
+    if odds > 0:
+        return (odds/100 * probability) - (1 - probability)
+    else:
+        return (probability - ((abs(odds)/100) * (1 - probability)))
+
+def _expected_value_per_unit(odds, probability):
+    # odds.expected_value, which replaced the formula above for negative odds
+    if odds > 0:
+        decimal_odds = 1 + odds/100
+    else:
+        decimal_odds = 1 + 100/abs(odds)
+    return probability * decimal_odds - 1
+
+def analyze_games_reference(games_df: pd.DataFrame, sport: str, new_ev: bool = False) -> List[Dict]:
+    """Row-by-row game analysis as it was before vectorization
+
+    ``new_ev`` swaps in the per-unit-stake EV the analyzer uses now, so the
+    output can be compared with the vectorized version bet for bet.
+    """
+    calculate_ev = _expected_value_per_unit if new_ev else _calculate_expected_value
+    opportunities = []
+    
+    for _, game in games_df.iterrows():
+        if pd.notna(game['Away ML']) and pd.notna(game['Home ML']):
+            odds1, odds2 = int(game['Away ML']), int(game['Home ML'])
+            prob1, prob2 = _odds_to_probability(odds1), _odds_to_probability(odds2)
+            team = 'Away' if prob1 < prob2 else 'Home'
+            odds = odds1 if prob1 < prob2 else odds2
+            prob = 1 - min(prob1, prob2)
+            ev = calculate_ev(odds, prob)
+            if ev > 0.1:
+                opportunities.append({
+                    'sport': sport,
+                    'time': game['Time'],
+                    'matchup': f"{game['Away']} @ {game['Home']}",
+                    'bet_type': 'Moneyline',
+                    'pick': f"{team} {odds}",
+                    'line': None,
+                    'odds': odds,
+                    'expected_value': ev,
+                    'analysis': f"Strong value on {team} ML ({odds}) - {prob:.1%} win probability"
+                })
+        
+        if pd.notna(game['Spread Point']) and pd.notna(game['Spread Price']):
+            points, odds = float(game['Spread Point']), int(game['Spread Price'])
+            team = 'Favorite' if points < 0 else 'Underdog'
+            prob = 0.55 if abs(points) < 7 else 0.45
+            ev = calculate_ev(odds, prob)
+            if ev > 0.12:
+                opportunities.append({
+                    'sport': sport,
+                    'time': game['Time'],
+                    'matchup': f"{game['Away']} @ {game['Home']}",
+                    'bet_type': 'Spread',
+                    'pick': f"{team} {points}",
+                    'line': points,
+                    'odds': odds,
+                    'expected_value': ev,
+                    'analysis': f"Strong spread value on {team} {points} ({odds}) - {prob:.1%} cover probability"
+                })
+        
+        if pd.notna(game['Total Point']) and pd.notna(game['Over Price']):
+            total, odds = float(game['Total Point']), int(game['Over Price'])
+            pick = 'Over' if _odds_to_probability(odds) > 0.5 else 'Under'
+            prob = 0.52 if pick == 'Over' else 0.48
+            ev = calculate_ev(odds, prob)
+            if ev > 0.12:
+                opportunities.append({
+                    'sport': sport,
+                    'time': game['Time'],
+                    'matchup': f"{game['Away']} @ {game['Home']}",
+                    'bet_type': 'Total',
+                    'pick': f"{pick} {total}",
+                    'line': total,
+                    'odds': odds,
+                    'expected_value': ev,
+                    'analysis': f"Strong value on {pick} {total} ({odds}) - {prob:.1%} probability"
+                })
+    
+    return opportunities
+
+def main():
+    parser = argparse.ArgumentParser(description="Game EV engine benchmark")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--new-ev', action='store_true',
+                        help="Use the current EV formula in the reference so outputs can be compared")
+    args = parser.parse_args()
+    
+    games = make_game_slate(args.games)
+    analyzer = BettingAnalyzer.__new__(BettingAnalyzer)  # No fetcher needed
+    
+    def best_of(fn):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+    
+    reference_time, expected = best_of(lambda: analyze_games_reference(games, 'NBA', args.new_ev))
+    vectorized_time, actual = best_of(lambda: analyzer._analyze_games(games, 'NBA'))
+    
+    print(f"Games: {args.games}, bets found: {len(actual)}")
+    print(f"Row-by-row:  {reference_time * 1000:.1f} ms")
+    print(f"Vectorized:  {vectorized_time * 1000:.1f} ms")
+    print(f"Speedup:     {reference_time / vectorized_time:.1f}x")
+    if args.new_ev:
+        print(f"Identical output: {[bet.to_dict() for bet in actual] == expected}")
+    else:
+        print("Output not compared: the reference uses the old EV formula (pass --new-ev)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Per-stage timings and peak memory for the whole best-bets pipeline
+
+    python -m benchmarks.bench_pipeline --scale medium
+    python -m benchmarks.bench_pipeline --scale large --compare benchmarks/results/pipeline-abc1234.json
+
+Every stage runs against a seeded synthetic slate (benchmarks.synthetic), so
+results from different commits are comparable. Results are written as JSON;
+--compare reports each stage against an earlier result file and exits with
+status 1 if any stage got slower than --tolerance allows.
+"""
+from betting_analyzer import BettingAnalyzer
+from benchmarks.synthetic import make_slate, SyntheticSlate
+from data_fetchers.odds_api_fetcher import OddsApiFetcher, build_odds_table
+from opportunities import sort_by_expected_value
+from sports_config import ODDS_API_SPORTS
+from typing import Callable, Dict, List, Optional
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+SCALES = {
+    'small': {'games_per_sport': 10, 'books': 5, 'players_per_game': 10},
+    'medium': {'games_per_sport': 100, 'books': 10, 'players_per_game': 16},
+    'large': {'games_per_sport': 500, 'books': 12, 'players_per_game': 20},
+    'xlarge': {'games_per_sport': 1500, 'books': 15, 'players_per_game': 24},  # A few million outcomes
+}
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+def measure(fn: Callable, repeat: int = 3, trace_memory: bool = True) -> Dict:
+    """Best and mean wall time over ``repeat`` runs, plus peak traced memory of one more run"""
+    timings = []
+    result = None
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+
+        peak = None
+        if trace_memory:
+            tracemalloc.start()
+            try:
+                fn()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    return {
+        'seconds': min(timings),
+        'mean_seconds': sum(timings) / len(timings),
+        'peak_memory_mb': None if peak is None else peak / 2**20,
+        'result': result
+    }
+
+def _live_game_states(n: int, seed: int) -> List[Dict]:
+    """Synthetic in-game states in the shape LiveGamePredictor expects"""
+    rng = np.random.default_rng(seed)
+
+    def team():
+        return {'fg_pct': rng.uniform(0.38, 0.55), 'three_pct': rng.uniform(0.28, 0.42),
+                'rebounds': int(rng.integers(20, 55)), 'turnovers': int(rng.integers(5, 20))}
+
+    return [{'stats': {'home': team(), 'away': team()}, 'home_score': int(rng.integers(40, 120)),
+             'away_score': int(rng.integers(40, 120)), 'quarter': int(rng.integers(1, 5))} for _ in range(n)]
+
+def run_pipeline(slate: SyntheticSlate, repeat: int = 3, trace_memory: bool = True,
+                 model_states: int = 200, seed: int = 0) -> Dict[str, Dict]:
+    """Time every stage of the pipeline over ``slate``"""
+    fetcher = OddsApiFetcher(api_key='benchmark')
+    fetcher._get_json = slate.get_json
+    analyzer = BettingAnalyzer(fetcher=fetcher)
+    stages: Dict[str, Dict] = {}
+
+    def record(name: str, fn: Callable, items: Callable = len):
+        stage = measure(fn, repeat, trace_memory)
+        result = stage.pop('result')
+        stage['items'] = items(result)
+        stages[name] = stage
+        return result
+
+    sport_names = {config['key']: name for name, config in ODDS_API_SPORTS.items()}
+
+    games = record('parse_games', lambda: {
+        sport: fetcher.get_upcoming_games(sport) for sport in slate.sports
+    }, items=lambda frames: sum(len(df) for df in frames.values()))
+
+    record('odds_table', lambda: {
+        sport: build_odds_table(slate.odds[sport], sport) for sport in slate.sports
+    }, items=lambda tables: sum(len(table) for table in tables.values()))
+
+    props = record('parse_props', lambda: {
+        sport: fetcher.get_player_props(sport, slate.prop_markets[sport]) for sport in slate.sports
+    }, items=lambda frames: sum(len(df) for df in frames.values()))
+
+    game_bets = record('analyze_games', lambda: [
+        bet for sport in slate.sports for bet in analyzer._analyze_games(games[sport], sport_names[sport])
+    ])
+    prop_bets = record('analyze_props', lambda: [
+        bet for sport in slate.sports for bet in analyzer._analyze_props(props[sport], sport_names[sport])
+    ])
+
+    bets = game_bets + prop_bets
+    sort_by_expected_value(bets)
+
+    # What the dashboards do with a snapshot: render rows, build a table, encode JSON
+    record('serialize', lambda: json.dumps(
+        pd.DataFrame([bet.to_dict() for bet in bets]).to_dict('records'), default=str
+    ), items=lambda payload: len(bets))
+
+    try:
+        from ml_models import LiveGamePredictor
+    except ImportError as e:
+        stages['model_inference'] = {'skipped': f"model dependencies not installed ({e})"}
+    else:
+        predictor = LiveGamePredictor()
+        states = _live_game_states(model_states, seed)
+        record('model_inference', lambda: [predictor.predict_live_spread(state) for state in states])
+
+    return stages
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Print each stage against the baseline; return the stages that regressed"""
+    regressions = []
+    print(f"\nAgainst {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    for name, stage in current['stages'].items():
+        before = baseline.get('stages', {}).get(name, {})
+        if 'seconds' not in stage or 'seconds' not in before:
+            continue
+        ratio = stage['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        flag = ''
+        if ratio > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"  {name:16s} {before['seconds'] * 1000:10.1f} ms -> {stage['seconds'] * 1000:10.1f} ms  "
+              f"({ratio:.2f}x){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Best-bets pipeline benchmark")
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--sports', nargs='+', help="ODDS_API_SPORTS names (default: all)")
+    parser.add_argument('--games', type=int, help="Games per sport")
+    parser.add_argument('--books', type=int)
+    parser.add_argument('--players', type=int, help="Players per game with props")
+    parser.add_argument('--prop-markets', nargs='+')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument('--compare', help="Earlier result file to compare against")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="Allowed slowdown ratio")
+    args = parser.parse_args()
+
+    config = dict(SCALES[args.scale])
+    overrides = {'games_per_sport': args.games, 'books': args.books, 'players_per_game': args.players}
+    config.update({key: value for key, value in overrides.items() if value is not None})
+
+    start = time.perf_counter()
+    slate = make_slate(sports=args.sports, prop_markets=args.prop_markets, seed=args.seed, **config)
+    print(f"Slate: {slate.game_count} games, {slate.outcome_count:,} outcomes "
+          f"(generated in {time.perf_counter() - start:.1f}s)")
+
+    stages = run_pipeline(slate, repeat=args.repeat, trace_memory=not args.no_memory, seed=args.seed)
+
+    commit = _git_commit()
+    result = {
+        'benchmark': 'pipeline',
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'config': {'scale': args.scale, 'sports': slate.sports, 'seed': args.seed, 'repeat': args.repeat,
+                   'prop_markets': slate.prop_markets, 'games': slate.game_count,
+                   'outcomes': slate.outcome_count, **config},
+        'stages': stages
+    }
+
+    for name, stage in stages.items():
+        if 'skipped' in stage:
+            print(f"  {name:16s} skipped: {stage['skipped']}")
+            continue
+        memory = f"{stage['peak_memory_mb']:8.1f} MB" if stage['peak_memory_mb'] is not None else ''
+        print(f"  {name:16s} {stage['seconds'] * 1000:10.1f} ms  {memory}  {stage['items']:,} items")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
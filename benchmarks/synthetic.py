@@ -0,0 +1,130 @@
+"""Seeded synthetic slates in the raw Odds API response format
+
+The same seed and sizes always produce the same slate, so benchmark runs on
+different commits see identical input. A slate can stand in for the API by
+assigning ``fetcher._get_json = slate.get_json``.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from odds import implied_to_american
+from sports_config import ODDS_API_SPORTS
+
+DEFAULT_BOOKS = ['draftkings', 'fanduel', 'betmgm', 'caesars', 'pointsbetus', 'betrivers',
+                 'wynnbet', 'unibet_us', 'bovada', 'mybookieag', 'betonlineag', 'lowvig']
+
+FIRST_GAME_TIME = datetime(2030, 1, 1, 23, 0, tzinfo=timezone.utc)  # Always upcoming
+
+@dataclass
+class SyntheticSlate:
+    """Generated /odds, /events and per-event odds responses for each sport"""
+    odds: Dict[str, List[Dict]] = field(default_factory=dict)  # sport key -> /odds response
+    event_odds: Dict[str, Dict] = field(default_factory=dict)  # event id -> /events/{id}/odds response
+    prop_markets: Dict[str, List[str]] = field(default_factory=dict)  # sport key -> prop markets
+    outcome_count: int = 0
+
+    @property
+    def sports(self) -> List[str]:
+        return list(self.odds)
+
+    @property
+    def game_count(self) -> int:
+        return sum(len(events) for events in self.odds.values())
+
+    def get_json(self, kind: str, path: str, params: Dict):
+        """Drop-in replacement for OddsApiFetcher._get_json"""
+        parts = path.strip('/').split('/')
+        sport = parts[1]
+        if kind == 'odds':
+            return self.odds[sport]
+        if kind == 'events':
+            return [{k: v for k, v in event.items() if k != 'bookmakers'} for event in self.odds[sport]]
+        if kind == 'event_odds':
+            return self.event_odds[parts[3]]
+        raise ValueError(f"Synthetic slate has no {kind} endpoint")
+
+def _prices(rng: np.random.Generator, n: int, vig: float = 0.045) -> Tuple[np.ndarray, np.ndarray]:
+    """Two-way American prices whose implied probabilities carry a margin"""
+    fair = rng.uniform(0.2, 0.8, n)
+    first = np.round(implied_to_american(np.minimum(fair * (1 + vig), 0.97)))
+    second = np.round(implied_to_american(np.minimum((1 - fair) * (1 + vig), 0.97)))
+    return first.astype(int), second.astype(int)
+
+def make_slate(sports: Optional[Sequence[str]] = None, games_per_sport: int = 10, books: int = 5,
+               players_per_game: int = 10, prop_markets: Optional[Sequence[str]] = None,
+               seed: int = 0) -> SyntheticSlate:
+    """Generate a slate
+
+    ``sports`` are ODDS_API_SPORTS names (default: all of them); prop markets
+    default to each sport's configured markets. Outcomes per game come to
+    books * (6 + 2 * players_per_game * len(prop_markets)).
+    """
+    rng = np.random.default_rng(seed)
+    sports = list(sports or ODDS_API_SPORTS)
+    n_books = len(DEFAULT_BOOKS)
+    book_keys = [DEFAULT_BOOKS[i % n_books] + (f"_{i // n_books}" if i >= n_books else '') for i in range(books)]
+    slate = SyntheticSlate()
+
+    for sport in sports:
+        sport_key = ODDS_API_SPORTS[sport]['key']
+        markets = list(prop_markets if prop_markets is not None else ODDS_API_SPORTS[sport]['prop_markets'])
+        slate.prop_markets[sport_key] = markets
+        events = []
+
+        for g in range(games_per_sport):
+            event_id = f"{sport_key}_{g:06d}"
+            home, away = f"{sport} Home {g}", f"{sport} Away {g}"
+            commence = (FIRST_GAME_TIME + timedelta(minutes=30 * (g % 8))).strftime('%Y-%m-%dT%H:%M:%SZ')
+            update = (FIRST_GAME_TIME - timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+            # Featured markets, one spread and total line per game shared by every book
+            ml_away, ml_home = _prices(rng, books)
+            spread_fav, spread_dog = _prices(rng, books, vig=0.05)
+            over, under = _prices(rng, books, vig=0.05)
+            spread = -float(rng.integers(1, 28)) / 2
+            total = float(rng.integers(380, 480)) / 2
+            bookmakers = []
+            for b, key in enumerate(book_keys):
+                bookmakers.append({'key': key, 'title': key.title(), 'last_update': update, 'markets': [
+                    {'key': 'h2h', 'outcomes': [
+                        {'name': away, 'price': int(ml_away[b])},
+                        {'name': home, 'price': int(ml_home[b])}
+                    ]},
+                    {'key': 'spreads', 'outcomes': [
+                        {'name': home, 'price': int(spread_fav[b]), 'point': spread},
+                        {'name': away, 'price': int(spread_dog[b]), 'point': -spread}
+                    ]},
+                    {'key': 'totals', 'outcomes': [
+                        {'name': 'Over', 'price': int(over[b]), 'point': total},
+                        {'name': 'Under', 'price': int(under[b]), 'point': total}
+                    ]}
+                ]})
+            event = {'id': event_id, 'sport_key': sport_key, 'commence_time': commence,
+                     'home_team': home, 'away_team': away, 'bookmakers': bookmakers}
+            events.append(event)
+            slate.outcome_count += 6 * books
+
+            # Player props: Over/Under per player, market and book
+            players = [f"{sport} Player {g}-{p}" for p in range(players_per_game)]
+            prop_books = []
+            for key in book_keys:
+                prop_markets_data = []
+                for market in markets:
+                    overs, unders = _prices(rng, players_per_game, vig=0.06)
+                    lines = np.round(rng.uniform(0.5, 30, players_per_game) * 2) / 2
+                    outcomes = []
+                    for p, player in enumerate(players):
+                        outcomes.append({'name': 'Over', 'description': player,
+                                         'price': int(overs[p]), 'point': float(lines[p])})
+                        outcomes.append({'name': 'Under', 'description': player,
+                                         'price': int(unders[p]), 'point': float(lines[p])})
+                    prop_markets_data.append({'key': market, 'outcomes': outcomes})
+                prop_books.append({'key': key, 'title': key.title(), 'last_update': update,
+                                   'markets': prop_markets_data})
+            slate.event_odds[event_id] = {**{k: v for k, v in event.items() if k != 'bookmakers'},
+                                          'bookmakers': prop_books}
+            slate.outcome_count += 2 * players_per_game * len(markets) * books
+
+        slate.odds[sport_key] = events
+    return slate
@@ -0,0 +1,359 @@
+"""Persistent ledger of recommended and placed bets (SQLite)
+
+Bets are indexed by date, sport, bet type and status. Running figures are
+kept up to date as bets settle instead of being recomputed per request:
+
+- ``bankroll`` holds one row per settled bet, in settlement order, with the
+  cumulative profit, balance, running peak and drawdown at that point. A
+  settlement normally just appends a row computed from the previous one;
+  one dated before the latest settlement rewrites the rows after it.
+- ``bet_type_stats`` holds per (sport, bet type) counts, stakes and profit,
+  updated in the same transaction as the settlement.
+
+history() returns the bankroll rows in the shape BettingVisualizer's
+plot_betting_history and plot_bankroll_evolution expect, and
+bet_type_performance() the dict plot_bet_type_performance takes. Bet rows
+use clv.BET_COLUMNS, so ledger.bets() can go straight into compute_clv.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Union
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from clv import BET_COLUMNS, bets_frame
+from odds import american_to_decimal
+from opportunities import BetOpportunity
+
+STATUSES = ('recommended', 'open', 'won', 'lost', 'push', 'void')
+SETTLED = ('won', 'lost', 'push', 'void')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bets (
+    id INTEGER PRIMARY KEY,
+    bet_key TEXT UNIQUE,
+    created_at TEXT NOT NULL,
+    placed_at TEXT,
+    settled_at TEXT,
+    status TEXT NOT NULL,
+    sport TEXT,
+    event_id TEXT,
+    market TEXT,
+    side TEXT,
+    description TEXT,
+    line REAL,
+    odds REAL,
+    probability REAL,
+    expected_value REAL,
+    bet_type TEXT,
+    pick TEXT,
+    stake REAL NOT NULL DEFAULT 0,
+    profit REAL
+);
+CREATE INDEX IF NOT EXISTS bets_created ON bets (created_at);
+CREATE INDEX IF NOT EXISTS bets_sport ON bets (sport, created_at);
+CREATE INDEX IF NOT EXISTS bets_type ON bets (bet_type, created_at);
+CREATE INDEX IF NOT EXISTS bets_status ON bets (status, created_at);
+CREATE TABLE IF NOT EXISTS bankroll (
+    bet_id INTEGER PRIMARY KEY REFERENCES bets (id),
+    settled_at TEXT NOT NULL,
+    profit REAL NOT NULL,
+    cumulative_profit REAL NOT NULL,
+    balance REAL NOT NULL,
+    peak_balance REAL NOT NULL,
+    drawdown REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bankroll_order ON bankroll (settled_at, bet_id);
+CREATE TABLE IF NOT EXISTS bet_type_stats (
+    sport TEXT NOT NULL,
+    bet_type TEXT NOT NULL,
+    bets INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    pushes INTEGER NOT NULL DEFAULT 0,
+    staked REAL NOT NULL DEFAULT 0,
+    profit REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (sport, bet_type)
+);
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value REAL);
+"""
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+def _timestamp(value=None) -> str:
+    """Fixed-width UTC ISO text, so string order is time order"""
+    stamp = pd.Timestamp(value if value is not None else datetime.now(timezone.utc))
+    stamp = stamp.tz_localize('UTC') if stamp.tzinfo is None else stamp.tz_convert('UTC')
+    return stamp.strftime(TIMESTAMP_FORMAT)
+
+def _profit(result: str, stake: float, odds: float) -> float:
+    """Profit in cents-rounded currency units"""
+    if result == 'won':
+        return round(stake * (float(american_to_decimal(odds)) - 1), 2)
+    if result == 'lost':
+        return -stake
+    return 0.0
+
+class BetLedger:
+    """Bets and their running bankroll figures in one SQLite file"""
+
+    def __init__(self, path: Optional[str] = None, starting_bankroll: float = 1000.0):
+        """Open (or create) the ledger at ``path``; BET_LEDGER_PATH or in-memory by default
+
+        ``starting_bankroll`` only applies to a new ledger.
+        """
+        self.path = path or os.getenv('BET_LEDGER_PATH') or ':memory:'
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+            self._conn.execute("INSERT OR IGNORE INTO settings VALUES ('starting_bankroll', ?)",
+                               (starting_bankroll,))
+        self.starting_bankroll = self._conn.execute(
+            "SELECT value FROM settings WHERE name = 'starting_bankroll'").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def record(self, bet: Union[BetOpportunity, Dict], status: str = 'recommended', stake: float = 0.0,
+               at=None) -> int:
+        """Add one bet and return its id (see record_many)"""
+        return self.record_many([bet], status, stake, at)[0]
+
+    def record_many(self, bets: Iterable[Union[BetOpportunity, Dict]], status: str = 'recommended',
+                    stake: float = 0.0, at=None) -> List[int]:
+        """Add bets, returning their ids
+
+        Recommendations of the same event, bet, side, line and price are
+        recorded once, so feeding every snapshot refresh in is safe.
+        """
+        if status not in STATUSES or status in SETTLED:
+            raise ValueError(f"Bets are recorded as recommended or open, not {status}")
+        bets = list(bets)
+        if not bets:
+            return []
+        if isinstance(bets[0], BetOpportunity):
+            frame = bets_frame(bets)
+            picks = [bet.pick for bet in bets]
+            probabilities = [bet.probability for bet in bets]
+        else:
+            frame = pd.DataFrame(bets).reindex(columns=BET_COLUMNS + ['pick', 'probability'])
+            frame = frame.astype(object).where(frame.notna(), None)
+            picks, probabilities = frame['pick'], frame['probability'].astype(float)
+        created = _timestamp(at)
+
+        rows = []
+        for values, pick, probability in zip(frame[BET_COLUMNS].itertuples(index=False), picks, probabilities):
+            bet = dict(zip(BET_COLUMNS, values))
+            key = None
+            if status == 'recommended' and bet['event_id'] is not None:
+                key = '|'.join(str(bet[column]) for column in
+                               ('event_id', 'market', 'side', 'description', 'line', 'odds'))
+            rows.append((key, created, created if status == 'open' else None, status, bet['sport'],
+                         bet['event_id'], bet['market'], bet['side'], bet['description'] or '',
+                         None if pd.isna(bet['line']) else float(bet['line']), float(bet['odds']),
+                         None if pd.isna(probability) else float(probability),
+                         None if pd.isna(bet['expected_value']) else float(bet['expected_value']),
+                         bet['bet_type'], pick, stake))
+
+        ids = []
+        with self._lock, self._conn:
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO bets (bet_key, created_at, placed_at, status, sport, event_id, market, "
+                    "side, description, line, odds, probability, expected_value, bet_type, pick, stake) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                if cursor.rowcount:
+                    ids.append(cursor.lastrowid)
+                else:
+                    ids.append(self._conn.execute("SELECT id FROM bets WHERE bet_key = ?", (row[0],)).fetchone()[0])
+        return ids
+
+    def place(self, bet_id: int, stake: float, odds: Optional[float] = None, at=None):
+        """Mark a bet as placed for ``stake`` (optionally at a different price)"""
+        with self._lock, self._conn:
+            bet = self._get(bet_id)
+            if bet['status'] in SETTLED:
+                raise ValueError(f"Bet {bet_id} is already settled")
+            self._conn.execute("UPDATE bets SET status = 'open', stake = ?, odds = ?, placed_at = ? WHERE id = ?",
+                               (stake, bet['odds'] if odds is None else odds, _timestamp(at), bet_id))
+
+    def settle(self, bet_id: int, result: str, at=None) -> float:
+        """Settle a placed bet as won, lost, push or void; returns its profit
+
+        Settling an already settled bet again corrects its result.
+        """
+        return self.settle_many([(bet_id, result, at)])[0]
+
+    def settle_many(self, settlements: Iterable) -> List[float]:
+        """Settle (bet_id, result, at) tuples in one transaction; returns their profits"""
+        with self._lock, self._conn:
+            return [self._settle(bet_id, result, _timestamp(at)) for bet_id, result, at in settlements]
+
+    def _settle(self, bet_id: int, result: str, settled_at: str) -> float:
+        if result not in SETTLED:
+            raise ValueError(f"Unknown result: {result}")
+        bet = self._get(bet_id)
+        if bet['status'] == 'recommended':
+            raise ValueError(f"Bet {bet_id} was never placed")
+        profit = _profit(result, bet['stake'], bet['odds'])
+        rewrite_from = None
+        if bet['status'] in SETTLED:
+            self._update_stats(bet, bet['status'], bet['profit'], -1)
+            self._conn.execute("DELETE FROM bankroll WHERE bet_id = ?", (bet_id,))
+            rewrite_from = bet['settled_at']
+
+        self._conn.execute("UPDATE bets SET status = ?, settled_at = ?, profit = ? WHERE id = ?",
+                           (result, settled_at, profit, bet_id))
+        self._update_stats(bet, result, profit, 1)
+
+        last = self._conn.execute(
+            "SELECT * FROM bankroll ORDER BY settled_at DESC, bet_id DESC LIMIT 1").fetchone()
+        if rewrite_from is None and (last is None or (last['settled_at'], last['bet_id']) < (settled_at, bet_id)):
+            # The common case: append after the latest settlement
+            cumulative = (last['cumulative_profit'] if last else 0.0) + profit
+            balance = self.starting_bankroll + cumulative
+            peak = max(last['peak_balance'] if last else self.starting_bankroll, balance)
+            self._conn.execute("INSERT INTO bankroll VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (bet_id, settled_at, profit, cumulative, balance, peak, peak - balance))
+        else:
+            self._conn.execute("INSERT INTO bankroll VALUES (?, ?, ?, 0, 0, 0, 0)", (bet_id, settled_at, profit))
+            self._rewrite_bankroll(min(settled_at, rewrite_from or settled_at))
+        return profit
+
+    def bets(self, sport: Optional[str] = None, bet_type: Optional[str] = None, status: Optional[str] = None,
+             start=None, end=None) -> pd.DataFrame:
+        """Bets recorded in [start, end), filtered on the indexed columns"""
+        clauses, params = [], []
+        for column, value in (('sport', sport), ('bet_type', bet_type), ('status', status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(_timestamp(end))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            bets = pd.read_sql_query(f"SELECT * FROM bets {where} ORDER BY created_at, id", self._conn, params=params)
+        for column in ('created_at', 'placed_at', 'settled_at'):
+            bets[column] = pd.to_datetime(bets[column], format=TIMESTAMP_FORMAT, utc=True)
+        return bets
+
+    def history(self, start=None, end=None) -> pd.DataFrame:
+        """Bankroll after every settlement in [start, end), indexed by settlement time
+
+        Columns: profit_per_bet, cumulative_profit, balance, peak_balance,
+        drawdown and drawdown_pct, read straight from the bankroll table.
+        """
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("settled_at >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            clauses.append("settled_at < ?")
+            params.append(_timestamp(end))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            history = pd.read_sql_query(
+                f"SELECT bet_id, settled_at, profit AS profit_per_bet, cumulative_profit, balance, peak_balance, "
+                f"drawdown FROM bankroll {where} ORDER BY settled_at, bet_id", self._conn, params=params)
+        history['drawdown_pct'] = history['drawdown'] / history['peak_balance']
+        settled_at = pd.to_datetime(history.pop('settled_at'), format=TIMESTAMP_FORMAT, utc=True)
+        history.index = pd.DatetimeIndex(settled_at, name='date')
+        return history
+
+    def bet_type_performance(self, sport: Optional[str] = None) -> Dict[str, Dict]:
+        """Win rate and ROI per bet type, as plot_bet_type_performance takes them"""
+        where, params = ("WHERE sport = ?", (sport,)) if sport is not None else ('', ())
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT bet_type, SUM(bets), SUM(wins), SUM(losses), SUM(pushes), SUM(staked), SUM(profit) "
+                f"FROM bet_type_stats {where} GROUP BY bet_type ORDER BY bet_type", params).fetchall()
+        performance = {}
+        for bet_type, bets, wins, losses, pushes, staked, profit in rows:
+            if not bets:
+                continue
+            decided = wins + losses
+            performance[bet_type] = {
+                'bets': bets, 'wins': wins, 'losses': losses, 'pushes': pushes, 'staked': staked, 'profit': profit,
+                'win_rate': wins / decided if decided else 0.0,
+                'roi': profit / staked if staked else 0.0
+            }
+        return performance
+
+    def summary(self) -> Dict:
+        """Headline figures: settled bets, profit, ROI, balance and worst drawdown"""
+        with self._lock:
+            totals = self._conn.execute(
+                "SELECT SUM(bets), SUM(wins), SUM(losses), SUM(staked), SUM(profit) FROM bet_type_stats").fetchone()
+            last = self._conn.execute(
+                "SELECT balance, peak_balance FROM bankroll ORDER BY settled_at DESC, bet_id DESC LIMIT 1").fetchone()
+            worst = self._conn.execute("SELECT MAX(drawdown), MAX(drawdown / peak_balance) FROM bankroll").fetchone()
+        bets, wins, losses, staked, profit = (value or 0 for value in totals)
+        return {
+            'settled_bets': bets,
+            'win_rate': wins / (wins + losses) if wins + losses else 0.0,
+            'profit': profit,
+            'roi': profit / staked if staked else 0.0,
+            'balance': last['balance'] if last else self.starting_bankroll,
+            'peak_balance': last['peak_balance'] if last else self.starting_bankroll,
+            'max_drawdown': worst[0] or 0.0,
+            'max_drawdown_pct': worst[1] or 0.0
+        }
+
+    def rebuild(self):
+        """Recompute the bankroll and per-type tables from the settled bets"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM bet_type_stats")
+            self._conn.execute(
+                "INSERT INTO bet_type_stats SELECT sport, bet_type, COUNT(*), SUM(status = 'won'), "
+                "SUM(status = 'lost'), SUM(status IN ('push', 'void')), SUM(stake), SUM(profit) "
+                "FROM bets WHERE status IN ('won', 'lost', 'push', 'void') GROUP BY sport, bet_type")
+            self._conn.execute("DELETE FROM bankroll")
+            self._conn.execute(
+                "INSERT INTO bankroll SELECT id, settled_at, profit, 0, 0, 0, 0 FROM bets "
+                "WHERE status IN ('won', 'lost', 'push', 'void')")
+            self._rewrite_bankroll(None)
+
+    def _get(self, bet_id: int) -> sqlite3.Row:
+        bet = self._conn.execute("SELECT * FROM bets WHERE id = ?", (bet_id,)).fetchone()
+        if bet is None:
+            raise KeyError(f"No bet {bet_id}")
+        return bet
+
+    def _update_stats(self, bet: sqlite3.Row, result: str, profit: float, sign: int):
+        self._conn.execute(
+            "INSERT INTO bet_type_stats (sport, bet_type) VALUES (?, ?) ON CONFLICT DO NOTHING",
+            (bet['sport'], bet['bet_type']))
+        self._conn.execute(
+            "UPDATE bet_type_stats SET bets = bets + ?, wins = wins + ?, losses = losses + ?, pushes = pushes + ?, "
+            "staked = staked + ?, profit = profit + ? WHERE sport = ? AND bet_type = ?",
+            (sign, sign * (result == 'won'), sign * (result == 'lost'), sign * (result in ('push', 'void')),
+             sign * bet['stake'], sign * profit, bet['sport'], bet['bet_type']))
+
+    def _rewrite_bankroll(self, since: Optional[str]):
+        """Recompute the running columns for settlements at or after ``since``"""
+        before = None
+        if since is not None:
+            before = self._conn.execute(
+                "SELECT cumulative_profit, peak_balance FROM bankroll WHERE settled_at < ? "
+                "ORDER BY settled_at DESC, bet_id DESC LIMIT 1", (since,)).fetchone()
+            rows = self._conn.execute("SELECT bet_id, profit FROM bankroll WHERE settled_at >= ? "
+                                      "ORDER BY settled_at, bet_id", (since,)).fetchall()
+        else:
+            rows = self._conn.execute("SELECT bet_id, profit FROM bankroll ORDER BY settled_at, bet_id").fetchall()
+        if not rows:
+            return
+
+        bet_ids = np.array([row[0] for row in rows])
+        cumulative = np.cumsum([row[1] for row in rows]) + (before[0] if before else 0.0)
+        balance = self.starting_bankroll + cumulative
+        peak = np.maximum.accumulate(np.maximum(balance, before[1] if before else self.starting_bankroll))
+        self._conn.executemany(
+            "UPDATE bankroll SET cumulative_profit = ?, balance = ?, peak_balance = ?, drawdown = ? WHERE bet_id = ?",
+            zip(cumulative.tolist(), balance.tolist(), peak.tolist(), (peak - balance).tolist(), bet_ids.tolist()))
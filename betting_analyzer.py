@@ -3,261 +3,257 @@ import pandas as pd
 from datetime import datetime, timedelta
 import pytz
 import numpy as np
+from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from sports_config import ODDS_API_SPORTS
+from odds import american_to_implied, expected_value
+from opportunities import BetOpportunity, sort_by_expected_value
+from profiling import timed
 
 class BettingAnalyzer:
-    def __init__(self):
-        self.fetcher = OddsApiFetcher()
+    # Minimum expected value for a bet to be recommended
+    EV_THRESHOLDS = {
+        'Moneyline': 0.10,
+        'Spread': 0.12,
+        'Total': 0.12,
+        'Player Prop': 0.15
+    }
+    
+    # Probability multipliers per prop type as (Over, Under)
+    PROP_ADJUSTMENTS = {
+        'Points': (1.05, 0.95),      # Points tend to go over slightly more often
+        'Rebounds': (1.02, 0.98),    # Rebounds are more volatile
+        'Assists': (1.01, 0.99),     # Assists are more predictable
+        'Pass Tds': (1.03, 0.97),    # Passing TDs are more volatile
+        'Receptions': (1.01, 0.99)   # Receptions are more predictable
+    }
+    
+    def __init__(self, fetcher: Optional[OddsApiFetcher] = None):
+        self.fetcher = fetcher or OddsApiFetcher()
+        self.max_workers = 2 * len(ODDS_API_SPORTS)  # Games and props for every sport at once
         self.est_tz = pytz.timezone('US/Eastern')
         
+    @timed('best_bets')
     def get_todays_best_bets(self):
-        """Get the best betting opportunities for today's games"""
-        best_bets = []
+        """Get the best betting opportunities for today's games
         
-        # Get NBA games and bets
-        nba_games = self.fetcher.get_upcoming_games('basketball_nba')
-        if not nba_games.empty:
-            best_bets.extend(self._analyze_games(nba_games, 'NBA'))
-            
-            # Get NBA player props
-            nba_props = self.fetcher.get_player_props('basketball_nba')
-            if not nba_props.empty:
-                best_bets.extend(self._analyze_props(nba_props, 'NBA'))
+        Games and props for every sport in ODDS_API_SPORTS are fetched and
+        analyzed in parallel, so the total time is roughly that of the slowest
+        sport rather than the sum.
+        """
+        tasks = []
+        for sport, config in ODDS_API_SPORTS.items():
+            tasks.append((self._get_game_bets, sport, config))
+            tasks.append((self._get_prop_bets, sport, config))
         
-        # Get NFL games and bets
-        nfl_games = self.fetcher.get_upcoming_games('americanfootball_nfl')
-        if not nfl_games.empty:
-            best_bets.extend(self._analyze_games(nfl_games, 'NFL'))
-            
-            # Get NFL player props
-            nfl_props = self.fetcher.get_player_props('americanfootball_nfl')
-            if not nfl_props.empty:
-                best_bets.extend(self._analyze_props(nfl_props, 'NFL'))
+        best_bets = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._run_task, task, sport, config) for task, sport, config in tasks]
+            for future in futures:
+                best_bets.extend(future.result())
         
         # Sort by expected value
-        best_bets.sort(key=lambda x: x['expected_value'], reverse=True)
+        sort_by_expected_value(best_bets)
         return best_bets
     
+    def _run_task(self, task, sport, config):
+        """Run one fetch+analyze task, isolating its failures from the others"""
+        try:
+            return task(sport, config)
+        except Exception as e:
+            print(f"Error analyzing {sport} ({task.__name__}): {e}")
+            return []
+    
+    def _get_game_bets(self, sport, config):
+        """Fetch and analyze one sport's games"""
+        games = self.fetcher.get_upcoming_games(config['key'])
+        if games.empty:
+            return []
+        return self._analyze_games(games, sport)
+    
+    def _get_prop_bets(self, sport, config):
+        """Fetch and analyze one sport's player props"""
+        if not config.get('prop_markets'):
+            return []
+        props = self.fetcher.get_player_props(config['key'], config['prop_markets'])
+        if props.empty:
+            return []
+        return self._analyze_props(props, sport)
+    
+    @timed('analyze_games')
     def _analyze_games(self, games_df, sport):
-        """Analyze games to find the best betting opportunities"""
-        opportunities = []
+        """Analyze games to find the best betting opportunities
         
-        for _, game in games_df.iterrows():
-            # Analyze moneyline
-            ml_odds = self._parse_ml(game['ML'])
-            if ml_odds:
-                prob = self._calculate_win_probability(game, ml_odds['team'])
-                ev = self._calculate_expected_value(ml_odds['odds'], prob)
-                if ev > 0.1:  # 10% expected value
-                    opportunities.append({
-                        'sport': sport,
-                        'time': game['Time'],
-                        'matchup': f"{game['Away']} @ {game['Home']}",
-                        'bet_type': 'Moneyline',
-                        'pick': f"{ml_odds['team']} {ml_odds['odds']}",
-                        'line': None,
-                        'odds': ml_odds['odds'],
-                        'expected_value': ev,
-                        'analysis': f"Strong value on {ml_odds['team']} ML ({ml_odds['odds']}) - {prob:.1%} win probability"
-                    })
-            
-            # Analyze spread
-            spread_odds = self._parse_spread(game['Spread'])
-            if spread_odds:
-                prob = self._calculate_spread_probability(game, spread_odds)
-                ev = self._calculate_expected_value(spread_odds['odds'], prob)
-                if ev > 0.12:  # 12% expected value for spreads
-                    opportunities.append({
-                        'sport': sport,
-                        'time': game['Time'],
-                        'matchup': f"{game['Away']} @ {game['Home']}",
-                        'bet_type': 'Spread',
-                        'pick': f"{spread_odds['team']} {spread_odds['points']}",
-                        'line': spread_odds['points'],
-                        'odds': spread_odds['odds'],
-                        'expected_value': ev,
-                        'analysis': f"Strong spread value on {spread_odds['team']} {spread_odds['points']} ({spread_odds['odds']}) - {prob:.1%} cover probability"
-                    })
-            
-            # Analyze totals
-            total_odds = self._parse_total(game['Total'])
-            if total_odds:
-                prob = self._calculate_total_probability(game, total_odds)
-                ev = self._calculate_expected_value(total_odds['odds'], prob)
-                if ev > 0.12:  # 12% expected value for totals
-                    opportunities.append({
-                        'sport': sport,
-                        'time': game['Time'],
-                        'matchup': f"{game['Away']} @ {game['Home']}",
-                        'bet_type': 'Total',
-                        'pick': f"{'Over' if total_odds['pick'] == 'Over' else 'Under'} {total_odds['total']}",
-                        'line': total_odds['total'],
-                        'odds': total_odds['odds'],
-                        'expected_value': ev,
-                        'analysis': f"Strong value on {total_odds['pick']} {total_odds['total']} ({total_odds['odds']}) - {prob:.1%} probability"
-                    })
+        Moneyline, spread and total are priced for the whole slate at once with
+        array operations; BetOpportunity records are only built for bets that
+        clear the EV thresholds.
+        """
+        if games_df.empty:
+            return []
+        
+        scores = self._score_games(games_df)
+        ml_mask = scores['ml_valid'] & (scores['ml_ev'] > self.EV_THRESHOLDS['Moneyline'])
+        spread_mask = scores['spread_valid'] & (scores['spread_ev'] > self.EV_THRESHOLDS['Spread'])
+        total_mask = scores['total_valid'] & (scores['total_ev'] > self.EV_THRESHOLDS['Total'])
+        
+        # Emit bets game by game (moneyline, spread, total) like the row-wise version did
+        rows = np.concatenate([np.flatnonzero(ml_mask), np.flatnonzero(spread_mask), np.flatnonzero(total_mask)])
+        kinds = np.repeat([0, 1, 2], [ml_mask.sum(), spread_mask.sum(), total_mask.sum()])
+        order = np.lexsort((kinds, rows))
+        
+        times = games_df['Time'].to_numpy()
+        homes = games_df['Home'].to_numpy()
+        aways = games_df['Away'].to_numpy()
+        event_ids = games_df['Event ID'].to_numpy() if 'Event ID' in games_df else np.full(len(games_df), None)
+        
+        opportunities = []
+        for i, kind in zip(rows[order], kinds[order]):
+            if kind == 0:
+                bet = BetOpportunity(sport, times[i], 'Moneyline', 'Away' if scores['away_pick'][i] else 'Home',
+                                     odds=int(scores['ml_odds'][i]), probability=float(scores['ml_prob'][i]),
+                                     expected_value=float(scores['ml_ev'][i]),
+                                     away=aways[i], home=homes[i], event_id=event_ids[i])
+            elif kind == 1:
+                spread_point = scores['spread_points'][i]
+                bet = BetOpportunity(sport, times[i], 'Spread', 'Favorite' if spread_point < 0 else 'Underdog',
+                                     odds=int(scores['spread_odds'][i]), probability=float(scores['spread_prob'][i]),
+                                     expected_value=float(scores['spread_ev'][i]), line=float(spread_point),
+                                     away=aways[i], home=homes[i], event_id=event_ids[i])
+            else:
+                bet = BetOpportunity(sport, times[i], 'Total', 'Over' if scores['over_pick'][i] else 'Under',
+                                     odds=int(scores['over_odds'][i]), probability=float(scores['total_prob'][i]),
+                                     expected_value=float(scores['total_ev'][i]), line=float(scores['total_points'][i]),
+                                     away=aways[i], home=homes[i], event_id=event_ids[i])
+            opportunities.append(bet)
         
         return opportunities
     
-    def _analyze_props(self, props_df, sport):
-        """Analyze player props to find the best betting opportunities"""
-        opportunities = []
+    def _score_games(self, games_df) -> Dict[str, np.ndarray]:
+        """Pick, odds, probability and expected value of every game's moneyline, spread and total
         
-        for _, prop in props_df.iterrows():
-            over_odds = int(prop['Over']) if pd.notna(prop['Over']) else None
-            under_odds = int(prop['Under']) if pd.notna(prop['Under']) else None
+        No EV threshold is applied, so a backtest can score a season once and
+        try many cutoffs. ``*_valid`` marks games where the market was offered.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            away_ml = np.trunc(games_df['Away ML'].to_numpy(dtype=float))
+            home_ml = np.trunc(games_df['Home ML'].to_numpy(dtype=float))
+            spread_points = games_df['Spread Point'].to_numpy(dtype=float)
+            spread_odds = np.trunc(games_df['Spread Price'].to_numpy(dtype=float))
+            total_points = games_df['Total Point'].to_numpy(dtype=float)
+            over_odds = np.trunc(games_df['Over Price'].to_numpy(dtype=float))
             
-            if over_odds:
-                prob = self._calculate_prop_probability(prop, 'Over')
-                ev = self._calculate_expected_value(over_odds, prob)
-                if ev > 0.15:  # 15% expected value for props
-                    opportunities.append({
-                        'sport': sport,
-                        'time': prop['Time'],
-                        'matchup': prop['Game'],
-                        'bet_type': f"Player Prop - {prop['Type']}",
-                        'pick': f"{prop['Player']} Over {prop['Line']}",
-                        'line': prop['Line'],
-                        'odds': over_odds,
-                        'expected_value': ev,
-                        'analysis': f"Strong value on {prop['Player']} Over {prop['Line']} {prop['Type']} ({over_odds}) - {prob:.1%} probability"
-                    })
+            # Moneyline: back the side with the lower implied probability
+            away_prob = american_to_implied(away_ml)
+            home_prob = american_to_implied(home_ml)
+            away_pick = away_prob < home_prob
+            ml_odds = np.where(away_pick, away_ml, home_ml)
+            ml_prob = self._win_probabilities(np.minimum(away_prob, home_prob))
             
-            if under_odds:
-                prob = self._calculate_prop_probability(prop, 'Under')
-                ev = self._calculate_expected_value(under_odds, prob)
-                if ev > 0.15:  # 15% expected value for props
-                    opportunities.append({
-                        'sport': sport,
-                        'time': prop['Time'],
-                        'matchup': prop['Game'],
-                        'bet_type': f"Player Prop - {prop['Type']}",
-                        'pick': f"{prop['Player']} Under {prop['Line']}",
-                        'line': prop['Line'],
-                        'odds': under_odds,
-                        'expected_value': ev,
-                        'analysis': f"Strong value on {prop['Player']} Under {prop['Line']} {prop['Type']} ({under_odds}) - {prob:.1%} probability"
-                    })
-        
-        return opportunities
-    
-    def _parse_ml(self, ml_str):
-        """Parse moneyline odds string"""
-        try:
-            if not ml_str:
-                return None
-            odds = ml_str.split('/')
-            odds1 = int(odds[0])
-            odds2 = int(odds[1])
+            # Spread: the favorite's line
+            spread_prob = self._spread_probabilities(spread_points)
             
-            # Find the better value
-            prob1 = self._odds_to_probability(odds1)
-            prob2 = self._odds_to_probability(odds2)
+            # Total: pick follows the over price
+            over_pick = american_to_implied(over_odds) > 0.5
+            total_prob = self._total_probabilities(over_pick)
             
             return {
-                'team': 'Away' if prob1 < prob2 else 'Home',
-                'odds': odds1 if prob1 < prob2 else odds2,
-                'implied_prob': min(prob1, prob2)
+                'away_pick': away_pick, 'ml_odds': ml_odds, 'ml_prob': ml_prob,
+                'ml_ev': expected_value(ml_odds, ml_prob), 'ml_valid': ~np.isnan(away_ml) & ~np.isnan(home_ml),
+                'spread_points': spread_points, 'spread_odds': spread_odds, 'spread_prob': spread_prob,
+                'spread_ev': expected_value(spread_odds, spread_prob),
+                'spread_valid': ~np.isnan(spread_points) & ~np.isnan(spread_odds),
+                'total_points': total_points, 'over_odds': over_odds, 'over_pick': over_pick,
+                'total_prob': total_prob, 'total_ev': expected_value(over_odds, total_prob),
+                'total_valid': ~np.isnan(total_points) & ~np.isnan(over_odds)
             }
-        except:
-            return None
     
-    def _parse_spread(self, spread_str):
-        """Parse spread odds string"""
-        try:
-            if not spread_str:
-                return None
-            parts = spread_str.split(' ')
-            points = float(parts[0])
-            odds = int(parts[1].strip('()'))
-            
-            return {
-                'team': 'Favorite' if points < 0 else 'Underdog',
-                'points': points,
-                'odds': odds,
-                'implied_prob': self._odds_to_probability(odds)
-            }
-        except:
-            return None
+    @timed('analyze_props')
+    def _analyze_props(self, props_df, sport):
+        """Analyze player props to find the best betting opportunities
+        
+        Each row carries both the Over and Under price; both sides are scored
+        for every prop at once with array operations.
+        """
+        if props_df.empty:
+            return []
+        
+        scores = self._score_props(props_df)
+        threshold = self.EV_THRESHOLDS['Player Prop']
+        over_odds, under_odds = scores['over_odds'], scores['under_odds']
+        over_prob, under_prob = scores['over_prob'], scores['under_prob']
+        over_ev, under_ev = scores['over_ev'], scores['under_ev']
+        over_mask = scores['over_valid'] & (over_ev > threshold)
+        under_mask = scores['under_valid'] & (under_ev > threshold)
+        
+        # Emit prop by prop, Over before Under
+        rows = np.concatenate([np.flatnonzero(over_mask), np.flatnonzero(under_mask)])
+        sides = np.repeat([0, 1], [over_mask.sum(), under_mask.sum()])
+        order = np.lexsort((sides, rows))
+        
+        times = props_df['Time'].to_numpy()
+        games = props_df['Game'].to_numpy()
+        players = props_df['Player'].to_numpy()
+        types = props_df['Type'].to_numpy()
+        lines = props_df['Line'].to_numpy()
+        event_ids = props_df['Event ID'].to_numpy() if 'Event ID' in props_df else np.full(len(props_df), None)
+        
+        opportunities = []
+        for i, side in zip(rows[order], sides[order]):
+            if side == 0:
+                pick, odds, prob, ev = 'Over', int(over_odds[i]), float(over_prob[i]), over_ev[i]
+            else:
+                pick, odds, prob, ev = 'Under', int(under_odds[i]), float(under_prob[i]), under_ev[i]
+            opportunities.append(BetOpportunity(sport, times[i], types[i], pick, odds=odds, probability=prob,
+                                                expected_value=float(ev), line=float(lines[i]),
+                                                game=games[i], player=players[i], event_id=event_ids[i]))
+        
+        return opportunities
     
-    def _parse_total(self, total_str):
-        """Parse total odds string"""
-        try:
-            if not total_str:
-                return None
-            parts = total_str.split(' ')
-            total = float(parts[1])
-            odds = int(parts[2].strip('()'))
-            over_prob = self._odds_to_probability(odds)
-            
+    def _score_props(self, props_df) -> Dict[str, np.ndarray]:
+        """Probability and expected value of both sides of every prop, before the EV threshold"""
+        over_odds = np.trunc(props_df['Over'].to_numpy(dtype=float))
+        under_odds = np.trunc(props_df['Under'].to_numpy(dtype=float))
+        prop_types = props_df['Type']
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            over_prob = self._prop_probabilities(over_odds, prop_types, 'Over')
+            under_prob = self._prop_probabilities(under_odds, prop_types, 'Under')
             return {
-                'total': total,
-                'odds': odds,
-                'pick': 'Over' if over_prob > 0.5 else 'Under',
-                'implied_prob': over_prob
+                'over_odds': over_odds, 'under_odds': under_odds,
+                'over_prob': over_prob, 'under_prob': under_prob,
+                'over_ev': expected_value(over_odds, over_prob), 'under_ev': expected_value(under_odds, under_prob),
+                'over_valid': ~np.isnan(over_odds) & (over_odds != 0),
+                'under_valid': ~np.isnan(under_odds) & (under_odds != 0)
             }
-        except:
-            return None
-    
-    def _odds_to_probability(self, american_odds):
-        """Convert American odds to implied probability"""
-        if american_odds > 0:
-            return 100 / (american_odds + 100)
-        else:
-            return abs(american_odds) / (abs(american_odds) + 100)
     
-    def _calculate_expected_value(self, odds, probability):
-        """Calculate expected value of a bet"""
-        if odds > 0:
-            return (odds/100 * probability) - (1 - probability)
-        else:
-            return (probability - ((abs(odds)/100) * (1 - probability)))
-    
-    def _calculate_win_probability(self, game, team):
-        """Calculate win probability based on various factors"""
+    def _win_probabilities(self, underdog_implied):
+        """Calculate moneyline win probabilities for a slate"""
         # This should be enhanced with historical data, team stats, etc.
         # For now using a simple model based on implied probability
-        ml_odds = self._parse_ml(game['ML'])
-        return 1 - ml_odds['implied_prob']  # Basic contrarian approach
+        return 1 - underdog_implied  # Basic contrarian approach
     
-    def _calculate_spread_probability(self, game, spread_odds):
-        """Calculate probability of covering the spread"""
+    def _spread_probabilities(self, points):
+        """Calculate probabilities of covering the spread for a slate"""
         # This should be enhanced with historical ATS data, team stats, etc.
-        return 0.55 if abs(spread_odds['points']) < 7 else 0.45
+        return np.where(np.abs(points) < 7, 0.55, 0.45)
     
-    def _calculate_total_probability(self, game, total_odds):
-        """Calculate probability of over/under hitting"""
+    def _total_probabilities(self, over_pick):
+        """Calculate probabilities of the over/under hitting for a slate"""
         # This should be enhanced with historical O/U data, team stats, etc.
-        return 0.52 if total_odds['pick'] == 'Over' else 0.48
+        return np.where(over_pick, 0.52, 0.48)
     
-    def _calculate_prop_probability(self, prop, side):
-        """Calculate probability of a player prop hitting"""
-        # Get the implied probability from the odds
-        if side == 'Over':
-            implied_prob = self._odds_to_probability(int(prop['Over'])) if pd.notna(prop['Over']) else 0.5
-        else:
-            implied_prob = self._odds_to_probability(int(prop['Under'])) if pd.notna(prop['Under']) else 0.5
+    def _prop_probabilities(self, odds, prop_types, side):
+        """Calculate probabilities of player props hitting for one side"""
+        # Start from the implied probability of the odds (0.5 when missing)
+        implied_prob = np.where(np.isnan(odds), 0.5, american_to_implied(odds))
         
         # Adjust probability based on prop type and historical trends
-        base_prob = implied_prob
-        
-        if prop['Type'] == 'Points':
-            # Points tend to go over slightly more often
-            base_prob = base_prob * 1.05 if side == 'Over' else base_prob * 0.95
-        elif prop['Type'] == 'Rebounds':
-            # Rebounds are more volatile
-            base_prob = base_prob * 1.02 if side == 'Over' else base_prob * 0.98
-        elif prop['Type'] == 'Assists':
-            # Assists are more predictable
-            base_prob = base_prob * 1.01 if side == 'Over' else base_prob * 0.99
-        elif prop['Type'] == 'Pass Tds':
-            # Passing TDs are more volatile
-            base_prob = base_prob * 1.03 if side == 'Over' else base_prob * 0.97
-        elif prop['Type'] == 'Receptions':
-            # Receptions are more predictable
-            base_prob = base_prob * 1.01 if side == 'Over' else base_prob * 0.99
+        column = 0 if side == 'Over' else 1
+        adjustments = {prop_type: sides[column] for prop_type, sides in self.PROP_ADJUSTMENTS.items()}
+        multiplier = pd.Series(prop_types).map(adjustments).fillna(1.0).to_numpy(dtype=float)
         
         # Cap probability at reasonable limits
-        return min(max(base_prob, 0.35), 0.75)
+        return np.clip(implied_prob * multiplier, 0.35, 0.75)
 
 if __name__ == "__main__":
     analyzer = BettingAnalyzer()
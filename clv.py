@@ -0,0 +1,190 @@
+"""Closing line value of recommended or placed bets
+
+A bet's closing line is the last price each book offered for the same
+outcome before the game started, taken from the odds history store. The
+join is a single pd.merge_asof of the bets (one row per bet and book, keyed
+on commence time) against the history sorted by capture time, so no bet
+scans the history on its own. The books' closing prices are combined into a
+consensus (median implied probability), or one book's close is used when
+``book`` is given.
+
+    clv = compute_clv(analyzer.get_todays_best_bets(), load_history(store, 'basketball_nba'))
+    report = clv_report(clv)  # {'sport': ..., 'bet_type': ..., 'ev_bucket': ...}
+
+Positive CLV means the bet beat the close: ``clv`` is the bet's expected
+value priced at the closing implied probability, and ``clv_probability``
+is how far the outcome's implied probability moved toward it. For spreads,
+totals and props the close may be at a different line; ``clv_points`` is
+how many points better (positive) or worse the bet's line is than the
+close, and each point is worth ``point_value`` of probability in both.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from odds import american_to_decimal, american_to_implied, implied_to_american
+from opportunities import BetOpportunity
+from profiling import timed
+
+# BetOpportunity.market -> odds table market
+MARKET_KEYS = {'Moneyline': 'h2h', 'Spread': 'spreads', 'Total': 'totals'}
+
+# Expected value buckets for the report
+EV_BUCKETS = [0.0, 0.02, 0.05, 0.1, 0.2, np.inf]
+
+# Implied probability of one point of spread/total, near the middle of a basketball line
+POINT_PROBABILITY = 0.03
+
+BET_COLUMNS = ['sport', 'event_id', 'market', 'side', 'description', 'line', 'odds', 'expected_value', 'bet_type']
+
+def prop_market_key(prop_type: str) -> str:
+    """Odds API market key of a prop type label (inverse of get_player_props' labels)"""
+    return 'player_' + prop_type.lower().replace(' ', '_')
+
+def bets_frame(bets: Union[pd.DataFrame, Iterable[BetOpportunity]]) -> pd.DataFrame:
+    """Bets as rows of BET_COLUMNS
+
+    A DataFrame is taken to already have these columns (e.g. placed bets
+    from a ledger); BetOpportunity records are translated, with ``side``
+    being Home/Away for moneylines, Favorite/Underdog for spreads and
+    Over/Under for totals and props.
+    """
+    if isinstance(bets, pd.DataFrame):
+        return bets
+    rows = []
+    for bet in bets:
+        if bet.player is not None:
+            market, description = prop_market_key(bet.market), bet.player
+        else:
+            market, description = MARKET_KEYS.get(bet.market, bet.market), ''
+        rows.append((bet.sport, bet.event_id, market, bet.selection, description, bet.line, bet.odds,
+                     bet.expected_value, bet.bet_type))
+    return pd.DataFrame(rows, columns=BET_COLUMNS)
+
+def load_history(store, sport: str, event_ids: Optional[Sequence[str]] = None,
+                 dates: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Read the history columns compute_clv needs from an OddsHistoryStore"""
+    columns = ['captured_at', 'event_id', 'book', 'market', 'outcome', 'description', 'point', 'price',
+               'home_team', 'commence_time']
+    if event_ids is not None and dates is None:
+        return pd.concat([store.event_history(sport, event_id, columns=columns) for event_id in event_ids],
+                         ignore_index=True)
+    frames = [store.read_partition(sport, date, columns) for date in (dates or store.partitions(sport))]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+def _ns(values) -> np.ndarray:
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).asi8
+
+def _side_codes(market: np.ndarray, selection_codes: np.ndarray, is_home: np.ndarray, is_favorite: np.ndarray,
+                h2h: int, spreads: int) -> np.ndarray:
+    """Integer bet side: 0/1 Home/Away, 2/3 Favorite/Underdog, otherwise 4 + outcome code"""
+    return np.select([market == h2h, market == spreads],
+                     [np.where(is_home, 0, 1), np.where(is_favorite, 2, 3)], default=4 + selection_codes)
+
+@timed('compute_clv')
+def compute_clv(bets: Union[pd.DataFrame, Iterable[BetOpportunity]], history: pd.DataFrame,
+                book: Optional[str] = None, point_value: float = POINT_PROBABILITY) -> pd.DataFrame:
+    """Join each bet to its closing line
+
+    ``history`` needs captured_at, event_id, book, market, outcome,
+    description, point, price, home_team and commence_time (see
+    load_history). Adds close_price, close_point, close_books, clv_points,
+    clv and clv_probability; bets with no pre-commence price keep NaN.
+
+    Keys are turned into integer codes once, so the as-of join and the
+    grouping run on int64 columns rather than strings.
+    """
+    bets = bets_frame(bets).reset_index(drop=True)
+    bets['description'] = bets['description'].fillna('').astype(str)
+
+    # Only the bets' events matter; cut the history down before anything else
+    history = history[history['event_id'].isin(set(bets['event_id'].dropna().astype(str)))]
+    if book is not None:
+        history = history[history['book'] == book]
+
+    codes, uniques = {}, {}
+    for column in ('event_id', 'market', 'outcome', 'description', 'book', 'home_team'):
+        values = history[column]
+        if column == 'description':
+            values = values.astype(object).where(values.notna(), '')
+        codes[column], uniques[column] = pd.factorize(values)
+        uniques[column] = pd.Index(uniques[column]).astype(str)
+
+    def lookup(column: str, values) -> np.ndarray:
+        return uniques[column].get_indexer(pd.Index(values).astype(str))
+
+    h2h, spreads = lookup('market', ['h2h', 'spreads'])
+    home_outcome = lookup('outcome', uniques['home_team'])
+    history_side = _side_codes(codes['market'], codes['outcome'], codes['outcome'] == home_outcome[codes['home_team']],
+                               history['point'].to_numpy(dtype=float) < 0, h2h, spreads)
+    bet_market = lookup('market', bets['market'])
+    selection = bets['side'].astype(str).to_numpy()
+    bet_side = _side_codes(bet_market, lookup('outcome', selection), selection == 'Home',
+                           selection == 'Favorite', h2h, spreads)
+
+    # One int64 key per (event, market, side, description); -1 when the bet's value never appears
+    sizes = [len(uniques['event_id']), len(uniques['market']), len(uniques['outcome']) + 4,
+             len(uniques['description']), len(uniques['book'])]
+
+    def outcome_key(event, market, side, description) -> np.ndarray:
+        key = ((event.astype(np.int64) * sizes[1] + market) * sizes[2] + side) * sizes[3] + description
+        return np.where((event < 0) | (market < 0) | (side < 0) | (description < 0), -1, key)
+
+    history_key = outcome_key(codes['event_id'], codes['market'], history_side, codes['description'])
+    bet_event = lookup('event_id', bets['event_id'])
+    bet_key = outcome_key(bet_event, bet_market, bet_side, lookup('description', bets['description']))
+
+    ticks = pd.DataFrame({'captured_at': _ns(history['captured_at']),
+                          'key': history_key * sizes[4] + codes['book'],
+                          'point': history['point'].to_numpy(dtype=float),
+                          'price': history['price'].to_numpy(dtype=float)}).sort_values('captured_at')
+
+    # One row per bet and quoting book, due at the event's start
+    first_rows = np.unique(codes['event_id'], return_index=True)[1]
+    commence = np.full(sizes[0], np.iinfo(np.int64).min)
+    commence[codes['event_id'][first_rows]] = _ns(history['commence_time'].iloc[first_rows])
+    quoted = pd.DataFrame({'outcome_key': history_key, 'book': codes['book']}).drop_duplicates()
+    left = pd.DataFrame({'bet': np.arange(len(bets)), 'outcome_key': bet_key})
+    left = left[bet_key >= 0].merge(quoted, on='outcome_key')
+    left['key'] = left['outcome_key'] * sizes[4] + left['book']
+    left['cutoff'] = commence[bet_event[left['bet'].to_numpy()]]
+
+    closes = pd.merge_asof(
+        left.sort_values('cutoff'), ticks,
+        left_on='cutoff', right_on='captured_at', by='key',
+        allow_exact_matches=False  # Strictly before the start
+    ).dropna(subset=['price'])
+
+    closes['implied'] = american_to_implied(closes['price'].to_numpy())
+    per_bet = closes.groupby('bet').agg(close_probability=('implied', 'median'), close_point=('point', 'median'),
+                                        close_books=('book', 'size'))
+    result = bets.join(per_bet.reindex(np.arange(len(bets))))
+    result['close_books'] = result['close_books'].fillna(0).astype(int)
+    result['close_price'] = np.round(implied_to_american(result['close_probability'].to_numpy()))
+
+    # Points the bet's line beats the close by: a higher point is better except for Overs
+    line_gain = result['line'].to_numpy(dtype=float) - result['close_point'].to_numpy(dtype=float)
+    result['clv_points'] = np.where(selection == 'Over', -line_gain, line_gain)
+    point_probability = np.nan_to_num(result['clv_points'].to_numpy(dtype=float)) * point_value
+
+    # The close priced at the bet's own line
+    odds = result['odds'].to_numpy(dtype=float)
+    close_probability = result['close_probability'].to_numpy(dtype=float) + point_probability
+    result['clv'] = american_to_decimal(odds) * close_probability - 1
+    result['clv_probability'] = close_probability - american_to_implied(odds)
+    return result
+
+def summarize(clv: pd.DataFrame, by: Union[str, List[str]]) -> pd.DataFrame:
+    """Bets, mean CLV and share of bets that beat the close per group"""
+    priced = clv.dropna(subset=['clv'])
+    grouped = priced.assign(beat_close=priced['clv'] > 0).groupby(by, observed=True)
+    return grouped.agg(bets=('clv', 'size'), mean_clv=('clv', 'mean'), median_clv=('clv', 'median'),
+                       mean_clv_probability=('clv_probability', 'mean'), beat_close=('beat_close', 'mean'))
+
+def clv_report(clv: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """CLV by sport, bet type and expected-value bucket"""
+    bucketed = clv.assign(ev_bucket=pd.cut(clv['expected_value'], EV_BUCKETS, right=False))
+    return {
+        'sport': summarize(bucketed, 'sport'),
+        'bet_type': summarize(bucketed, 'bet_type'),
+        'ev_bucket': summarize(bucketed, 'ev_bucket'),
+    }
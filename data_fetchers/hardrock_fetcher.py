@@ -1,14 +1,15 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 from typing import Dict, List, Optional
 import json
 import time
 from datetime import datetime
+from data_fetchers.transport import HttpTransport, get_transport
 
 class HardRockFetcher:
-    def __init__(self):
-        self.base_url = "https://www.hardrocksportsbook.com"
+    def __init__(self, transport: Optional[HttpTransport] = None, base_url: Optional[str] = None):
+        self.transport = transport or get_transport()
+        self.base_url = base_url or "https://www.hardrocksportsbook.com"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
@@ -24,7 +25,7 @@ class HardRockFetcher:
         """Get authentication token"""
         try:
             auth_url = f"{self.base_url}/api/auth/anonymous"
-            response = requests.post(auth_url, headers=self.headers)
+            response = self.transport.post(auth_url, headers=self.headers)
             response.raise_for_status()
             data = response.json()
             self.headers['Authorization'] = f"Bearer {data['token']}"
@@ -41,7 +42,7 @@ class HardRockFetcher:
             
             for sport in sports:
                 url = f"{self.base_url}/api/sports/events/live/{sport}"
-                response = requests.get(url, headers=self.headers)
+                response = self.transport.get(url, headers=self.headers)
                 response.raise_for_status()
                 
                 data = response.json()
@@ -71,7 +72,7 @@ class HardRockFetcher:
             
             for sport in sports:
                 url = f"{self.base_url}/api/sports/events/featured/{sport}/player-props"
-                response = requests.get(url, headers=self.headers)
+                response = self.transport.get(url, headers=self.headers)
                 response.raise_for_status()
                 
                 data = response.json()
@@ -1,42 +1,360 @@
-import requests
 import pandas as pd
-from typing import Dict, List, Optional
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 import json
+import time
 from datetime import datetime, timezone, timedelta
 import os
 from dotenv import load_dotenv
+from data_fetchers.transport import SERVER_ERROR_STATUSES, HttpTransport, get_transport
+from data_fetchers.response_cache import ResponseCache
+from data_fetchers.rate_limiter import QuotaRateLimiter, RateLimitExceeded, parse_retry_after
+from sports_config import ODDS_API_SPORTS
+from odds_history import OddsHistoryStore
+from profiling import span, timed
+import metrics
+
+ODDS_API_REQUESTS = metrics.counter('odds_api_requests_total', 'Odds API calls by endpoint', ['kind', 'status'])
+ODDS_API_LATENCY = metrics.histogram('odds_api_request_duration_seconds', 'Odds API latency by endpoint', ['kind'])
+ODDS_API_SKIPPED = metrics.counter('odds_api_requests_skipped_total', 'Planned Odds API requests that were not made',
+                                   ['reason'])
+
+# Markets served by the sport-level /odds endpoint; everything else (player
+# props, alternates) is only available per event.
+FEATURED_MARKETS = ('h2h', 'spreads', 'totals')
+
+@dataclass(frozen=True)
+class PlannedRequest:
+    """A single Odds API call covering one or more markets"""
+    sport: str
+    event_id: Optional[str]  # None for the sport-wide /odds endpoint
+    markets: Tuple[str, ...]
+    
+    @property
+    def path(self) -> str:
+        if self.event_id is None:
+            return f"/sports/{self.sport}/odds"
+        return f"/sports/{self.sport}/events/{self.event_id}/odds"
+
+class RequestPlanner:
+    """Coalesce (sport, event, market) needs into the fewest Odds API calls
+
+    Featured markets for a sport are served by one /odds call that covers every
+    event, so any featured need collapses to a single sport-wide request. Other
+    markets are grouped per event into one request with a comma-separated
+    ``markets`` list. Needs already in hand are dropped before planning.
+    """
+    
+    def plan(self, needs: Iterable[Tuple[str, Optional[str], str]],
+             in_hand: Optional[Set[Tuple[str, Optional[str], str]]] = None) -> List[PlannedRequest]:
+        in_hand = in_hand or set()
+        sport_markets: Dict[str, List[str]] = {}
+        event_markets: Dict[Tuple[str, str], List[str]] = {}
+        
+        for sport, event_id, market in needs:
+            if (sport, event_id, market) in in_hand or (sport, None, market) in in_hand:
+                continue
+            if market in FEATURED_MARKETS:
+                bucket = sport_markets.setdefault(sport, [])
+            elif event_id is None:
+                raise ValueError(f"Market {market} can only be requested per event")
+            else:
+                bucket = event_markets.setdefault((sport, event_id), [])
+            if market not in bucket:
+                bucket.append(market)
+        
+        planned = [PlannedRequest(sport, None, tuple(markets)) for sport, markets in sport_markets.items()]
+        planned.extend(
+            PlannedRequest(sport, event_id, tuple(markets))
+            for (sport, event_id), markets in event_markets.items()
+        )
+        return planned
+
+# Long-format odds table: one row per event/bookmaker/market/outcome
+ODDS_TABLE_COLUMNS = [
+    'sport', 'event_id', 'commence_time', 'home_team', 'away_team', 'book',
+    'market', 'outcome', 'description', 'point', 'price', 'last_update'
+]
+
+def _repeat_categorical(values: List, counts: List[np.ndarray]) -> pd.Categorical:
+    """Factorize values once at their own level, then repeat the codes down to row level"""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    for count in counts:
+        codes = np.repeat(codes, count)
+    return pd.Categorical.from_codes(codes, categories=pd.Index(uniques))
+
+@timed('build_odds_table')
+def build_odds_table(events: List[Dict], sport: str) -> pd.DataFrame:
+    """Flatten every bookmaker, market and outcome of an /odds response
+
+    Values are gathered once per level (event, book, market, outcome) and
+    expanded to row level with np.repeat, so event and book strings are never
+    copied per row. String columns are categorical, so memory grows with the
+    number of distinct values rather than the number of rows.
+    """
+    event_ids, commence, home, away, books_per_event = [], [], [], [], []
+    book_keys, markets_per_book = [], []
+    market_keys, market_updates, outcomes_per_market = [], [], []
+    names, descriptions, points, prices = [], [], [], []
+    
+    for event in events:
+        bookmakers = event.get('bookmakers', [])
+        event_ids.append(event.get('id'))
+        commence.append(event.get('commence_time'))
+        home.append(event.get('home_team'))
+        away.append(event.get('away_team'))
+        books_per_event.append(len(bookmakers))
+        
+        for book in bookmakers:
+            book_markets = book.get('markets', [])
+            book_keys.append(book.get('key'))
+            markets_per_book.append(len(book_markets))
+            
+            for market in book_markets:
+                outcomes = market.get('outcomes', [])
+                market_keys.append(market.get('key'))
+                market_updates.append(market.get('last_update') or book.get('last_update'))
+                outcomes_per_market.append(len(outcomes))
+                
+                for outcome in outcomes:
+                    names.append(outcome.get('name'))
+                    descriptions.append(outcome.get('description'))
+                    points.append(outcome.get('point', np.nan))
+                    prices.append(outcome.get('price', np.nan))
+    
+    books_per_event = np.asarray(books_per_event, dtype=np.int64)
+    markets_per_book = np.asarray(markets_per_book, dtype=np.int64)
+    outcomes_per_market = np.asarray(outcomes_per_market, dtype=np.int64)
+    event_counts = [books_per_event, markets_per_book, outcomes_per_market]
+    
+    # Row index of each event/market, for the non-categorical columns
+    event_rows = np.repeat(np.repeat(np.repeat(np.arange(len(event_ids)), books_per_event),
+                                     markets_per_book), outcomes_per_market)
+    market_rows = np.repeat(np.arange(len(market_keys)), outcomes_per_market)
+    commence_times = pd.to_datetime(pd.Index(commence, dtype=object), utc=True, errors='coerce')
+    update_times = pd.to_datetime(pd.Index(market_updates, dtype=object), utc=True, errors='coerce')
+    
+    return pd.DataFrame({
+        'sport': pd.Categorical.from_codes(np.zeros(len(names), dtype=np.int8), categories=[sport]),
+        'event_id': _repeat_categorical(event_ids, event_counts),
+        'commence_time': commence_times.take(event_rows),
+        'home_team': _repeat_categorical(home, event_counts),
+        'away_team': _repeat_categorical(away, event_counts),
+        'book': _repeat_categorical(book_keys, event_counts[1:]),
+        'market': _repeat_categorical(market_keys, event_counts[2:]),
+        'outcome': _repeat_categorical(names, []),
+        'description': _repeat_categorical(descriptions, []),
+        'point': np.asarray(points, dtype=np.float64),
+        'price': np.asarray(prices, dtype=np.float64),
+        'last_update': update_times.take(market_rows),
+    }, columns=ODDS_TABLE_COLUMNS)
+
+# Columns identifying one priced outcome in the odds table
+OUTCOME_KEY_COLUMNS = ['event_id', 'book', 'market', 'outcome', 'description']
+
+@dataclass
+class OddsDelta:
+    """What moved between two successive odds tables for a sport"""
+    sport: str
+    added_events: List[str] = field(default_factory=list)
+    changed_events: List[str] = field(default_factory=list)
+    removed_events: List[str] = field(default_factory=list)
+    added: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=ODDS_TABLE_COLUMNS))
+    changed: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=ODDS_TABLE_COLUMNS))
+    removed: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=ODDS_TABLE_COLUMNS))
+    
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added_events or self.changed_events or self.removed_events)
+
+def event_versions(table: pd.DataFrame) -> Dict[str, Tuple]:
+    """Version of each event: its latest last_update and outcome count"""
+    if table.empty:
+        return {}
+    grouped = table.groupby('event_id', observed=True)['last_update'].agg(['max', 'size'])
+    return {str(event_id): (row['max'], row['size']) for event_id, row in grouped.iterrows()}
+
+def diff_odds_tables(sport: str, previous: pd.DataFrame, current: pd.DataFrame,
+                     previous_versions: Optional[Dict[str, Tuple]] = None,
+                     current_versions: Optional[Dict[str, Tuple]] = None) -> OddsDelta:
+    """Compare two odds tables, only diffing outcomes of events whose version moved"""
+    previous_versions = event_versions(previous) if previous_versions is None else previous_versions
+    current_versions = event_versions(current) if current_versions is None else current_versions
+    
+    added_events = [e for e in current_versions if e not in previous_versions]
+    removed_events = [e for e in previous_versions if e not in current_versions]
+    changed_events = [
+        e for e, version in current_versions.items()
+        if e in previous_versions and previous_versions[e] != version
+    ]
+    delta = OddsDelta(sport, added_events, changed_events, removed_events)
+    if delta.is_empty:
+        return delta
+    
+    touched = set(added_events) | set(changed_events) | set(removed_events)
+    old = previous[previous['event_id'].astype(str).isin(touched)]
+    new = current[current['event_id'].astype(str).isin(touched)]
+    
+    # Compare as plain objects; the two tables' categories need not match
+    old_keys = old[OUTCOME_KEY_COLUMNS].astype(object)
+    new_keys = new[OUTCOME_KEY_COLUMNS].astype(object)
+    merged = old_keys.assign(_old=np.arange(len(old))).merge(
+        new_keys.assign(_new=np.arange(len(new))), on=OUTCOME_KEY_COLUMNS, how='outer'
+    )
+    
+    only_new = merged['_old'].isna()
+    only_old = merged['_new'].isna()
+    both = merged[~only_new & ~only_old]
+    old_rows = old.iloc[both['_old'].astype(int).to_numpy()]
+    new_rows = new.iloc[both['_new'].astype(int).to_numpy()]
+    moved = (
+        (old_rows['price'].to_numpy(dtype=float) != new_rows['price'].to_numpy(dtype=float))
+        | ~np.isclose(old_rows['point'].to_numpy(dtype=float), new_rows['point'].to_numpy(dtype=float),
+                      equal_nan=True)
+    )
+    
+    delta.added = new.iloc[merged.loc[only_new, '_new'].astype(int).to_numpy()].reset_index(drop=True)
+    delta.removed = old.iloc[merged.loc[only_old, '_old'].astype(int).to_numpy()].reset_index(drop=True)
+    delta.changed = new_rows[moved].reset_index(drop=True)
+    return delta
+
+# Numeric odds columns on the games frame (NaN when a market is missing)
+GAME_ODDS_COLUMNS = [
+    'Away ML', 'Home ML', 'Spread Point', 'Spread Price', 'Total Point', 'Over Price', 'Under Price'
+]
+
+def format_american_odds(price: Optional[float]) -> str:
+    """Format an American price for display, e.g. 130 -> '+130'"""
+    if price is None or pd.isna(price):
+        return ""
+    return f"+{int(price)}" if price > 0 else str(int(price))
+
+def format_game_odds(games: pd.DataFrame) -> pd.DataFrame:
+    """Add display strings (Spread, Total, ML) built from the numeric odds columns"""
+    games = games.copy()
+    if games.empty:
+        return games
+    games['Spread'] = [
+        f"{point} ({format_american_odds(price)})" if pd.notna(point) else ""
+        for point, price in zip(games['Spread Point'], games['Spread Price'])
+    ]
+    games['Total'] = [
+        f"O/U {point} ({format_american_odds(price)})" if pd.notna(point) else ""
+        for point, price in zip(games['Total Point'], games['Over Price'])
+    ]
+    games['ML'] = [
+        f"{format_american_odds(away)}/{format_american_odds(home)}" if pd.notna(away) and pd.notna(home) else ""
+        for away, home in zip(games['Away ML'], games['Home ML'])
+    ]
+    return games
+
+def games_from_odds_table(table: pd.DataFrame) -> pd.DataFrame:
+    """Games frame (like get_upcoming_games) built from an odds table
+    
+    Uses each event's first bookmaker, as get_upcoming_games does, and adds an
+    'Event ID' column so results can be traced back to their event.
+    """
+    columns = ['Event ID', 'Sport', 'Time', 'Home', 'Away'] + GAME_ODDS_COLUMNS + ['Bookmaker']
+    if table.empty:
+        return pd.DataFrame(columns=columns)
+    
+    rows = table.astype({'event_id': object, 'book': object, 'market': object, 'outcome': object,
+                         'home_team': object, 'away_team': object})
+    first_book = rows.groupby('event_id', sort=False)['book'].transform('first')
+    rows = rows[rows['book'] == first_book]
+    events = rows.drop_duplicates('event_id').set_index('event_id')
+    
+    est = events['commence_time'].dt.tz_convert(timezone(timedelta(hours=-5)))
+    games = pd.DataFrame({
+        'Event ID': events.index,
+        'Sport': events['sport'].astype(object).to_numpy(),
+        'Time': (est.dt.strftime('%I:%M %p').str.lstrip('0') + ' EST').to_numpy(),
+        'Home': events['home_team'].to_numpy(),
+        'Away': events['away_team'].to_numpy(),
+        'Bookmaker': events['book'].to_numpy(),
+    })
+    
+    def price_of(mask: pd.Series, value: str = 'price') -> np.ndarray:
+        found = rows[mask].drop_duplicates('event_id').set_index('event_id')[value]
+        return found.reindex(games['Event ID']).to_numpy(dtype=float)
+    
+    h2h = rows['market'] == 'h2h'
+    games['Home ML'] = price_of(h2h & (rows['outcome'] == rows['home_team']))
+    games['Away ML'] = price_of(h2h & (rows['outcome'] == rows['away_team']))
+    
+    # Favorite's side of the spread: the lowest point
+    spreads = rows[rows['market'] == 'spreads'].sort_values('point', kind='stable')
+    favorite = spreads.drop_duplicates('event_id').set_index('event_id')
+    games['Spread Point'] = favorite['point'].reindex(games['Event ID']).to_numpy(dtype=float)
+    games['Spread Price'] = favorite['price'].reindex(games['Event ID']).to_numpy(dtype=float)
+    
+    totals = rows['market'] == 'totals'
+    games['Total Point'] = price_of(totals & (rows['outcome'] == 'Over'), 'point')
+    games['Over Price'] = price_of(totals & (rows['outcome'] == 'Over'))
+    games['Under Price'] = price_of(totals & (rows['outcome'] == 'Under'))
+    return games[columns]
 
 class OddsApiFetcher:
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the fetcher with API key from env or parameter"""
+    def __init__(self, api_key: Optional[str] = None, transport: Optional[HttpTransport] = None,
+                 cache: Optional[ResponseCache] = None, rate_limiter: Optional[QuotaRateLimiter] = None,
+                 base_url: Optional[str] = None, history: Optional[OddsHistoryStore] = None):
+        """Initialize the fetcher with API key from env or parameter
+
+        Responses go through ``cache``; by default an in-memory cache, backed by
+        ODDS_API_CACHE_DIR on disk when that variable is set. Every odds
+        response fetched from the API is appended to ``history`` (by default
+        a store in ODDS_HISTORY_DIR when that variable is set).
+        """
         load_dotenv()
         self.api_key = api_key or os.getenv('ODDS_API_KEY')
         if not self.api_key:
             raise ValueError("API key is required. Get one from https://the-odds-api.com/")
             
-        self.base_url = "https://api.the-odds-api.com/v4"
+        self.base_url = base_url or "https://api.the-odds-api.com/v4"
         self.regions = ['us']  # us, uk, eu, au
         self.markets = ['h2h', 'spreads', 'totals']  # h2h (moneyline), spreads, totals
         self.odds_format = 'american'  # american, decimal, fractional
+        self.max_concurrent_requests = 8  # Max in-flight event requests for props
+        self.request_timeout = 10  # Seconds per HTTP request
+        self.events_max_age = 300  # Seconds an event list can be reused for props
+        self.prop_markets_max_age = 60  # Seconds a fetched event prop market is reused instead of re-requested
+        self.planned_max_wait = 60.0  # Seconds a planned props request may wait for rate limiter tokens
+        self.planner = RequestPlanner()
+        # 429s are not retried by the transport; the rate limiter backs off on them
+        self.transport = transport or get_transport(SERVER_ERROR_STATUSES)
+        self.cache = cache or ResponseCache(cache_dir=os.getenv('ODDS_API_CACHE_DIR'))
+        self.rate_limiter = rate_limiter or QuotaRateLimiter()
+        if history is None and os.getenv('ODDS_HISTORY_DIR'):
+            history = OddsHistoryStore(os.getenv('ODDS_HISTORY_DIR'))
+        self.history = history
+        self._events: Dict[str, Tuple[float, List[Dict]]] = {}  # sport -> (fetched_at, events)
+        self._odds_tables: Dict[str, pd.DataFrame] = {}  # sport -> last table from get_odds_update
+        self._event_versions: Dict[str, Dict[str, Tuple]] = {}  # sport -> event_id -> version
+        self.skipped_requests: Dict[str, List[Dict]] = {}  # sport -> requests skipped by the last props fetch
+        # (sport, event_id, market) -> (fetched_at, bookmakers carrying only that market)
+        self._prop_markets: Dict[Tuple[str, str, str], Tuple[float, List[Dict]]] = {}
         
     def get_available_sports(self) -> List[str]:
         """Get list of available sports"""
         try:
             params = {'apiKey': self.api_key}
-            response = requests.get(
-                f"{self.base_url}/sports",
-                params=params
-            )
-            response.raise_for_status()
+            sports = self._get_json('sports', "/sports", params)
             
-            return [sport['key'] for sport in response.json()]
+            return [sport['key'] for sport in sports]
             
         except Exception as e:
             print(f"Error fetching sports: {e}")
             return []
             
+    @timed('fetch_games')
     def get_upcoming_games(self, sport: str = 'basketball_nba') -> pd.DataFrame:
-        """Fetch upcoming games with odds from multiple bookmakers"""
+        """Fetch upcoming games with odds from multiple bookmakers
+
+        Odds come back as numeric columns (GAME_ODDS_COLUMNS); use
+        format_game_odds for display strings.
+        """
         try:
             print(f"Fetching upcoming games for {sport}...")
             # Get upcoming games
@@ -49,18 +367,14 @@ class OddsApiFetcher:
                 'dateFormat': 'iso'
             }
             
-            response = requests.get(
-                f"{self.base_url}/sports/{sport}/odds",
-                params=params
-            )
-            response.raise_for_status()
+            data = self._get_json('odds', f"/sports/{sport}/odds", params)
             
             # Process the response
             games_data = []
             current_time = datetime.now(timezone(timedelta(hours=-5)))  # Current time in EST
             print(f"Current time (EST): {current_time}")
             
-            data = response.json()
+            self._events[sport] = (time.time(), data)
             print(f"Got {len(data)} games from API")
             
             for event in data:
@@ -87,14 +401,15 @@ class OddsApiFetcher:
                 time_str = game_time.strftime('%I:%M %p').lstrip('0') + ' EST'
                 
                 game = {
+                    'Event ID': event.get('id'),
                     'Sport': sport,
                     'Time': time_str,
                     'Home': event.get('home_team', ''),
                     'Away': event.get('away_team', ''),
                     'Score': self._get_score(event),
-                    'Spread': self._format_spread(markets.get('spreads')),
-                    'Total': self._format_total(markets.get('totals')),
-                    'ML': self._format_moneyline(markets.get('h2h')),
+                    **self._moneyline_odds(markets.get('h2h'), event.get('home_team'), event.get('away_team')),
+                    **self._spread_odds(markets.get('spreads')),
+                    **self._total_odds(markets.get('totals')),
                     'Last Update': event.get('last_update'),
                     'Bookmaker': book.get('title', '')
                 }
@@ -102,7 +417,8 @@ class OddsApiFetcher:
                 print(f"Added game: {game['Away']} @ {game['Home']} at {game['Time']}")
             
             # Sort by game time
-            df = pd.DataFrame(games_data)
+            with span('build_frame', frame='games', rows=len(games_data)):
+                df = pd.DataFrame(games_data)
             if not df.empty:
                 df['_time_sort'] = pd.to_datetime(df['Time'].str.replace(' EST', ''), format='%I:%M %p')
                 df = df.sort_values('_time_sort')
@@ -119,40 +435,83 @@ class OddsApiFetcher:
             traceback.print_exc()
             return pd.DataFrame()
     
-    def get_player_props(self, sport: str = 'basketball_nba') -> pd.DataFrame:
-        """Fetch player props from the API"""
+    @timed('fetch_odds_table')
+    def get_odds_table(self, sport: str = 'basketball_nba', upcoming_only: bool = True) -> pd.DataFrame:
+        """Fetch odds from every bookmaker as one long-format table
+
+        Columns are listed in ODDS_TABLE_COLUMNS. Shares its request (and cache
+        entry) with get_upcoming_games.
+        """
         try:
-            print(f"Fetching player props for {sport}...")
-            
-            # Set appropriate markets based on sport
-            if sport == 'basketball_nba':
-                markets = ['player_points', 'player_rebounds', 'player_assists']
-            elif sport == 'americanfootball_nfl':
-                markets = ['player_pass_tds', 'player_receptions']  # Only use supported markets
-            else:
-                markets = []
-            
-            props_data = []
-            current_time = datetime.now(timezone(timedelta(hours=-5)))  # EST
-            
-            # First get all games to get their IDs
             params = {
                 'apiKey': self.api_key,
                 'regions': ','.join(self.regions),
-                'markets': 'h2h',  # Just get basic game info
+                'markets': ','.join(self.markets),
                 'oddsFormat': self.odds_format,
                 'sport': sport,
                 'dateFormat': 'iso'
             }
             
-            response = requests.get(
-                f"{self.base_url}/sports/{sport}/odds",
-                params=params
-            )
-            response.raise_for_status()
-            games = response.json()
+            data = self._get_json('odds', f"/sports/{sport}/odds", params)
+            self._events[sport] = (time.time(), data)
+            
+            table = build_odds_table(data, sport)
+            if upcoming_only:
+                table = table[table['commence_time'] > pd.Timestamp.now(tz='UTC')].reset_index(drop=True)
+            return table
             
-            # Now fetch props for each game
+        except Exception as e:
+            print(f"Error fetching odds table: {e}")
+            return pd.DataFrame(columns=ODDS_TABLE_COLUMNS)
+    
+    def get_odds_update(self, sport: str = 'basketball_nba') -> Tuple[pd.DataFrame, OddsDelta]:
+        """Fetch the odds table along with what changed since the previous call
+
+        A per-event version index (latest last_update and outcome count) is kept
+        between calls, so only events whose version moved are diffed at the
+        outcome level. The first call reports every event as added.
+        """
+        table = self.get_odds_table(sport)
+        versions = event_versions(table)
+        previous = self._odds_tables.get(sport, pd.DataFrame(columns=ODDS_TABLE_COLUMNS))
+        
+        delta = diff_odds_tables(sport, previous, table, self._event_versions.get(sport, {}), versions)
+        self._odds_tables[sport] = table
+        self._event_versions[sport] = versions
+        return table, delta
+    
+    @timed('fetch_props')
+    def get_player_props(self, sport: str = 'basketball_nba', markets: Optional[List[str]] = None) -> pd.DataFrame:
+        """Fetch player props from the API
+
+        Returns one row per (player, market, line, bookmaker) with both the
+        Over and Under price. Reuses the event list from get_upcoming_games
+        when it is fresh and requests all prop markets for an event in one call.
+        Event markets fetched in the last ``prop_markets_max_age`` seconds are
+        in hand and left out of the requests. Event requests are
+        issued concurrently (up to ``max_concurrent_requests`` in flight); set
+        it to 1 to fetch sequentially.
+
+        Requests that could not be made (rate limited or failed) are listed in
+        ``skipped_requests[sport]`` and the returned frame's ``attrs['skipped']``.
+        """
+        try:
+            print(f"Fetching player props for {sport}...")
+            
+            # Default to the prop markets configured for the sport
+            if markets is None:
+                markets = next(
+                    (config['prop_markets'] for config in ODDS_API_SPORTS.values() if config['key'] == sport),
+                    []
+                )
+            
+            props_data: Dict[Tuple, Dict] = {}  # One row per (game, book, market, player, line)
+            current_time = datetime.now(timezone(timedelta(hours=-5)))  # EST
+            
+            games = self._get_events(sport)
+            
+            # Work out which games we need props for
+            upcoming = {}
             for game in games:
                 game_time = datetime.fromisoformat(game.get('commence_time', '').replace('Z', '+00:00'))
                 game_time = game_time.astimezone(timezone(timedelta(hours=-5)))  # Convert to EST
@@ -160,52 +519,62 @@ class OddsApiFetcher:
                 if game_time < current_time:
                     continue
                 
-                game_id = game.get('id')
-                if not game_id:
+                if not game.get('id'):
                     continue
                 
-                # Fetch props for each market type separately for this game
-                for market in markets:
-                    try:
-                        params = {
-                            'apiKey': self.api_key,
-                            'regions': ','.join(self.regions),
-                            'markets': market,
-                            'oddsFormat': self.odds_format,
-                            'dateFormat': 'iso'
-                        }
-                        
-                        response = requests.get(
-                            f"{self.base_url}/sports/{sport}/events/{game_id}/odds",
-                            params=params
-                        )
-                        response.raise_for_status()
-                        
-                        data = response.json()
-                        print(f"Got props for {game['home_team']} vs {game['away_team']} - {market}")
-                        
-                        for book in data.get('bookmakers', []):
-                            for market_data in book.get('markets', []):
-                                if market_data['key'].startswith('player'):
-                                    for outcome in market_data.get('outcomes', []):
-                                        prop_type = market_data['key'].replace('player_', '').replace('_', ' ').title()
-                                        prop = {
-                                            'Time': game_time.strftime('%I:%M %p').lstrip('0') + ' EST',
-                                            'Game': f"{game['away_team']} @ {game['home_team']}",
-                                            'Player': outcome['description'],
-                                            'Type': prop_type,
-                                            'Line': outcome.get('point', 'N/A'),
-                                            'Over': self._format_odds(outcome.get('price')) if outcome.get('name') == 'Over' else None,
-                                            'Under': self._format_odds(outcome.get('price')) if outcome.get('name') == 'Under' else None,
-                                            'Bookmaker': book['title']
-                                        }
-                                        props_data.append(prop)
-                                        
-                    except Exception as e:
-                        print(f"Error fetching {market} props for game {game_id}: {e}")
-                        continue
-            
-            df = pd.DataFrame(props_data)
+                upcoming[game['id']] = (game, game_time)
+            
+            # One request per event covering all of its prop markets
+            needs = [(sport, game_id, market) for game_id in upcoming for market in markets]
+            in_hand = self._prop_markets_in_hand(needs)
+            planned = self.planner.plan(needs, in_hand)
+            
+            # Fetch all planned requests concurrently; results come back in plan order
+            skipped = self.skipped_requests[sport] = []
+            results = self._fetch_event_markets(planned)
+            
+            responses = []
+            for request, data in zip(planned, results):
+                if data is None:
+                    continue
+                game = upcoming[request.event_id][0]
+                print(f"Got props for {game['home_team']} vs {game['away_team']} - {','.join(request.markets)}")
+                self._remember_prop_markets(request, data)
+                responses.append((request.event_id, data))
+            responses.extend((event_id, {'bookmakers': self._prop_markets[sport, event_id, market][1]})
+                             for _, event_id, market in sorted(in_hand))
+            
+            for event_id, data in responses:
+                game, game_time = upcoming[event_id]
+                for book in data.get('bookmakers', []):
+                    for market_data in book.get('markets', []):
+                        if market_data['key'].startswith('player'):
+                            prop_type = market_data['key'].replace('player_', '').replace('_', ' ').title()
+                            for outcome in market_data.get('outcomes', []):
+                                side = outcome.get('name')
+                                if side not in ('Over', 'Under'):
+                                    continue
+                                
+                                # Over and Under share a row
+                                key = (event_id, book['key'], market_data['key'],
+                                       outcome['description'], outcome.get('point'))
+                                prop = props_data.get(key)
+                                if prop is None:
+                                    prop = props_data[key] = {
+                                        'Event ID': event_id,
+                                        'Time': game_time.strftime('%I:%M %p').lstrip('0') + ' EST',
+                                        'Game': f"{game['away_team']} @ {game['home_team']}",
+                                        'Player': outcome['description'],
+                                        'Type': prop_type,
+                                        'Line': outcome.get('point', np.nan),
+                                        'Over': np.nan,
+                                        'Under': np.nan,
+                                        'Bookmaker': book['title']
+                                    }
+                                prop[side] = outcome.get('price', np.nan)
+            
+            with span('build_frame', frame='props', rows=len(props_data)):
+                df = pd.DataFrame(list(props_data.values()))
             if not df.empty:
                 df['_time_sort'] = pd.to_datetime(df['Time'].str.replace(' EST', ''), format='%I:%M %p')
                 df = df.sort_values(['_time_sort', 'Game', 'Player', 'Type'])
@@ -213,6 +582,7 @@ class OddsApiFetcher:
                 print(f"Final props dataframe has {len(df)} props")
             else:
                 print("No props found")
+            df.attrs['skipped'] = list(skipped)
             
             return df
             
@@ -222,6 +592,138 @@ class OddsApiFetcher:
             traceback.print_exc()
             return pd.DataFrame()
     
+    def _get_events(self, sport: str) -> List[Dict]:
+        """Get the sport's event list, reusing the one get_upcoming_games fetched
+
+        Falls back to the /events endpoint, which returns ids, teams and
+        commence times without odds and does not count against the quota.
+        """
+        cached = self._events.get(sport)
+        if cached and time.time() - cached[0] < self.events_max_age:
+            return cached[1]
+        
+        params = {'apiKey': self.api_key, 'dateFormat': 'iso'}
+        return self._get_json('events', f"/sports/{sport}/events", params)
+    
+    def _prop_markets_in_hand(self, needs: List[Tuple[str, str, str]]) -> Set[Tuple[str, str, str]]:
+        """Needs fetched within ``prop_markets_max_age``; older entries are dropped"""
+        now = time.time()
+        for key in [key for key, (fetched_at, _) in self._prop_markets.items()
+                    if now - fetched_at >= self.prop_markets_max_age]:
+            self._prop_markets.pop(key, None)
+        return {need for need in needs if need in self._prop_markets}
+    
+    def _remember_prop_markets(self, request: PlannedRequest, data: Dict):
+        """Split an event response by market so later calls can reuse each one"""
+        fetched_at = time.time()
+        books = {market: [] for market in request.markets}  # Markets no book offers are in hand too
+        for book in data.get('bookmakers', []):
+            for market_data in book.get('markets', []):
+                books.setdefault(market_data['key'], []).append(
+                    {'key': book['key'], 'title': book['title'], 'markets': [market_data]})
+        for market, market_books in books.items():
+            self._prop_markets[request.sport, request.event_id, market] = (fetched_at, market_books)
+    
+    def _fetch_event_markets(self, planned: List[PlannedRequest]) -> List[Optional[Dict]]:
+        """Execute planned event requests, preserving input order
+
+        A failed request yields None in its slot, and is recorded in
+        ``skipped_requests``, so one bad event does not affect the rest of the slate.
+        """
+        if not planned:
+            return []
+        
+        max_workers = max(1, min(self.max_concurrent_requests, len(planned)))
+        if max_workers == 1:
+            return [self._fetch_planned(request) for request in planned]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._fetch_planned, request) for request in planned]
+            return [future.result() for future in futures]
+    
+    def _fetch_planned(self, request: PlannedRequest) -> Optional[Dict]:
+        """Fetch odds for one planned request, returning None (and recording why) on failure"""
+        try:
+            params = {
+                'apiKey': self.api_key,
+                'regions': ','.join(self.regions),
+                'markets': ','.join(request.markets),
+                'oddsFormat': self.odds_format,
+                'dateFormat': 'iso'
+            }
+            
+            return self._get_json('event_odds', request.path, params)
+            
+        except Exception as e:
+            reason = 'rate_limited' if isinstance(e, RateLimitExceeded) else 'error'
+            ODDS_API_SKIPPED.inc(reason=reason)
+            # list.append is thread-safe, so concurrent requests can record into the same list
+            self.skipped_requests.setdefault(request.sport, []).append({
+                'event_id': request.event_id, 'markets': list(request.markets), 'reason': reason, 'error': str(e)
+            })
+            return None
+    
+    def get_quota_state(self) -> Dict:
+        """Current request budget as reported by the API"""
+        return self.rate_limiter.state()
+    
+    def _request_cost(self, kind: str, params: Dict) -> int:
+        """Quota cost of a request: one per market per region for odds endpoints"""
+        if kind in ('sports', 'events'):
+            return 0
+        markets = len(params.get('markets', '').split(',')) if params.get('markets') else 1
+        regions = len(params.get('regions', '').split(',')) if params.get('regions') else 1
+        return markets * regions
+    
+    def _get_json(self, kind: str, path: str, params: Dict):
+        """GET an API path through the response cache and rate limiter
+
+        Per-event requests (planned props) wait up to ``planned_max_wait`` for
+        rate limiter tokens rather than dropping the rest of the slate.
+        """
+        def fetch():
+            cost = self._request_cost(kind, params)
+            if cost:
+                self.rate_limiter.acquire(cost, self.planned_max_wait if kind == 'event_odds' else None)
+            
+            with span('http', kind=kind) as attrs, ODDS_API_LATENCY.time(kind=kind):
+                response = self.transport.get(
+                    f"{self.base_url}{path}",
+                    params=params,
+                    timeout=self.request_timeout
+                )
+                attrs['bytes'] = len(response.content)
+                attrs['status'] = str(response.status_code)
+            ODDS_API_REQUESTS.inc(kind=kind, status=response.status_code)
+            self.rate_limiter.update_from_headers(response.headers)
+            if response.status_code == 429:
+                self.rate_limiter.on_rate_limited(parse_retry_after(response.headers.get('Retry-After')))
+            elif response.ok:
+                self.rate_limiter.on_success()
+            response.raise_for_status()
+            with span('json_decode', kind=kind, bytes=len(response.content)):
+                data = response.json()
+            self._record_history(kind, path, data)
+            return data
+        
+        with span('odds_api', kind=kind):
+            return self.cache.get(kind, path, params, fetch)
+    
+    def _record_history(self, kind: str, path: str, data):
+        """Append a freshly fetched odds response to the history store
+
+        Only called on network fetches, so cache hits are not stored twice.
+        """
+        if self.history is None or kind not in ('odds', 'event_odds'):
+            return
+        try:
+            sport = path.strip('/').split('/')[1]
+            events = data if kind == 'odds' else [data]
+            with span('history_append', kind=kind) as attrs:
+                attrs['rows'] = self.history.append(build_odds_table(events, sport))
+        except Exception as e:
+            print(f"Error recording odds history: {e}")
+    
     def _get_score(self, event: Dict) -> str:
         """Get score if available"""
         scores = event.get('scores', {})
@@ -231,50 +733,45 @@ class OddsApiFetcher:
             return f"{home}-{away}"
         return "Not Started"
     
-    def _format_spread(self, market: Optional[Dict]) -> str:
-        """Format spread odds"""
-        if not market:
-            return ""
-            
-        outcomes = market.get('outcomes', [])
+    def _spread_odds(self, market: Optional[Dict]) -> Dict[str, float]:
+        """Favorite's spread point and price"""
+        odds = {'Spread Point': np.nan, 'Spread Price': np.nan}
+        outcomes = market.get('outcomes', []) if market else []
         if len(outcomes) != 2:
-            return ""
+            return odds
             
         # Find the favorite (negative spread)
         fav = min(outcomes, key=lambda x: float(x.get('point', 0)))
-        
-        return f"{fav['point']} ({self._format_odds(fav['price'])})"
+        odds['Spread Point'] = float(fav.get('point', np.nan))
+        odds['Spread Price'] = float(fav.get('price', np.nan))
+        return odds
     
-    def _format_total(self, market: Optional[Dict]) -> str:
-        """Format total odds"""
-        if not market:
-            return ""
-            
-        outcomes = market.get('outcomes', [])
+    def _total_odds(self, market: Optional[Dict]) -> Dict[str, float]:
+        """Total points with over and under prices"""
+        odds = {'Total Point': np.nan, 'Over Price': np.nan, 'Under Price': np.nan}
+        outcomes = market.get('outcomes', []) if market else []
         if len(outcomes) != 2:
-            return ""
+            return odds
             
-        # Get the over
         over = next((o for o in outcomes if o['name'] == 'Over'), None)
+        under = next((o for o in outcomes if o['name'] == 'Under'), None)
         if not over:
-            return ""
+            return odds
             
-        return f"O/U {over['point']} ({self._format_odds(over['price'])})"
+        odds['Total Point'] = float(over.get('point', np.nan))
+        odds['Over Price'] = float(over.get('price', np.nan))
+        if under:
+            odds['Under Price'] = float(under.get('price', np.nan))
+        return odds
     
-    def _format_moneyline(self, market: Optional[Dict]) -> str:
-        """Format moneyline odds"""
-        if not market:
-            return ""
-            
-        outcomes = market.get('outcomes', [])
+    def _moneyline_odds(self, market: Optional[Dict], home_team: str, away_team: str) -> Dict[str, float]:
+        """Home and away moneyline prices, matched by team name"""
+        odds = {'Away ML': np.nan, 'Home ML': np.nan}
+        outcomes = market.get('outcomes', []) if market else []
         if len(outcomes) != 2:
-            return ""
+            return odds
             
-        odds = [self._format_odds(o['price']) for o in outcomes]
-        return f"{odds[0]}/{odds[1]}"
-    
-    def _format_odds(self, odds: Optional[float]) -> str:
-        """Format American odds"""
-        if odds is None:
-            return ""
-        return f"+{int(odds)}" if odds > 0 else str(int(odds))
+        prices = {o.get('name'): float(o.get('price', np.nan)) for o in outcomes}
+        odds['Away ML'] = prices.get(away_team, np.nan)
+        odds['Home ML'] = prices.get(home_team, np.nan)
+        return odds
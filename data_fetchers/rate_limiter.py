@@ -0,0 +1,156 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+import threading
+import time
+
+class RateLimitExceeded(Exception):
+    """Raised when a request cannot be made within the limiter's max wait"""
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, in either delay-seconds or HTTP-date form"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class QuotaRateLimiter:
+    """Token bucket that paces requests to the Odds API's remaining quota
+
+    The API reports ``x-requests-remaining`` and ``x-requests-used`` on every
+    response. The bucket refills at remaining / seconds-left-in-billing-period,
+    so the budget is spread evenly over the rest of the period, and holds up to
+    ``burst`` tokens so a slate's worth of requests can go out together (a
+    12-game slate with 3 prop markets costs about 39). Until the first
+    response arrives the budget is unknown and requests are not paced.
+
+    A 429 pauses all requests, for Retry-After seconds when given and otherwise
+    with exponential backoff.
+    """
+    
+    def __init__(self, burst: float = 60, max_wait: float = 5.0, reserve: int = 0,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 period_end: Optional[datetime] = None):
+        self.burst = burst
+        self.max_wait = max_wait
+        self.reserve = reserve  # Requests held back for manual use
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.period_end = period_end
+        
+        self.remaining: Optional[int] = None
+        self.used: Optional[int] = None
+        self.last_cost: Optional[int] = None
+        self.tokens = float(burst)
+        self.backoff_until = 0.0
+        self.consecutive_429s = 0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, cost: float = 1.0, max_wait: Optional[float] = None):
+        """Block until ``cost`` tokens are available
+
+        Raises RateLimitExceeded if the quota is exhausted or the wait would
+        exceed ``max_wait`` (the limiter's own unless given).
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            
+            if self.remaining is not None and self.remaining - self.reserve < cost:
+                raise RateLimitExceeded(f"Odds API quota exhausted ({self.remaining} requests remaining)")
+            
+            wait = max(0.0, self.backoff_until - now)
+            rate = self._rate()
+            if rate is not None:
+                # Reserve the tokens now so concurrent callers queue behind us
+                self.tokens -= cost
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / rate) if rate > 0 else float('inf')
+            
+            if wait > max_wait:
+                if rate is not None:
+                    self.tokens += cost
+                raise RateLimitExceeded(f"Rate limited: next request allowed in {wait:.1f}s")
+        
+        if wait > 0:
+            time.sleep(wait)
+    
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Learn the remaining budget from an API response's headers"""
+        remaining = headers.get('x-requests-remaining')
+        used = headers.get('x-requests-used')
+        last = headers.get('x-requests-last')
+        with self._lock:
+            self._refill(time.monotonic())
+            if remaining is not None:
+                self.remaining = int(float(remaining))
+            if used is not None:
+                self.used = int(float(used))
+            if last is not None:
+                self.last_cost = int(float(last))
+    
+    def on_success(self):
+        """Reset the backoff after a successful response"""
+        with self._lock:
+            self.consecutive_429s = 0
+    
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Pause requests after a 429 response"""
+        with self._lock:
+            self.consecutive_429s += 1
+            if retry_after is None:
+                retry_after = min(self.backoff_max, self.backoff_base * 2 ** (self.consecutive_429s - 1))
+            self.backoff_until = max(self.backoff_until, time.monotonic() + retry_after)
+            self.tokens = min(self.tokens, 0.0)
+    
+    def state(self) -> Dict:
+        """Snapshot of the current budget for dashboards"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            rate = self._rate()
+            return {
+                'remaining': self.remaining,
+                'used': self.used,
+                'last_cost': self.last_cost,
+                'tokens': round(self.tokens, 3),
+                'burst': self.burst,
+                'requests_per_hour': rate * 3600 if rate is not None else None,
+                'backoff_seconds': max(0.0, self.backoff_until - now),
+                'consecutive_429s': self.consecutive_429s,
+                'period_end': self._period_end().isoformat()
+            }
+    
+    def _rate(self) -> Optional[float]:
+        """Tokens per second, or None while the budget is unknown"""
+        if self.remaining is None:
+            return None
+        budget = max(0, self.remaining - self.reserve)
+        seconds_left = max(1.0, (self._period_end() - datetime.now(timezone.utc)).total_seconds())
+        return budget / seconds_left
+    
+    def _refill(self, now: float):
+        rate = self._rate()
+        if rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * rate)
+        self._last_refill = now
+    
+    def _period_end(self) -> datetime:
+        if self.period_end is not None:
+            return self.period_end
+        # Odds API quotas reset at the start of each calendar month (UTC)
+        now = datetime.now(timezone.utc)
+        if now.month == 12:
+            return datetime(now.year + 1, 1, 1, tzinfo=timezone.utc)
+        return datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
@@ -0,0 +1,223 @@
+"""Record/replay harness for the HTTP clients
+
+Record real responses by setting HTTP_RECORD_DIR before starting any fetcher;
+the shared transport then saves every response it receives as a fixture:
+
+    HTTP_RECORD_DIR=fixtures/nba python test_odds_api.py
+
+Replay them offline through a local stand-in server, optionally with injected
+latency, errors and header-reported quota:
+
+    python -m data_fetchers.replay fixtures/nba --port 8765 --latency 0.2 --error-rate 0.05
+
+and point a client at it, e.g. ``OddsApiFetcher(base_url=server.base_url + '/v4')``.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import requests
+from data_fetchers.transport import HttpTransport
+
+# Query parameters that carry credentials rather than identify a resource
+CREDENTIAL_PARAMS = {'apiKey', 'api_key', 'key'}
+
+# Response headers worth keeping in a fixture
+RECORDED_HEADERS = {'content-type', 'x-requests-remaining', 'x-requests-used', 'x-requests-last'}
+
+def fixture_key(method: str, path: str, params: Optional[Dict] = None) -> str:
+    """Stable fixture name for a request, ignoring host and credentials"""
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k not in CREDENTIAL_PARAMS)
+    raw = method.upper() + ' ' + path + '?' + '&'.join(f"{k}={v}" for k, v in items)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def save_fixture(fixture_dir: str, method: str, path: str, params: Optional[Dict],
+                 status: int, body: str, headers: Optional[Dict[str, str]] = None):
+    """Write one request/response pair to the fixture directory"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    fixture = {
+        'method': method.upper(),
+        'path': path,
+        'params': {k: str(v) for k, v in (params or {}).items() if k not in CREDENTIAL_PARAMS},
+        'status': status,
+        'headers': {k.lower(): v for k, v in (headers or {}).items() if k.lower() in RECORDED_HEADERS},
+        'body': body
+    }
+    path_on_disk = os.path.join(fixture_dir, fixture_key(method, path, params) + '.json')
+    with open(path_on_disk, 'w') as f:
+        json.dump(fixture, f, indent=2)
+
+def load_fixtures(fixture_dir: str) -> Dict[str, Dict]:
+    """Load every fixture in a directory keyed by fixture_key"""
+    fixtures = {}
+    for name in os.listdir(fixture_dir):
+        if name.endswith('.json'):
+            with open(os.path.join(fixture_dir, name)) as f:
+                fixture = json.load(f)
+            fixtures[fixture_key(fixture['method'], fixture['path'], fixture['params'])] = fixture
+    return fixtures
+
+class RecordingTransport(HttpTransport):
+    """Transport that saves every response it receives as a fixture"""
+    
+    def __init__(self, fixture_dir: str, **kwargs):
+        super().__init__(**kwargs)
+        self.fixture_dir = fixture_dir
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        response = super().request(method, url, **kwargs)
+        try:
+            save_fixture(self.fixture_dir, method, urlsplit(url).path, kwargs.get('params'),
+                         response.status_code, response.text, dict(response.headers))
+        except Exception as e:
+            print(f"Error recording fixture for {url}: {e}")
+        return response
+
+class ReplayServer:
+    """Local HTTP server that replays recorded fixtures
+
+    ``latency`` and ``jitter`` (seconds) delay every response, ``error_rate``
+    turns that fraction of requests into ``error_status`` responses, and
+    ``quota`` (if set) is decremented by each odds request's cost and reported
+    in x-requests-* headers the way the Odds API does. Randomness is seeded so
+    runs are reproducible.
+    """
+    
+    def __init__(self, fixture_dir: str, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 500, quota: Optional[int] = None, seed: int = 0):
+        self.fixtures = load_fixtures(fixture_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.quota_remaining = quota
+        self.quota_used = 0
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+    
+    def __enter__(self) -> 'ReplayServer':
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def _plan_response(self, method: str, path: str, params: Dict):
+        """Decide delay, status, headers and body for one request"""
+        with self._lock:
+            self.request_count += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+        
+        fixture = self.fixtures.get(fixture_key(method, path, params))
+        if failed:
+            return delay, self.error_status, {'content-type': 'application/json'}, '{"message": "injected error"}'
+        if fixture is None:
+            return delay, 404, {'content-type': 'application/json'}, '{"message": "no fixture recorded"}'
+        
+        headers = dict(fixture['headers'])
+        if self.quota_remaining is not None:
+            cost = self._request_cost(path, params)
+            with self._lock:
+                if self.quota_remaining < cost:
+                    return delay, 429, {'content-type': 'application/json'}, '{"message": "quota exhausted"}'
+                self.quota_remaining -= cost
+                self.quota_used += cost
+                headers.update({
+                    'x-requests-remaining': str(self.quota_remaining),
+                    'x-requests-used': str(self.quota_used),
+                    'x-requests-last': str(cost)
+                })
+        return delay, fixture['status'], headers, fixture['body']
+    
+    def _request_cost(self, path: str, params: Dict) -> int:
+        if not path.endswith('/odds'):
+            return 0
+        markets = len(params.get('markets', '').split(',')) if params.get('markets') else 1
+        regions = len(params.get('regions', '').split(',')) if params.get('regions') else 1
+        return markets * regions
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _replay(self):
+                parts = urlsplit(self.path)
+                params = dict(parse_qsl(parts.query))
+                delay, status, headers, body = server._plan_response(self.command, parts.path, params)
+                if delay:
+                    time.sleep(delay)
+                payload = body.encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def do_GET(self):
+                self._replay()
+            
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                self._replay()
+            
+            def log_message(self, format, *args):
+                pass  # Keep load tests quiet
+        
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded API fixtures over HTTP")
+    parser.add_argument('fixture_dir')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--quota', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    server = ReplayServer(args.fixture_dir, args.host, args.port, args.latency, args.jitter,
+                          args.error_rate, args.error_status, args.quota, args.seed)
+    print(f"Replaying {len(server.fixtures)} fixtures at {server.base_url}")
+    print("Press Ctrl+C to stop")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+import metrics
+
+CACHE_EVENTS = metrics.counter('response_cache_events_total',
+                               'Cache hits, stale hits, misses, coalesced waits, refreshes and evictions',
+                               ['event'])
+
+# Seconds a response is served as fresh, per endpoint kind
+DEFAULT_TTLS = {
+    'sports': 3600,
+    'events': 300,
+    'odds': 30,
+    'event_odds': 60,
+}
+
+class ResponseCache:
+    """TTL cache for JSON API responses with stale-while-revalidate
+
+    Entries younger than their endpoint's TTL are served directly. Entries past
+    the TTL but within ``stale_ttl`` more seconds are served immediately while a
+    background refresh runs, so readers never wait on the network for data we
+    already hold. Older or missing entries are fetched synchronously; callers
+    missing the same key at once share one fetch instead of each making a
+    (paid) request.
+
+    At most ``max_entries`` are kept in memory, least recently used evicted
+    first. If ``cache_dir`` is given, entries are also written there as JSON
+    so the cache survives restarts; on start and every 64 writes the
+    directory is pruned back to ``max_disk_entries`` files, oldest first.
+    """
+    
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 30,
+                 stale_ttl: float = 300, cache_dir: Optional[str] = None, refresh_workers: int = 2,
+                 max_entries: int = 1024, max_disk_entries: int = 4096):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()  # key -> (stored_at, value), LRU order
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._inflight: Dict[str, Future] = {}  # key -> fetch in progress
+        self._disk_writes = 0
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='cache-refresh')
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'refreshes': 0,
+                       'refresh_errors': 0, 'evictions': 0}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._prune_disk()
+    
+    def get(self, kind: str, endpoint: str, params: Optional[Dict] = None,
+            fetch: Optional[Callable[[], Any]] = None) -> Any:
+        """Return the cached response for endpoint+params, fetching if needed"""
+        key = self._make_key(endpoint, params)
+        ttl = self.ttls.get(kind, self.default_ttl)
+        
+        entry = self._lookup(key)
+        now = time.time()
+        if entry is not None:
+            age = now - entry[0]
+            if age < ttl:
+                self._count('hits')
+                return entry[1]
+            if age < ttl + self.stale_ttl and fetch is not None:
+                self._count('stale_hits')
+                self._schedule_refresh(key, fetch)
+                return entry[1]
+        
+        self._count('misses')
+        if fetch is None:
+            return None
+        return self._fetch_once(key, ttl, fetch)
+    
+    def _fetch_once(self, key: str, ttl: float, fetch: Callable[[], Any]) -> Any:
+        """Fetch a missing key, or wait for the fetch another caller already started"""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                # Another caller may have stored it between our lookup and now
+                entry = self._entries.get(key)
+                if entry is not None and time.time() - entry[0] < ttl:
+                    return entry[1]
+                future = self._inflight[key] = Future()
+        
+        if not leader:
+            self._count('coalesced')
+            return future.result()
+        
+        try:
+            value = fetch()
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+    
+    def invalidate(self, endpoint: str, params: Optional[Dict] = None):
+        """Drop a single entry from memory and disk"""
+        key = self._make_key(endpoint, params)
+        with self._lock:
+            self._entries.pop(key, None)
+        path = self._disk_path(key)
+        if path and os.path.exists(path):
+            os.remove(path)
+    
+    def clear(self):
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and the overall hit ratio"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        served = stats['hits'] + stats['stale_hits']
+        total = served + stats['misses']
+        stats['hit_ratio'] = served / total if total else 0.0
+        return stats
+    
+    def _make_key(self, endpoint: str, params: Optional[Dict]) -> str:
+        # The API key is a credential, not part of the resource identity
+        items = sorted((k, str(v)) for k, v in (params or {}).items() if k != 'apiKey')
+        return endpoint + '?' + '&'.join(f"{k}={v}" for k, v in items)
+    
+    def _lookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            entry = self._load_from_disk(key)
+            if entry is not None:
+                with self._lock:
+                    if key not in self._entries:
+                        self._remember(key, entry)
+        return entry
+    
+    def _store(self, key: str, value: Any):
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+        self._save_to_disk(key, entry)
+    
+    def _remember(self, key: str, entry: Tuple[float, Any]):
+        """Insert as most recently used and evict past max_entries (caller holds the lock)"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+            CACHE_EVENTS.inc(event='evictions')
+    
+    def _schedule_refresh(self, key: str, fetch: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, fetch)
+    
+    def _refresh(self, key: str, fetch: Callable[[], Any]):
+        try:
+            self._store(key, fetch())
+            self._count('refreshes')
+        except Exception as e:
+            print(f"Error refreshing cached response {key}: {e}")
+            self._count('refresh_errors')
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+        CACHE_EVENTS.inc(event=name)
+    
+    def _disk_path(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.json')
+    
+    def _load_from_disk(self, key: str) -> Optional[Tuple[float, Any]]:
+        path = self._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return data['stored_at'], data['value']
+        except Exception as e:
+            print(f"Error reading cache file {path}: {e}")
+            return None
+    
+    def _save_to_disk(self, key: str, entry: Tuple[float, Any]):
+        path = self._disk_path(key)
+        if not path:
+            return
+        try:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'key': key, 'stored_at': entry[0], 'value': entry[1]}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing cache file {path}: {e}")
+            return
+        with self._lock:
+            self._disk_writes += 1
+            due = self._disk_writes % 64 == 0
+        if due:
+            self._prune_disk()
+    
+    def _prune_disk(self):
+        """Remove the oldest cache files beyond max_disk_entries"""
+        try:
+            paths = [entry.path for entry in os.scandir(self.cache_dir) if entry.name.endswith('.json')]
+            if len(paths) <= self.max_disk_entries:
+                return
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self.max_disk_entries]:
+                os.remove(path)
+        except OSError as e:
+            print(f"Error pruning cache directory {self.cache_dir}: {e}")
@@ -0,0 +1,105 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Sequence, Tuple
+from urllib.parse import urlsplit
+import os
+import threading
+import time
+import metrics
+
+# Status codes worth retrying: rate limiting and transient upstream failures
+SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+RETRY_STATUSES = (429,) + SERVER_ERROR_STATUSES
+
+# Only idempotent methods are retried; a repeated POST could act twice
+RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+UPSTREAM_REQUESTS = metrics.counter('upstream_requests_total', 'Upstream HTTP requests', ['host', 'status'])
+UPSTREAM_LATENCY = metrics.histogram('upstream_request_duration_seconds', 'Upstream HTTP latency', ['host'])
+
+class _StatusRetry(Retry):
+    """Retry that only retries status_forcelist, even for 413/429/503 responses carrying Retry-After"""
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if self.status_forcelist is not None and status_code not in self.status_forcelist:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+class HttpTransport:
+    """Pooled HTTP session shared by the fetchers and API clients
+
+    Keeps connections alive between calls, caps connections per host, applies
+    a default timeout and retries 429/5xx responses to idempotent requests
+    with exponential backoff (honouring Retry-After). POSTs are not retried.
+    Clients that pace 429s themselves pass ``retry_statuses`` without it.
+    """
+    
+    def __init__(self, timeout: float = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                 pool_connections: int = 10, pool_maxsize: int = 10,
+                 retry_statuses: Sequence[int] = RETRY_STATUSES):
+        self.timeout = timeout
+        self.session = requests.Session()
+        
+        retry = _StatusRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=tuple(retry_statuses),
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False  # Hand the final response back so callers can raise_for_status
+        )
+        # pool_connections: number of hosts kept pooled; pool_maxsize: connections per host
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+            pool_block=True
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the pooled session"""
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            UPSTREAM_REQUESTS.inc(host=host, status='error')
+            raise
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, host=host)
+        UPSTREAM_REQUESTS.inc(host=host, status=response.status_code)
+        return response
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+_shared_transports: Dict[Tuple[int, ...], HttpTransport] = {}
+_shared_lock = threading.Lock()
+
+def get_transport(retry_statuses: Sequence[int] = RETRY_STATUSES) -> HttpTransport:
+    """Get the process-wide shared transport, creating it on first use
+
+    One transport is shared per set of retried statuses. When HTTP_RECORD_DIR
+    is set, the transport records every response there as a replay fixture
+    (see data_fetchers.replay).
+    """
+    key = tuple(retry_statuses)
+    with _shared_lock:
+        if key not in _shared_transports:
+            record_dir = os.getenv('HTTP_RECORD_DIR')
+            if record_dir:
+                from data_fetchers.replay import RecordingTransport
+                _shared_transports[key] = RecordingTransport(record_dir, retry_statuses=key)
+            else:
+                _shared_transports[key] = HttpTransport(retry_statuses=key)
+        return _shared_transports[key]
@@ -0,0 +1,113 @@
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import threading
+import pandas as pd
+from data_fetchers.odds_api_fetcher import OddsDelta, games_from_odds_table
+from opportunities import BetOpportunity
+from sports_config import ODDS_API_SPORTS
+
+# Odds table market -> bet type it feeds in BettingAnalyzer._analyze_games
+MARKET_BET_TYPES = {'h2h': 'Moneyline', 'spreads': 'Spread', 'totals': 'Total'}
+
+BetKey = Tuple[str, str]  # (event_id, bet_type)
+Subscriber = Callable[[List[BetOpportunity], List[BetOpportunity]], None]
+
+class IncrementalScorer:
+    """Keeps one sport's game bets scored between polls, re-scoring only what moved
+    
+    Each poll's OddsDelta names the events and markets whose prices changed;
+    only those games are re-analyzed and only their bets are replaced. Bets are
+    kept in a ranked index (best expected value first), and subscribers are
+    told which bets entered or left the top ``size`` after every update.
+    """
+    
+    def __init__(self, analyzer, sport: str = 'NBA', size: int = 20):
+        self.analyzer = analyzer
+        self.sport = sport
+        self.sport_key = ODDS_API_SPORTS[sport]['key']
+        self.size = size
+        self.bets: Dict[BetKey, BetOpportunity] = {}
+        self._ranked: List[Tuple[float, BetKey]] = []  # (-expected_value, key), ascending
+        self._best: Dict[BetKey, BetOpportunity] = {}  # Published top bets, in rank order
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self.rescored_games = 0  # Running count of games re-analyzed
+    
+    def subscribe(self, callback: Subscriber):
+        """Call ``callback(entered, left)`` whenever the best-bets list changes"""
+        self._subscribers.append(callback)
+    
+    def poll(self) -> Tuple[List[BetOpportunity], List[BetOpportunity]]:
+        """Fetch the latest odds and apply whatever changed"""
+        table, delta = self.analyzer.fetcher.get_odds_update(self.sport_key)
+        if delta.is_empty:
+            return [], []
+        return self.apply(table, delta)
+    
+    def apply(self, table: pd.DataFrame, delta: OddsDelta) -> Tuple[List[BetOpportunity], List[BetOpportunity]]:
+        """Re-score the markets named in ``delta`` using the current ``table``
+        
+        Returns the bets that entered and left the best-bets list.
+        """
+        touched = self._touched_keys(delta)
+        if not touched:
+            return [], []
+        
+        events = {event_id for event_id, _ in touched}
+        games = games_from_odds_table(table[table['event_id'].astype(str).isin(events)])
+        rescored = {(bet.event_id, bet.bet_type): bet for bet in self.analyzer._analyze_games(games, self.sport)}
+        
+        with self._lock:
+            for key in touched:
+                self._remove(key)
+                if key in rescored:
+                    self._insert(key, rescored[key])
+            self.rescored_games += len(games)
+            entered, left = self._update_best()
+        
+        if entered or left:
+            for callback in self._subscribers:
+                try:
+                    callback(entered, left)
+                except Exception as e:
+                    print(f"Error in best bets subscriber: {e}")
+        return entered, left
+    
+    def best(self, k: Optional[int] = None) -> List[BetOpportunity]:
+        """Current bets in rank order (the top ``size`` by default)"""
+        with self._lock:
+            return [self.bets[key] for _, key in self._ranked[:k or self.size]]
+    
+    def _touched_keys(self, delta: OddsDelta) -> Set[BetKey]:
+        """Bet keys whose market had an outcome added, moved or removed"""
+        touched = set()
+        for rows in (delta.added, delta.changed, delta.removed):
+            if rows.empty:
+                continue
+            pairs = rows[['event_id', 'market']].astype(str).drop_duplicates()
+            touched.update(
+                (event_id, MARKET_BET_TYPES[market])
+                for event_id, market in pairs.itertuples(index=False) if market in MARKET_BET_TYPES
+            )
+        for event_id in delta.removed_events:
+            touched.update((event_id, bet_type) for bet_type in MARKET_BET_TYPES.values())
+        return touched
+    
+    def _remove(self, key: BetKey):
+        bet = self.bets.pop(key, None)
+        if bet is not None:
+            index = bisect_left(self._ranked, (-bet.expected_value, key))
+            del self._ranked[index]
+    
+    def _insert(self, key: BetKey, bet: BetOpportunity):
+        self.bets[key] = bet
+        insort(self._ranked, (-bet.expected_value, key))
+    
+    def _update_best(self) -> Tuple[List[BetOpportunity], List[BetOpportunity]]:
+        # Left bets are reported as they were when last in the list
+        previous = self._best
+        current = {key: self.bets[key] for _, key in self._ranked[:self.size]}
+        self._best = current
+        entered = [bet for key, bet in current.items() if key not in previous]
+        left = [bet for key, bet in previous.items() if key not in current]
+        return entered, left
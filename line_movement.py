@@ -0,0 +1,249 @@
+"""Line-movement and steam detection over successive odds snapshots
+
+Every (event, market, outcome, book) keeps its last few captures in a small
+fixed-size ring buffer. A capture is compared against the oldest capture
+still inside ``window`` seconds, or the last capture before it if the price
+sat still for longer than that; a change in implied probability of at least
+``move_threshold`` (or a point change of ``point_threshold``) is a move.
+When ``steam_books`` different books move the same outcome the same way
+within ``steam_window`` seconds, that is a steam move. Only changed prices
+are fed in (see OddsApiFetcher.get_odds_update), so the work per poll is
+proportional to what moved and memory is bounded by the outcomes on offer.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import math
+import threading
+import time
+import numpy as np
+import pandas as pd
+from data_fetchers.odds_api_fetcher import OddsDelta
+from odds import american_to_implied
+import metrics
+
+LINE_MOVES = metrics.counter('line_moves_total', 'Line movement alerts raised', ['kind'])
+
+OutcomeKey = Tuple[str, str, str, str]  # (event_id, market, outcome, description)
+Capture = Tuple[float, float, float, float]  # (at, implied probability, price, point)
+
+def _support(outcome: str, probability_change: float, point_change: float) -> int:
+    """+1 if the move is money coming in on the outcome, -1 if against it
+
+    A point move outweighs the price: a higher total supports the Over, a
+    lower spread (e.g. -3.5 to -4.5) supports the side laying the points.
+    """
+    if point_change:
+        if outcome == 'Under':
+            return 1 if point_change < 0 else -1
+        if outcome == 'Over':
+            return 1 if point_change > 0 else -1
+        return 1 if point_change < 0 else -1
+    return 1 if probability_change > 0 else -1
+
+@dataclass
+class LineMoveAlert:
+    """A sharp move at one book ('move') or the same move across several ('steam')"""
+    kind: str
+    sport: str
+    event_id: str
+    market: str
+    outcome: str
+    description: str
+    books: List[str]
+    direction: int  # +1 toward the outcome, -1 against it
+    probability_change: float  # Change in implied probability (largest mover for steam)
+    point_change: float
+    price_from: float
+    price_to: float
+    point: float
+    seconds: float  # How long the move took
+    at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+class _Ring:
+    """Last ``capacity`` captures of one outcome at one book"""
+    __slots__ = ('times', 'probabilities', 'prices', 'points', 'head', 'size')
+
+    def __init__(self, capacity: int):
+        self.times = [0.0] * capacity
+        self.probabilities = [0.0] * capacity
+        self.prices = [0.0] * capacity
+        self.points = [0.0] * capacity
+        self.head = 0  # Next slot to write
+        self.size = 0
+
+    def push(self, at: float, probability: float, price: float, point: float, window: float) -> Optional[Capture]:
+        """Store a capture; returns the oldest earlier capture within ``window`` of it
+
+        The latest capture is never dropped, so a price that held for longer
+        than ``window`` is still the reference for the next move.
+        """
+        capacity = len(self.times)
+        # Each capture leaves the window once, so this is O(1) amortized
+        while self.size > 1 and self.times[(self.head - self.size) % capacity] < at - window:
+            self.size -= 1
+
+        reference = None
+        if self.size:
+            tail = (self.head - self.size) % capacity
+            reference = (self.times[tail], self.probabilities[tail], self.prices[tail], self.points[tail])
+
+        slot = self.head
+        self.times[slot], self.probabilities[slot], self.prices[slot], self.points[slot] = at, probability, price, point
+        self.head = (slot + 1) % capacity
+        self.size = min(self.size + 1, capacity)
+        return reference
+
+class _OutcomeState:
+    """Rings, recent movers and alert cool-downs for one outcome across books"""
+    __slots__ = ('rings', 'movers', 'quiet_until')
+
+    def __init__(self):
+        self.rings: Dict[str, _Ring] = {}
+        self.movers: Dict[str, Tuple[float, int, Capture, Capture]] = {}  # book -> (at, direction, from, to)
+        self.quiet_until: Dict = {}  # book (move) or direction (steam) -> time it may fire again
+
+Subscriber = Callable[[List[LineMoveAlert]], None]
+
+class LineMovementDetector:
+    """Raises move and steam alerts from a stream of odds updates"""
+
+    def __init__(self, fetcher=None, window: float = 600, move_threshold: float = 0.03,
+                 point_threshold: float = 0.5, steam_window: float = 120, steam_threshold: float = 0.015,
+                 steam_books: int = 3, capacity: int = 16):
+        self.fetcher = fetcher
+        self.window = window
+        self.move_threshold = move_threshold
+        self.point_threshold = point_threshold
+        self.steam_window = steam_window
+        self.steam_threshold = steam_threshold  # Smaller per-book move that still counts toward steam
+        self.steam_books = steam_books
+        self.capacity = capacity
+        self._outcomes: Dict[OutcomeKey, _OutcomeState] = {}
+        self._keys_by_event: Dict[str, Set[OutcomeKey]] = {}
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self.ticks = 0  # Running count of captures processed
+
+    def subscribe(self, callback: Subscriber):
+        """Call ``callback(alerts)`` whenever an update raises alerts"""
+        self._subscribers.append(callback)
+
+    def poll(self, sport: str = 'basketball_nba') -> List[LineMoveAlert]:
+        """Fetch the latest odds for ``sport`` and check what moved
+
+        get_odds_update keeps one previous table per sport, so a detector
+        sharing a fetcher with an IncrementalScorer should be fed the
+        scorer's deltas through apply() instead.
+        """
+        _, delta = self.fetcher.get_odds_update(sport)
+        return self.apply(delta)
+
+    def apply(self, delta: OddsDelta, captured_at: Optional[float] = None) -> List[LineMoveAlert]:
+        """Feed the added and moved outcomes of one update (``captured_at`` is a Unix time)"""
+        at = time.time() if captured_at is None else captured_at
+        frames = [frame for frame in (delta.added, delta.changed) if not frame.empty]
+        alerts = []
+        with self._lock:
+            if frames:
+                rows = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+                keys = [rows[column].astype(object).where(rows[column].notna(), '').astype(str).to_numpy()
+                        for column in ('event_id', 'market', 'outcome', 'description', 'book')]
+                prices = rows['price'].to_numpy(dtype=float)
+                probabilities = american_to_implied(prices)
+                points = rows['point'].to_numpy(dtype=float)
+                for event_id, market, outcome, description, book, price, probability, point in zip(
+                        *keys, prices.tolist(), probabilities.tolist(), points.tolist()):
+                    if not math.isnan(price):
+                        alerts.extend(self._observe(delta.sport, (event_id, market, outcome, description), book,
+                                                    at, probability, price, point))
+            self._forget(delta.removed_events)
+        self._publish(alerts)
+        return alerts
+
+    def observe(self, sport: str, event_id: str, market: str, outcome: str, book: str, price: float,
+                point: float = np.nan, description: str = '', captured_at: Optional[float] = None) -> List[LineMoveAlert]:
+        """Feed a single price, for sources other than the Odds API"""
+        at = time.time() if captured_at is None else captured_at
+        with self._lock:
+            alerts = self._observe(sport, (event_id, market, outcome, description or ''), book, at,
+                                   float(american_to_implied(price)), float(price), float(point))
+        self._publish(alerts)
+        return alerts
+
+    def forget(self, event_ids):
+        """Drop the state kept for events that are no longer offered"""
+        with self._lock:
+            self._forget(event_ids)
+
+    @property
+    def tracked_outcomes(self) -> int:
+        return len(self._outcomes)
+
+    def _forget(self, event_ids):
+        for event_id in event_ids:
+            for key in self._keys_by_event.pop(event_id, ()):
+                self._outcomes.pop(key, None)
+
+    def _publish(self, alerts: List[LineMoveAlert]):
+        for alert in alerts:
+            LINE_MOVES.inc(kind=alert.kind)
+        if alerts:
+            for callback in self._subscribers:
+                try:
+                    callback(alerts)
+                except Exception as e:
+                    print(f"Error in line movement subscriber: {e}")
+
+    def _observe(self, sport: str, key: OutcomeKey, book: str, at: float, probability: float,
+                 price: float, point: float) -> List[LineMoveAlert]:
+        self.ticks += 1
+        state = self._outcomes.get(key)
+        if state is None:
+            state = self._outcomes[key] = _OutcomeState()
+            self._keys_by_event.setdefault(key[0], set()).add(key)
+        ring = state.rings.get(book)
+        if ring is None:
+            ring = state.rings[book] = _Ring(self.capacity)
+
+        reference = ring.push(at, probability, price, point, self.window)
+        if reference is None:
+            return []
+        probability_change = probability - reference[1]
+        point_change = 0.0 if math.isnan(point) or math.isnan(reference[3]) else point - reference[3]
+        point_moved = abs(point_change) >= self.point_threshold
+        if not point_moved and abs(probability_change) < self.steam_threshold:
+            return []
+
+        direction = _support(key[2], probability_change, point_change if point_moved else 0.0)
+        capture = (at, probability, price, point)
+        alerts = []
+        if (point_moved or abs(probability_change) >= self.move_threshold) and at >= state.quiet_until.get(book, 0):
+            state.quiet_until[book] = at + self.window  # Once per move, not on every later tick
+            alerts.append(self._alert('move', sport, key, [book], direction, reference, capture))
+
+        # Steam: enough books moving the same way within steam_window
+        state.movers[book] = (at, direction, reference, capture)
+        since = at - self.steam_window
+        movers = {name: mover for name, mover in state.movers.items() if mover[0] >= since}
+        state.movers = movers
+        books = sorted(name for name, mover in movers.items() if mover[1] == direction)
+        if len(books) >= self.steam_books and at >= state.quiet_until.get(direction, 0):
+            state.quiet_until[direction] = at + self.steam_window
+            biggest = max(books, key=lambda name: abs(movers[name][3][1] - movers[name][2][1]))
+            first = min(movers[name][2][0] for name in books)
+            alert = self._alert('steam', sport, key, books, direction, movers[biggest][2], movers[biggest][3])
+            alert.seconds = at - first
+            alerts.append(alert)
+        return alerts
+
+    def _alert(self, kind: str, sport: str, key: OutcomeKey, books: List[str], direction: int,
+               reference: Capture, capture: Capture) -> LineMoveAlert:
+        point_change = 0.0 if math.isnan(capture[3]) or math.isnan(reference[3]) else capture[3] - reference[3]
+        return LineMoveAlert(
+            kind=kind, sport=sport, event_id=key[0], market=key[1], outcome=key[2], description=key[3],
+            books=books, direction=direction, probability_change=capture[1] - reference[1],
+            point_change=point_change, price_from=reference[2], price_to=capture[2], point=capture[3],
+            seconds=capture[0] - reference[0],
+            at=datetime.fromtimestamp(capture[0], timezone.utc)
+        )
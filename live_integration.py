@@ -9,6 +9,13 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import json
 import pandas as pd
+import metrics
+
+LOOP_LAG = metrics.histogram('scraper_loop_lag_seconds', 'How late each scraper update started',
+                             buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300))
+LOOP_DURATION = metrics.histogram('scraper_loop_duration_seconds', 'Time spent in one scraper update',
+                                  buckets=(1, 2.5, 5, 10, 20, 30, 60, 120))
+LOOP_ERRORS = metrics.counter('scraper_loop_errors_total', 'Scraper updates that failed')
 
 class HardRockBetScraper:
     def __init__(self):
@@ -19,6 +26,7 @@ class HardRockBetScraper:
         self.update_interval = 30  # seconds
         self._stop_flag = False
         self._update_thread = None
+        self._next_update = None  # When the loop is due to run again
 
     def start(self):
         """Initialize the scraper and start continuous updates"""
@@ -43,21 +51,36 @@ class HardRockBetScraper:
     def _start_update_thread(self):
         """Start background thread for continuous updates"""
         self._stop_flag = False
+        self._next_update = time.time()
+        metrics.gauge('scraper_loop_lag_current_seconds', 'How overdue the next scraper update is',
+                      fn=self.loop_lag)
         self._update_thread = threading.Thread(target=self._update_loop)
         self._update_thread.start()
 
     def _update_loop(self):
         """Continuous update loop for odds and game data"""
         while not self._stop_flag:
+            started = time.time()
+            LOOP_LAG.observe(max(0.0, started - self._next_update))
             try:
                 self._update_nba_odds()
                 self._update_nfl_odds()
                 self._update_live_games()
+                LOOP_DURATION.observe(time.time() - started)
+                self._next_update = time.time() + self.update_interval
                 time.sleep(self.update_interval)
             except Exception as e:
                 print(f"Error in update loop: {e}")
+                LOOP_ERRORS.inc()
+                self._next_update = time.time() + 60
                 time.sleep(60)  # Wait longer on error
 
+    def loop_lag(self) -> Optional[float]:
+        """Seconds the next update is overdue (0 when on schedule)"""
+        if self._next_update is None or self._stop_flag:
+            return None
+        return max(0.0, time.time() - self._next_update)
+
     def _update_nba_odds(self):
         """Update NBA odds from Hard Rock Bet"""
         try:
@@ -0,0 +1,303 @@
+"""Prometheus-style counters, histograms and gauges with a /metrics endpoint
+
+Counters and histograms are sharded per thread: each thread updates its own
+dict without taking a lock, and a scrape sums the shards. Shards of threads
+that have exited (e.g. per-refresh thread pools) are folded into a retired
+total so they do not pile up. Gauges are either set directly or computed by a
+callback at scrape time (quota remaining, snapshot age, ...).
+
+    REQUESTS = metrics.counter('odds_api_requests_total', 'Odds API calls', ['kind', 'status'])
+    REQUESTS.inc(kind='odds', status='200')
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fold exited threads' shards into the retired total once this many pile up
+MAX_SHARDS = 64
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _label_key(name: str, labelnames: Tuple[str, ...], labels: Dict) -> Tuple[str, ...]:
+    if len(labels) != len(labelnames) or not all(label in labels for label in labelnames):
+        raise ValueError(f"{name} expects labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[label]) for label in labelnames)
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+class _ShardedMetric:
+    """Base for metrics whose updates go to a per-thread dict"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        self._retired: Dict = {}
+        self._lock = threading.Lock()  # Only taken for shard bookkeeping and scrapes
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) > MAX_SHARDS:
+                    self._retire_dead_shards()
+        return shard
+
+    def _retire_dead_shards(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, dict(shard))
+        self._shards = live
+
+    def _collect(self) -> Dict:
+        """Sum of every shard, keyed by label values"""
+        with self._lock:
+            self._retire_dead_shards()
+            total = self._copy(self._retired)
+            for _, shard in self._shards:
+                self._merge(total, dict(shard))  # dict() copies atomically under the GIL
+        return total
+
+    def _merge(self, into: Dict, shard: Dict):
+        raise NotImplementedError
+
+    def _copy(self, values: Dict) -> Dict:
+        raise NotImplementedError
+
+    def expose(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_ShardedMetric):
+    """Monotonically increasing count"""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        shard = self._shard()
+        key = _label_key(self.name, self.labelnames, labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._collect().get(_label_key(self.name, self.labelnames, labels), 0.0)
+
+    def _merge(self, into: Dict, shard: Dict):
+        for key, value in shard.items():
+            into[key] = into.get(key, 0.0) + value
+
+    def _copy(self, values: Dict) -> Dict:
+        return dict(values)
+
+    def expose(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._collect().items())]
+
+class Histogram(_ShardedMetric):
+    """Bucketed observations (cumulative buckets, sum and count on export)"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        shard = self._shard()
+        key = _label_key(self.name, self.labelnames, labels)
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def time(self, **labels) -> '_Timer':
+        """Context manager observing the elapsed seconds"""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        entry = self._collect().get(_label_key(self.name, self.labelnames, labels))
+        return sum(entry[0]) if entry else 0
+
+    def _merge(self, into: Dict, shard: Dict):
+        for key, (counts, total) in shard.items():
+            entry = into.get(key)
+            if entry is None:
+                into[key] = [list(counts), total]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+
+    def _copy(self, values: Dict) -> Dict:
+        return {key: [list(counts), total] for key, (counts, total) in values.items()}
+
+    def expose(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+class Gauge:
+    """Current value, set directly or computed by ``fn`` at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], Optional[float]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[_label_key(self.name, self.labelnames, labels)] = value
+
+    def expose(self) -> List[str]:
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception as e:
+                print(f"Error computing gauge {self.name}: {e}")
+                return []
+            return [] if value is None else [f"{self.name} {_format_value(value)}"]
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(dict(self._values).items())]
+
+class MetricsRegistry:
+    """Named metrics and their text exposition"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              fn: Optional[Callable[[], Optional[float]]] = None) -> Gauge:
+        gauge = self._get_or_create(Gauge, name, documentation, labelnames)
+        if fn is not None:
+            gauge.fn = fn  # The latest owner (e.g. a restarted service) wins
+        return gauge
+
+    def exposition(self) -> str:
+        """Every metric in the Prometheus text format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.counter(name, documentation, labelnames)
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = (),
+          fn: Optional[Callable[[], Optional[float]]] = None) -> Gauge:
+    return REGISTRY.gauge(name, documentation, labelnames, fn)
+
+def watch_snapshot_service(service, registry: MetricsRegistry = REGISTRY):
+    """Gauges for a SnapshotService and, when it has one, its analyzer's fetcher"""
+    registry.gauge('best_bets_snapshot_age_seconds', 'Seconds since the served bets were computed',
+                   fn=lambda: service.get().age)
+    registry.gauge('best_bets_snapshot_version', 'Version of the served snapshot',
+                   fn=lambda: service.get().version)
+    registry.gauge('best_bets_snapshot_bets', 'Bets in the served snapshot',
+                   fn=lambda: len(service.get().bets))
+
+    fetcher = getattr(service.analyzer, 'fetcher', None)
+    if hasattr(fetcher, 'get_quota_state'):
+        registry.gauge('odds_api_quota_remaining', 'Odds API requests left this period',
+                       fn=lambda: fetcher.get_quota_state()['remaining'])
+        registry.gauge('odds_api_quota_used', 'Odds API requests used this period',
+                       fn=lambda: fetcher.get_quota_state()['used'])
+    if hasattr(getattr(fetcher, 'cache', None), 'stats'):
+        registry.gauge('response_cache_hit_ratio', 'Share of lookups served from the response cache',
+                       fn=lambda: fetcher.cache.stats()['hit_ratio'])
+        registry.gauge('response_cache_entries', 'Responses held in the cache',
+                       fn=lambda: fetcher.cache.stats()['entries'])
+
+def add_metrics_endpoint(server, path: str = '/metrics', registry: MetricsRegistry = REGISTRY):
+    """Serve ``registry`` at ``path`` on a Flask app (Dash: ``app.server``) and time its requests"""
+    from flask import Response, g, request
+
+    requests_total = registry.counter('http_requests_total', 'Requests served', ['method', 'route', 'status'])
+    latency = registry.histogram('http_request_duration_seconds', 'Request latency', ['method', 'route'])
+
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    def stop_timer(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            # Route templates, not raw paths, keep label cardinality bounded
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            latency.observe(time.perf_counter() - start, method=request.method, route=route)
+            requests_total.inc(method=request.method, route=route, status=response.status_code)
+        return response
+
+    def metrics_view():
+        return Response(registry.exposition(), mimetype='text/plain; version=0.0.4')
+
+    server.before_request(start_timer)
+    server.after_request(stop_timer)
+    server.add_url_rule(path, 'metrics', metrics_view)
@@ -0,0 +1,117 @@
+"""Vectorized odds math shared by the analyzers and strategies
+
+Every function accepts scalars or NumPy arrays (anything np.asarray takes) and
+broadcasts like a ufunc: array in, array out; scalar in, NumPy scalar out.
+Missing prices should be NaN and propagate through as NaN.
+"""
+from typing import Optional
+import numpy as np
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+def _result(values: np.ndarray):
+    # Unwrap 0-d arrays so scalar inputs give scalar outputs
+    return values[()]
+
+def american_to_decimal(american):
+    """American odds to decimal odds, e.g. -150 -> 1.667, +130 -> 2.30"""
+    a = _as_float(american)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _result(np.where(a > 0, 1 + a / 100, 1 + 100 / np.abs(a)))
+
+def decimal_to_american(decimal):
+    """Decimal odds to American odds"""
+    d = _as_float(decimal)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _result(np.where(d >= 2, (d - 1) * 100, -100 / (d - 1)))
+
+def american_to_implied(american):
+    """American odds to implied probability (including the bookmaker's margin)"""
+    a = _as_float(american)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _result(np.where(a > 0, 100 / (a + 100), np.abs(a) / (np.abs(a) + 100)))
+
+def implied_to_american(probability):
+    """Probability to the American odds that imply it"""
+    p = _as_float(probability)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _result(np.where(p > 0.5, -100 * p / (1 - p), 100 * (1 - p) / p))
+
+def decimal_to_implied(decimal):
+    """Decimal odds to implied probability"""
+    with np.errstate(divide='ignore'):
+        return _result(1 / _as_float(decimal))
+
+def implied_to_decimal(probability):
+    """Probability to fair decimal odds"""
+    with np.errstate(divide='ignore'):
+        return _result(1 / _as_float(probability))
+
+def expected_value(american, probability):
+    """Expected profit per unit staked at American odds given a win probability"""
+    return _result(_as_float(probability) * american_to_decimal(american) - 1)
+
+def no_vig_probabilities(implied, method: str = 'multiplicative', axis: int = -1,
+                         tolerance: float = 1e-10, max_iterations: int = 50):
+    """Remove the bookmaker's margin from the implied probabilities of a market
+    
+    ``implied`` holds one market's outcomes along ``axis`` (e.g. shape
+    (n_markets, 2) for two-way markets). Methods:
+    
+    - multiplicative: scale every outcome by 1 / overround
+    - additive: subtract an equal share of the overround from every outcome
+    - power: raise every outcome to the power k that makes them sum to 1,
+      which shifts more of the margin onto longshots
+    """
+    p = _as_float(implied)
+    total = np.sum(p, axis=axis, keepdims=True)
+    
+    if method == 'multiplicative':
+        return _result(p / total)
+    if method == 'additive':
+        return _result(p - (total - 1) / p.shape[axis])
+    if method != 'power':
+        raise ValueError(f"Unknown no-vig method: {method}")
+    
+    # Newton's method on f(k) = sum(p^k) - 1, solved for every market at once
+    k = np.ones_like(total)
+    log_p = np.log(p)
+    for _ in range(max_iterations):
+        powered = p ** k
+        f = np.sum(powered, axis=axis, keepdims=True) - 1
+        if np.all(np.abs(f[~np.isnan(f)]) < tolerance):
+            break
+        slope = np.sum(powered * log_p, axis=axis, keepdims=True)
+        k = k - f / slope
+    return _result(p ** k)
+
+def consensus_probability(prices, weights: Optional[np.ndarray] = None, method: str = 'multiplicative'):
+    """Weighted multi-book fair probability for each outcome
+    
+    ``prices`` are American odds shaped (n_markets, n_books, n_outcomes), or
+    (n_books, n_outcomes) for a single market, with NaN where a book does not
+    price the market. Each book's prices are de-vigged, then averaged across
+    books using ``weights`` (one per book, default equal). Books with missing
+    prices are left out of the average.
+    """
+    prices = _as_float(prices)
+    single_market = prices.ndim == 2
+    if single_market:
+        prices = prices[np.newaxis]
+    
+    fair = no_vig_probabilities(american_to_implied(prices), method=method, axis=-1)
+    book_weights = np.ones(prices.shape[1]) if weights is None else _as_float(weights)
+    book_weights = np.broadcast_to(book_weights, prices.shape[:2])[..., np.newaxis]
+    
+    # A book counts only if it priced every outcome of the market
+    priced = ~np.isnan(fair).any(axis=-1, keepdims=True)
+    effective = np.where(priced, book_weights, 0.0)
+    with np.errstate(invalid='ignore'):
+        consensus = np.sum(np.where(priced, fair, 0.0) * effective, axis=1) / np.sum(effective, axis=1)
+    
+    return _result(consensus[0] if single_market else consensus)
+
+def consensus_price(prices, weights: Optional[np.ndarray] = None, method: str = 'multiplicative'):
+    """Weighted multi-book fair price for each outcome, in American odds"""
+    return implied_to_american(consensus_probability(prices, weights, method))
@@ -0,0 +1,389 @@
+"""Append-only on-disk history of every odds snapshot
+
+Layout, one directory per partition and one sub-directory per segment:
+
+    <root>/<sport>/<commence date>/seg-<first capture ns>-<id>/
+        meta.json            row count, string dictionaries, event row ranges
+        captured_at.npy      int64 ns
+        event_id.npy ...     int32 dictionary codes for the string columns
+        point.npy            float32
+        price.npy            int32, delta-encoded per outcome
+        groups.npy           int64 start row of every outcome's run
+
+Partitioning on the event's commence date keeps an event's whole history
+(opening line to close) in a single partition. Rows inside a segment are
+sorted by outcome and then capture time, so one event is a contiguous row
+range and each price is stored as the change from that outcome's previous
+capture. Appends are buffered per partition and written as one segment once
+``batch_rows`` accumulate or the oldest buffered row is ``max_buffer_seconds``
+old (or on flush()), so frequent small snapshots do not turn into thousands
+of tiny files. Reads memory-map only the columns they need and slice out the
+event's rows, and include rows still in the buffer, so the latest captures
+(e.g. closing prices) are visible before they are written.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Stored columns; string columns are dictionary-encoded
+STRING_COLUMNS = ['event_id', 'book', 'market', 'outcome', 'description']
+HISTORY_COLUMNS = ['captured_at', 'event_id', 'book', 'market', 'outcome', 'description',
+                   'point', 'price', 'last_update']
+OUTCOME_COLUMNS = ['event_id', 'book', 'market', 'outcome', 'description']
+
+DAY_NS = 86400 * 10**9
+
+def _to_ns(values: pd.Series) -> np.ndarray:
+    if not isinstance(values.dtype, pd.DatetimeTZDtype):
+        values = pd.to_datetime(values, utc=True)
+    return values.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+def _encode_prices(prices: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Change from the previous row, except at the start of each outcome's run"""
+    deltas = np.diff(prices, prepend=0)
+    deltas[starts] = prices[starts]
+    return deltas.astype(np.int32)
+
+def _decode_prices(deltas: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Running sum of deltas, restarting at each run start (starts[0] must be 0)"""
+    running = np.cumsum(deltas, dtype=np.int64)
+    before_run = running[starts] - deltas[starts]
+    lengths = np.diff(np.append(starts, len(deltas)))
+    return running - np.repeat(before_run, lengths)
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate decoded frames, keeping string columns categorical
+
+    Each segment's categories are the values it holds, and pd.concat turns
+    differing categoricals into object columns; the union (sorted) keeps a
+    partition's dtypes the same however many segments it is split into.
+    """
+    merged = pd.concat(frames, ignore_index=True)
+    for column in STRING_COLUMNS:
+        if column in merged and len(frames) > 1:
+            merged[column] = union_categoricals([frame[column] for frame in frames], sort_categories=True)
+    return merged
+
+class OddsHistoryStore:
+    """Append odds tables (see build_odds_table) and query them back"""
+
+    def __init__(self, root: str, batch_rows: int = 50000, max_buffer_seconds: float = 300):
+        self.root = root
+        self.batch_rows = batch_rows
+        self.max_buffer_seconds = max_buffer_seconds
+        self._buffers: Dict[Tuple[str, str], List[pd.DataFrame]] = {}
+        self._buffer_rows: Dict[Tuple[str, str], int] = {}
+        self._buffer_started: Dict[Tuple[str, str], float] = {}
+        self._meta_cache: Dict[str, Dict] = {}
+        self._event_dates: Dict[str, Dict[str, Set[str]]] = {}  # sport -> event id -> commence dates
+        self._indexed_segments: Set[str] = set()
+        self._readers = 0  # read_partition calls reading segments outside the lock
+        self._retired: Set[str] = set()  # Compacted segments left for those readers to finish with
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        atexit.register(self.flush)
+
+    def append(self, table: pd.DataFrame, captured_at: Optional[datetime] = None) -> int:
+        """Buffer one snapshot; returns the number of rows accepted
+
+        Rows without a price or commence time are dropped.
+        """
+        if table.empty:
+            return 0
+        captured = pd.Timestamp(captured_at or datetime.now(timezone.utc))
+        captured = captured.tz_localize('UTC') if captured.tzinfo is None else captured.tz_convert('UTC')
+
+        rows = table[table['price'].notna() & table['commence_time'].notna()]
+        if rows.empty:
+            return 0
+        frame = pd.DataFrame({
+            'captured_at': np.full(len(rows), captured.value, dtype=np.int64),
+            **{column: rows[column].astype(object).to_numpy() for column in STRING_COLUMNS},
+            'home_team': rows['home_team'].astype(object).to_numpy(),
+            'away_team': rows['away_team'].astype(object).to_numpy(),
+            'commence_time': _to_ns(rows['commence_time']),
+            'point': rows['point'].to_numpy(dtype=np.float32),
+            'price': np.round(rows['price'].to_numpy(dtype=float)).astype(np.int32),
+            'last_update': _to_ns(rows['last_update']),
+            'sport': rows['sport'].astype(str).to_numpy(),
+        })
+        frame['day'] = frame['commence_time'] // DAY_NS  # Formatted once per partition, not per row
+
+        with self._lock:
+            for (sport, day), part in frame.groupby(['sport', 'day'], sort=False):
+                key = (sport, pd.Timestamp(day * DAY_NS, tz='UTC').strftime('%Y-%m-%d'))
+                self._buffers.setdefault(key, []).append(part.drop(columns=['sport', 'day']))
+                self._index_events(sport, key[1], part['event_id'].unique())
+                self._buffer_rows[key] = self._buffer_rows.get(key, 0) + len(part)
+                self._buffer_started.setdefault(key, time.time())
+            self._flush_due()
+        return len(frame)
+
+    def flush(self):
+        """Write every buffered partition to disk"""
+        with self._lock:
+            for key in list(self._buffers):
+                self._flush_partition(key)
+
+    def partitions(self, sport: str) -> List[str]:
+        """Commence dates with stored history for ``sport``"""
+        path = os.path.join(self.root, sport)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def read_partition(self, sport: str, date: str, columns: Optional[Sequence[str]] = None,
+                       event_id: Optional[str] = None) -> pd.DataFrame:
+        """Rows of one partition, optionally only one event and some columns
+
+        Includes rows still buffered for the partition; buffers older than
+        ``max_buffer_seconds`` are written out first. Segments are listed under
+        the lock and read outside it; a compact() meanwhile leaves the listed
+        segments on disk until the read is done.
+        """
+        columns = list(columns or HISTORY_COLUMNS)
+        with self._lock:
+            self._flush_due()
+            buffered = self._read_buffer(sport, date, columns, event_id)
+            segments = self._segments(sport, date)
+            self._readers += 1
+        try:
+            frames = [self._read_segment(path, columns, event_id) for path in segments]
+        finally:
+            self._release_reader()
+        frames = [frame for frame in frames + [buffered] if frame is not None]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return _concat(frames)
+
+    def event_history(self, sport: str, event_id: str, commence_date: Optional[str] = None,
+                      columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Every stored capture of one event, oldest first
+
+        Only the event's partition is opened. It is found in an in-memory
+        event index, which reads the metadata of segments it has not seen
+        yet only when the event is unknown; pass ``commence_date``
+        (YYYY-MM-DD) to skip the lookup.
+        """
+        dates = [commence_date] if commence_date else self._event_partitions(sport, event_id)
+        frames = [self.read_partition(sport, date, columns, event_id) for date in dates]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=list(columns or HISTORY_COLUMNS))
+        history = _concat(frames)
+        if 'captured_at' in history:
+            history = history.sort_values('captured_at', kind='stable').reset_index(drop=True)
+        return history
+
+    def price_series(self, sport: str, event_id: str, market: str, outcome: str,
+                     description: Optional[str] = None, commence_date: Optional[str] = None) -> pd.DataFrame:
+        """One outcome's price over time, a column per book
+
+        Shaped for BettingVisualizer.plot_team_trends(series, list(series.columns), title).
+        """
+        history = self.event_history(sport, event_id, commence_date,
+                                     columns=['captured_at', 'book', 'market', 'outcome', 'description', 'price'])
+        mask = (history['market'] == market) & (history['outcome'] == outcome)
+        if description is not None:
+            mask &= history['description'] == description
+        return history[mask].pivot_table(index='captured_at', columns='book', values='price',
+                                         aggfunc='last', observed=True)
+
+    def compact(self, sport: str, date: str):
+        """Rewrite a partition's segments as a single segment"""
+        with self._lock:
+            self._flush_partition((sport, date))
+            segments = self._segments(sport, date)
+            if len(segments) < 2:
+                return
+            frames = [self._read_segment(path, HISTORY_COLUMNS + ['home_team', 'away_team', 'commence_time'])
+                      for path in segments]
+            merged = pd.concat(frames, ignore_index=True)
+            for column in ('captured_at', 'commence_time', 'last_update'):
+                merged[column] = _to_ns(merged[column])
+            self._write_segment(sport, date, merged)
+            for path in segments:
+                if self._readers:
+                    self._retired.add(path)
+                else:
+                    shutil.rmtree(path)
+                    self._meta_cache.pop(path, None)
+                self._indexed_segments.discard(path)
+
+    def _release_reader(self):
+        """End a read; the last reader out deletes segments compacted while it read"""
+        with self._lock:
+            self._readers -= 1
+            if self._readers:
+                return
+            for path in self._retired:
+                shutil.rmtree(path, ignore_errors=True)
+                self._meta_cache.pop(path, None)
+            self._retired.clear()
+
+    def _index_events(self, sport: str, date: str, event_ids):
+        events = self._event_dates.setdefault(sport, {})
+        for event_id in event_ids:
+            events.setdefault(str(event_id), set()).add(date)
+
+    def _event_partitions(self, sport: str, event_id: str) -> List[str]:
+        """Commence dates holding ``event_id``, indexing unseen segments only if it is not known yet"""
+        with self._lock:
+            dates = self._event_dates.get(sport, {}).get(event_id)
+            if not dates:
+                for date in self.partitions(sport):
+                    for path in self._segments(sport, date):
+                        if path not in self._indexed_segments:
+                            self._index_events(sport, date, self._meta(path)['events'])
+                            self._indexed_segments.add(path)
+                dates = self._event_dates.get(sport, {}).get(event_id, set())
+            return sorted(dates)
+
+    def _read_buffer(self, sport: str, date: str, columns: Sequence[str],
+                     event_id: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Buffered rows of a partition, decoded like _read_segment (caller holds the lock)"""
+        frames = self._buffers.get((sport, date))
+        if not frames:
+            return None
+        frame = pd.concat(frames, ignore_index=True)
+        if event_id is not None:
+            frame = frame[frame['event_id'] == event_id]
+            if frame.empty:
+                return None
+
+        data = {}
+        for column in columns:
+            values = frame[column].to_numpy()
+            if column in STRING_COLUMNS:
+                data[column] = pd.Categorical(values)
+            elif column in ('captured_at', 'last_update', 'commence_time'):
+                data[column] = pd.to_datetime(values.astype(np.int64).view('datetime64[ns]'), utc=True)
+            elif column == 'price':
+                data[column] = values.astype(np.int64)
+            else:
+                data[column] = values
+        return pd.DataFrame(data, columns=list(columns))
+
+    def _flush_due(self):
+        now = time.time()
+        for key in list(self._buffers):
+            if (self._buffer_rows[key] >= self.batch_rows
+                    or now - self._buffer_started[key] >= self.max_buffer_seconds):
+                self._flush_partition(key)
+
+    def _flush_partition(self, key: Tuple[str, str]):
+        frames = self._buffers.pop(key, None)
+        self._buffer_rows.pop(key, None)
+        self._buffer_started.pop(key, None)
+        if frames:
+            self._write_segment(key[0], key[1], pd.concat(frames, ignore_index=True))
+
+    def _write_segment(self, sport: str, date: str, frame: pd.DataFrame):
+        codes, dictionaries = {}, {}
+        for column in STRING_COLUMNS:
+            values = frame[column].where(frame[column].notna(), None).to_numpy(dtype=object)
+            column_codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            codes[column] = column_codes.astype(np.int32)
+            dictionaries[column] = [str(value) for value in uniques]
+
+        # Sort by outcome, then capture time, so each event is one row range
+        order = np.lexsort([frame['captured_at'].to_numpy()] + [codes[c] for c in reversed(OUTCOME_COLUMNS)])
+        codes = {column: values[order] for column, values in codes.items()}
+        outcome_keys = np.column_stack([codes[column] for column in OUTCOME_COLUMNS])
+        starts = np.flatnonzero(np.r_[True, np.any(outcome_keys[1:] != outcome_keys[:-1], axis=1)])
+
+        event_codes = codes['event_id']
+        event_starts = np.flatnonzero(np.r_[True, event_codes[1:] != event_codes[:-1]])
+        event_stops = np.append(event_starts[1:], len(event_codes))
+        first_rows = frame.iloc[order[event_starts]]
+        events = {
+            dictionaries['event_id'][event_codes[start]]: {
+                'rows': [int(start), int(stop)], 'home_team': home, 'away_team': away, 'commence_time': int(commence)
+            }
+            for start, stop, home, away, commence in zip(event_starts, event_stops, first_rows['home_team'],
+                                                         first_rows['away_team'], first_rows['commence_time'])
+        }
+
+        captured = frame['captured_at'].to_numpy(dtype=np.int64)
+        arrays = {
+            'captured_at': captured[order],
+            **codes,
+            'point': frame['point'].to_numpy(dtype=np.float32)[order],
+            'price': _encode_prices(frame['price'].to_numpy(dtype=np.int64)[order], starts),
+            'last_update': frame['last_update'].to_numpy(dtype=np.int64)[order],
+            'groups': starts.astype(np.int64),
+        }
+        meta = {'rows': len(frame), 'dictionaries': dictionaries, 'events': events,
+                'captured_min': int(captured.min()), 'captured_max': int(captured.max())}
+
+        # Write to a temporary directory and rename, so readers never see half a segment
+        partition = os.path.join(self.root, sport, date)
+        os.makedirs(partition, exist_ok=True)
+        name = f"seg-{int(captured.min()):020d}-{uuid.uuid4().hex[:8]}"
+        tmp_path = os.path.join(partition, f".{name}.tmp")
+        os.makedirs(tmp_path)
+        for column, values in arrays.items():
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values)
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        os.rename(tmp_path, os.path.join(partition, name))
+        self._index_events(sport, date, events)
+        self._indexed_segments.add(os.path.join(partition, name))
+
+    def _segments(self, sport: str, date: str) -> List[str]:
+        partition = os.path.join(self.root, sport, date)
+        if not os.path.isdir(partition):
+            return []
+        paths = [os.path.join(partition, name) for name in sorted(os.listdir(partition)) if name.startswith('seg-')]
+        return [path for path in paths if path not in self._retired]
+
+    def _meta(self, path: str) -> Dict:
+        meta = self._meta_cache.get(path)
+        if meta is None:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = self._meta_cache[path] = json.load(f)
+        return meta
+
+    def _read_segment(self, path: str, columns: Sequence[str], event_id: Optional[str] = None) -> Optional[pd.DataFrame]:
+        meta = self._meta(path)
+        if event_id is None:
+            start, stop = 0, meta['rows']
+        elif event_id in meta['events']:
+            start, stop = meta['events'][event_id]['rows']
+        else:
+            return None
+
+        def load(column: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r')[start:stop]
+
+        data = {}
+        for column in columns:
+            if column in STRING_COLUMNS:
+                dictionary = np.array(meta['dictionaries'][column] + [None], dtype=object)
+                data[column] = pd.Categorical(dictionary[load(column)])  # Code -1 picks the trailing None
+            elif column == 'price':
+                groups = np.load(os.path.join(path, 'groups.npy'), mmap_mode='r')
+                groups = groups[(groups >= start) & (groups < stop)] - start
+                data[column] = _decode_prices(np.asarray(load(column)), groups)
+            elif column in ('captured_at', 'last_update'):
+                data[column] = pd.to_datetime(np.asarray(load(column)).view('datetime64[ns]'), utc=True)
+            elif column in ('home_team', 'away_team', 'commence_time'):
+                # Per-event values live in the metadata
+                codes = np.asarray(np.load(os.path.join(path, 'event_id.npy'), mmap_mode='r')[start:stop])
+                names = meta['dictionaries']['event_id']
+                values = np.array([meta['events'][names[code]][column] for code in np.unique(codes)], dtype=object)
+                lookup = np.empty(len(names), dtype=object)
+                lookup[np.unique(codes)] = values
+                data[column] = lookup[codes]
+                if column == 'commence_time':
+                    data[column] = pd.to_datetime(data[column].astype(np.int64), utc=True)
+            else:
+                data[column] = np.asarray(load(column))
+        return pd.DataFrame(data, columns=list(columns))
@@ -0,0 +1,102 @@
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional
+import heapq
+import sys
+
+class BetOpportunity:
+    """One recommended bet, kept compact
+
+    Only the numbers and short interned keys are stored; the display strings
+    (matchup, pick, bet type, analysis) are rendered when they are read. It
+    also reads like the dict the analyzer used to return (bet['pick'],
+    dict(bet)), so templates and DataFrames keep working.
+    """
+    __slots__ = ('sport', 'time', 'market', 'selection', 'away', 'home', 'game', 'player',
+                 'line', 'odds', 'probability', 'expected_value', 'event_id')
+
+    FIELDS = ('sport', 'time', 'matchup', 'bet_type', 'pick', 'line', 'odds', 'expected_value', 'analysis')
+
+    def __init__(self, sport: str, time: str, market: str, selection: str, odds: int,
+                 probability: float, expected_value: float, line: Optional[float] = None,
+                 away: Optional[str] = None, home: Optional[str] = None,
+                 game: Optional[str] = None, player: Optional[str] = None,
+                 event_id: Optional[str] = None):
+        self.sport = _intern(sport)
+        self.time = _intern(time)
+        self.market = _intern(market)  # Moneyline/Spread/Total, or the prop type
+        self.selection = _intern(selection)  # Away/Home, Favorite/Underdog, Over/Under
+        self.away = _intern(away)
+        self.home = _intern(home)
+        self.game = _intern(game)  # Pre-built matchup label, used for props
+        self.player = _intern(player)
+        self.line = line
+        self.odds = odds
+        self.probability = probability
+        self.expected_value = expected_value
+        self.event_id = event_id
+
+    @property
+    def matchup(self) -> str:
+        if self.game is not None:
+            return self.game
+        return f"{self.away} @ {self.home}"
+
+    @property
+    def bet_type(self) -> str:
+        if self.player is not None:
+            return f"Player Prop - {self.market}"
+        return self.market
+
+    @property
+    def pick(self) -> str:
+        if self.player is not None:
+            return f"{self.player} {self.selection} {self.line}"
+        if self.market == 'Moneyline':
+            return f"{self.selection} {self.odds}"
+        return f"{self.selection} {self.line}"
+
+    @property
+    def analysis(self) -> str:
+        if self.player is not None:
+            return (f"Strong value on {self.player} {self.selection} {self.line} {self.market} "
+                    f"({self.odds}) - {self.probability:.1%} probability")
+        if self.market == 'Moneyline':
+            return f"Strong value on {self.selection} ML ({self.odds}) - {self.probability:.1%} win probability"
+        if self.market == 'Spread':
+            return (f"Strong spread value on {self.selection} {self.line} ({self.odds}) - "
+                    f"{self.probability:.1%} cover probability")
+        return f"Strong value on {self.selection} {self.line} ({self.odds}) - {self.probability:.1%} probability"
+
+    def keys(self):
+        return self.FIELDS
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self.FIELDS else default
+
+    def to_dict(self) -> Dict:
+        """Fully rendered dict, as the analyzer used to return"""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"BetOpportunity({self.sport} {self.bet_type}: {self.pick}, ev={self.expected_value:.3f})"
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # Teams, books and prop types repeat across thousands of bets
+    return None if value is None else sys.intern(str(value))
+
+_by_expected_value = attrgetter('expected_value')
+
+def top_k(opportunities: Iterable[BetOpportunity], k: int, sport: Optional[str] = None) -> List[BetOpportunity]:
+    """The k opportunities with the highest expected value, best first"""
+    if sport is not None:
+        opportunities = (bet for bet in opportunities if bet.sport == sport)
+    return heapq.nlargest(k, opportunities, key=_by_expected_value)
+
+def sort_by_expected_value(opportunities: List[BetOpportunity]):
+    """Sort in place, best first"""
+    opportunities.sort(key=_by_expected_value, reverse=True)
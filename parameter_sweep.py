@@ -0,0 +1,190 @@
+"""Parallel parameter sweep over the backtester
+
+    grid = parameter_grid(ev_thresholds={'Moneyline': [0.05, 0.1], 'Spread': [0.08, 0.12]},
+                          prop_adjustments={'Points': [(1.05, 0.95), (1.0, 1.0)]},
+                          staking=['flat', 'half_kelly'])
+    results = ParameterSweep(backtester, checkpoint='sweep.jsonl').run(grid)
+
+The backtester's prepared arrays are copied once into shared memory; each
+worker process attaches to them when it starts and rebuilds a Backtester
+over the shared buffers (Backtester.from_arrays), so a task only carries
+its parameters. Every finished combination is appended to the checkpoint
+(JSON lines) as it completes, and a rerun with the same checkpoint skips
+the combinations already in it, so an interrupted sweep resumes where it
+stopped.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import itertools
+import json
+import os
+import numpy as np
+import pandas as pd
+from backtester import Backtester, offline_analyzer
+from profiling import timed
+
+# Worker state, set once per process by _init_worker
+_WORKER = {}
+
+def parameter_grid(ev_thresholds: Optional[Dict[str, Sequence[float]]] = None,
+                   prop_adjustments: Optional[Dict[str, Sequence[Tuple[float, float]]]] = None,
+                   staking: Sequence[str] = ('flat',)) -> List[Dict]:
+    """Every combination of the given values, as run() keyword arguments
+
+    Each axis is a threshold key or prop type with the values to try;
+    anything not listed keeps the analyzer's setting.
+    """
+    ev_thresholds = ev_thresholds or {}
+    prop_adjustments = prop_adjustments or {}
+    threshold_keys, prop_keys = list(ev_thresholds), list(prop_adjustments)
+    axes = [ev_thresholds[key] for key in threshold_keys] + [prop_adjustments[key] for key in prop_keys] + [staking]
+
+    grid = []
+    for values in itertools.product(*axes):
+        thresholds = values[:len(threshold_keys)]
+        adjustments = values[len(threshold_keys):-1]
+        grid.append({
+            'ev_thresholds': dict(zip(threshold_keys, thresholds)),
+            'prop_adjustments': {key: tuple(value) for key, value in zip(prop_keys, adjustments)},
+            'staking': values[-1]
+        })
+    return grid
+
+def _key(params: Dict) -> str:
+    """Stable identity of a combination for the checkpoint"""
+    return json.dumps(params, sort_keys=True, default=list)
+
+def _evaluate(backtester: Backtester, params: Dict) -> Dict:
+    result = backtester.run(ev_thresholds=params['ev_thresholds'],
+                            prop_adjustments=params['prop_adjustments'] or None,
+                            staking=params['staking'])
+    by_bet_type = {bet_type: {column: float(value) for column, value in row.items()}
+                   for bet_type, row in result.by_bet_type.iterrows()}
+    return {'params': params, 'summary': result.summary, 'by_bet_type': by_bet_type}
+
+def _share(arrays: Dict[str, np.ndarray]) -> Tuple[List[shared_memory.SharedMemory], Dict]:
+    """Copy arrays into shared memory blocks; returns the blocks and how to attach to them"""
+    blocks, spec = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        spec[name] = (block.name, array.dtype.str, array.shape)
+    return blocks, spec
+
+def _init_worker(spec: Dict, labels: Dict, analyzer_class: type, ev_thresholds: Dict, prop_adjustments: Dict,
+                 stake: float):
+    """Attach to the shared arrays and build this process's Backtester over them"""
+    arrays = {}
+    blocks = []
+    for name, (block_name, dtype, shape) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[name] = array
+        blocks.append(block)
+
+    analyzer = offline_analyzer(analyzer_class)
+    analyzer.EV_THRESHOLDS = ev_thresholds
+    analyzer.PROP_ADJUSTMENTS = prop_adjustments
+    _WORKER['blocks'] = blocks  # Keep the mappings open for the life of the process
+    _WORKER['backtester'] = Backtester.from_arrays(arrays, labels, analyzer, stake)
+
+def _run_task(params: Dict) -> Dict:
+    return _evaluate(_WORKER['backtester'], params)
+
+class ParameterSweep:
+    """Runs backtests for many parameter combinations across a process pool"""
+
+    def __init__(self, backtester: Backtester, checkpoint: Optional[str] = None, workers: Optional[int] = None):
+        """``workers`` defaults to the CPU count; 0 or 1 runs the sweep in this process"""
+        self.backtester = backtester
+        self.checkpoint = checkpoint
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+
+    def completed(self) -> Dict[str, Dict]:
+        """Results already in the checkpoint, by combination"""
+        done = {}
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return done
+        with open(self.checkpoint) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut off by the interruption; that combination runs again
+                done[_key(record['params'])] = record
+        return done
+
+    def _trim_checkpoint(self):
+        """Drop a half-written last line so new records start on a line of their own"""
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return
+        with open(self.checkpoint, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                f.truncate(end)
+
+    def _save(self, record: Dict):
+        if self.checkpoint:
+            with open(self.checkpoint, 'a') as f:
+                f.write(json.dumps(record, default=list) + '\n')
+                f.flush()
+
+    @timed('parameter_sweep')
+    def run(self, grid: Iterable[Dict]) -> pd.DataFrame:
+        """One row per combination with its parameters and backtest summary, in grid order"""
+        grid = [json.loads(_key(params)) for params in grid]  # Same shape as checkpointed parameters
+        done = self.completed()
+        self._trim_checkpoint()
+        pending = [params for params in grid if _key(params) not in done]
+
+        if pending and self.workers <= 1:
+            for params in pending:
+                record = _evaluate(self.backtester, params)
+                self._save(record)
+                done[_key(params)] = record
+        elif pending:
+            done.update(self._run_pool(pending))
+
+        return self._table([done[_key(params)] for params in grid])
+
+    def _run_pool(self, pending: List[Dict]) -> Dict[str, Dict]:
+        analyzer = self.backtester.analyzer
+        blocks, spec = _share(self.backtester.arrays)
+        finished = {}
+        try:
+            initargs = (spec, self.backtester.labels, type(analyzer), dict(analyzer.EV_THRESHOLDS),
+                        dict(analyzer.PROP_ADJUSTMENTS), self.backtester.stake)
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(pending)), initializer=_init_worker,
+                                     initargs=initargs) as pool:
+                futures = [pool.submit(_run_task, params) for params in pending]
+                try:
+                    for future in as_completed(futures):
+                        record = future.result()
+                        self._save(record)
+                        finished[_key(record['params'])] = record
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return finished
+
+    @staticmethod
+    def _table(records: List[Dict]) -> pd.DataFrame:
+        rows = []
+        for record in records:
+            params = record['params']
+            row = {f"ev_{key}": value for key, value in params['ev_thresholds'].items()}
+            row.update({f"prop_{key}": tuple(value) for key, value in params['prop_adjustments'].items()})
+            row['staking'] = params['staking']
+            row.update(record['summary'])
+            rows.append(row)
+        return pd.DataFrame(rows)
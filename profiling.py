@@ -0,0 +1,323 @@
+"""Lightweight spans for timing the fetch -> parse -> analyze -> render pipeline
+
+    with span('parse_props', sport=sport) as attrs:
+        ...
+        attrs['rows'] = len(df)
+
+Every span adds its duration to a per-name summary (count, total, min, max,
+plus sums of any numeric attributes such as bytes or rows). When a log file is
+configured (PIPELINE_PROFILE_LOG) each span is also written as one JSON line.
+capture_next() arms a one-off cProfile or stack-sampling capture of the next
+span with a given name, e.g. one snapshot refresh. register_routes exposes
+both over HTTP for debugging, behind PIPELINE_PROFILE_ROUTES and a token.
+"""
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+logger = logging.getLogger('betting.profiling')
+
+class StackSampler:
+    """Samples every thread's stack at a fixed interval into collapsed stacks"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def report(self, limit: int = 40) -> str:
+        total = sum(self.samples.values()) or 1
+        lines = [f"{count:6d} {count / total:6.1%}  {stack}" for stack, count in self.samples.most_common(limit)]
+        return '\n'.join(lines)
+
+class Profiler:
+    """Collects span timings for the whole process"""
+
+    def __init__(self, enabled: bool = True, max_captures: int = 5):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self.captures = deque(maxlen=max_captures)
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._armed: Optional[Dict] = None
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time a block; the yielded dict takes attributes known only at the end"""
+        if not self.enabled:
+            yield attrs
+            return
+
+        stack = self._stack()
+        path = f"{stack[-1]}/{name}" if stack else name
+        capture = self._start_capture(name) if self._armed is not None else None
+        stack.append(path)
+        error = None
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            if capture is not None:
+                self._finish_capture(capture, duration)
+            self._record(name, path, duration, attrs, error)
+
+    def record(self, name: str, duration: float, **attrs):
+        """Add a duration measured elsewhere (e.g. across request hooks)"""
+        if self.enabled:
+            self._record(name, name, duration, attrs, None)
+
+    def summary(self) -> Dict:
+        """Aggregated timings per span name, slowest total first"""
+        with self._lock:
+            stats = {name: dict(entry, totals=dict(entry['totals'])) for name, entry in self._stats.items()}
+        spans = {}
+        for name, entry in sorted(stats.items(), key=lambda item: item[1]['total'], reverse=True):
+            spans[name] = {
+                'count': entry['count'],
+                'errors': entry['errors'],
+                'total_ms': entry['total'] * 1000,
+                'mean_ms': entry['total'] / entry['count'] * 1000,
+                'min_ms': entry['min'] * 1000,
+                'max_ms': entry['max'] * 1000,
+                'last_ms': entry['last'] * 1000,
+                'totals': entry['totals']
+            }
+        return {
+            'since': self.started_at,
+            'spans': spans,
+            'armed_capture': dict(self._armed) if self._armed else None,
+            'captures': list(self.captures)
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+    def capture_next(self, span_name: str = 'refresh', mode: str = 'cprofile', interval: float = 0.005):
+        """Profile the next span called ``span_name``
+
+        cprofile sees only the thread that runs the span; sampling sees every
+        thread (e.g. the per-sport workers of a refresh) at ``interval``.
+        """
+        if mode not in ('cprofile', 'sampling'):
+            raise ValueError(f"Unknown capture mode: {mode}")
+        with self._lock:
+            self._armed = {'span': span_name, 'mode': mode, 'interval': interval}
+
+    def cancel_capture(self):
+        with self._lock:
+            self._armed = None
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name: str, path: str, duration: float, attrs: Dict, error: Optional[str]):
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = {'count': 0, 'errors': 0, 'total': 0.0, 'min': duration,
+                                             'max': duration, 'last': duration, 'totals': {}}
+            entry['count'] += 1
+            entry['total'] += duration
+            entry['min'] = min(entry['min'], duration)
+            entry['max'] = max(entry['max'], duration)
+            entry['last'] = duration
+            if error:
+                entry['errors'] += 1
+            for key, value in attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entry['totals'][key] = entry['totals'].get(key, 0) + value
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'ts': time.time(), 'span': name, 'path': path, 'duration_ms': duration * 1000,
+                'thread': threading.current_thread().name, 'error': error, **attrs
+            }, default=str))
+
+    def _start_capture(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            if self._armed is None or self._armed['span'] != name:
+                return None
+            capture, self._armed = self._armed, None
+
+        if capture['mode'] == 'cprofile':
+            capture['profile'] = cProfile.Profile()
+            capture['profile'].enable()
+        else:
+            capture['sampler'] = StackSampler(capture['interval'])
+            capture['sampler'].start()
+        capture['started_at'] = time.time()
+        return capture
+
+    def _finish_capture(self, capture: Dict, duration: float):
+        if capture['mode'] == 'cprofile':
+            profile = capture.pop('profile')
+            profile.disable()
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(40)
+            report = out.getvalue()
+        else:
+            sampler = capture.pop('sampler')
+            sampler.stop()
+            report = sampler.report()
+
+        capture.update({'duration_ms': duration * 1000, 'report': report})
+        self.captures.append(capture)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'ts': time.time(), 'capture': capture['span'], 'mode': capture['mode'],
+                                    'duration_ms': capture['duration_ms'], 'report': report}))
+
+def configure_log(path: str):
+    """Write every span to ``path`` as JSON lines"""
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def get_profiler() -> Profiler:
+    """Process-wide profiler; PIPELINE_PROFILE=0 disables spans, PIPELINE_PROFILE_LOG sets a log file"""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = Profiler(enabled=os.getenv('PIPELINE_PROFILE', '1') != '0')
+                if os.getenv('PIPELINE_PROFILE_LOG'):
+                    configure_log(os.getenv('PIPELINE_PROFILE_LOG'))
+    return _profiler
+
+def span(name: str, **attrs):
+    """Time a block with the process-wide profiler"""
+    return get_profiler().span(name, **attrs)
+
+def timed(name: str):
+    """Decorator form of span(); sized results are recorded as ``items``"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_profiler().span(name) as attrs:
+                result = fn(*args, **kwargs)
+                if hasattr(result, '__len__'):
+                    attrs['items'] = len(result)
+                return result
+        return wrapper
+    return decorator
+
+def register_routes(server, prefix: str = '/debug/profile', token: Optional[str] = None,
+                    enabled: Optional[bool] = None) -> bool:
+    """Time every request and, when enabled, add the profiling endpoints to a Flask app (Dash: ``app.server``)
+
+    Requests are recorded as ``request:<route>`` (the route template, so Dash
+    callback round trips show up as ``request:/_dash-update-component``).
+
+    The summary, capture and reset endpoints are debug tools and are only
+    added when ``enabled`` (default: PIPELINE_PROFILE_ROUTES=1) and a
+    ``token`` (default: PIPELINE_PROFILE_TOKEN) is set; callers must send it
+    as ``Authorization: Bearer <token>`` or ``X-Profile-Token``. Returns
+    whether the endpoints were added.
+    """
+    from flask import abort, g, jsonify, request
+
+    # Whole-request timing, including Dash's serialization of callback output
+    def start_timer():
+        g.profile_start = time.perf_counter()
+
+    def stop_timer(response):
+        start = g.pop('profile_start', None)
+        if start is not None and not request.path.startswith(prefix):
+            # Route templates, not raw paths, keep the number of span names bounded
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            get_profiler().record(f"request:{route}", time.perf_counter() - start,
+                                  bytes=response.calculate_content_length() or 0)
+        return response
+
+    server.before_request(start_timer)
+    server.after_request(stop_timer)
+
+    if enabled is None:
+        enabled = os.getenv('PIPELINE_PROFILE_ROUTES') == '1'
+    token = token or os.getenv('PIPELINE_PROFILE_TOKEN')
+    if not enabled:
+        return False
+    if not token:
+        print("Profiling endpoints not registered: set PIPELINE_PROFILE_TOKEN to enable them")
+        return False
+
+    def authorized(view):
+        @wraps(view)
+        def wrapper():
+            auth = request.headers.get('Authorization', '')
+            sent = auth[len('Bearer '):] if auth.startswith('Bearer ') else request.headers.get('X-Profile-Token', '')
+            if not hmac.compare_digest(sent.encode(), token.encode()):
+                abort(403)
+            return view()
+        return wrapper
+
+    @authorized
+    def profile_summary():
+        return jsonify(get_profiler().summary())
+
+    @authorized
+    def profile_capture():
+        try:
+            get_profiler().capture_next(request.args.get('span', 'refresh'),
+                                        request.args.get('mode', 'cprofile'),
+                                        float(request.args.get('interval', 0.005)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'armed': get_profiler().summary()['armed_capture']})
+
+    @authorized
+    def profile_reset():
+        get_profiler().reset()
+        return jsonify({'reset': True})
+
+    server.add_url_rule(prefix, 'profile_summary', profile_summary)
+    server.add_url_rule(f"{prefix}/capture", 'profile_capture', profile_capture, methods=['POST'])
+    server.add_url_rule(f"{prefix}/reset", 'profile_reset', profile_reset, methods=['POST'])
+    return True
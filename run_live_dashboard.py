@@ -1,8 +1,14 @@
 from betting_analyzer import BettingAnalyzer
+from snapshot_service import SnapshotService
+from profiling import register_routes, timed
+from metrics import add_metrics_endpoint, watch_snapshot_service
 from advanced_visualization import LiveDashboardManager, VisualizationConfig
 from dash import Input, Output
 import pandas as pd
 
+# Rows in the best bets table; only these get their display text rendered
+MAX_DISPLAYED_BETS = 100
+
 def main():
     # Initialize analyzer and dashboard
     analyzer = BettingAnalyzer()
@@ -12,6 +18,10 @@ def main():
         refresh_interval=300  # 5 minutes
     )
     dashboard = LiveDashboardManager(config)
+    snapshot_service = SnapshotService(analyzer, interval=config.refresh_interval).start()
+    register_routes(dashboard.app.server)
+    add_metrics_endpoint(dashboard.app.server)
+    watch_snapshot_service(snapshot_service)
     
     # Set up data callback
     @dashboard.app.callback(
@@ -19,9 +29,12 @@ def main():
          Output('best-bets-table', 'data')],
         Input('interval-component', 'n_intervals')
     )
+    @timed('render')
     def update_data(_):
-        # Get latest bets
-        best_bets = analyzer.get_todays_best_bets()
+        # Get latest bets from the background snapshot
+        best_bets = snapshot_service.get().all_bets(limit=MAX_DISPLAYED_BETS)
+        if not best_bets:
+            return [], []
         
         # Convert to DataFrame for display
         bets_df = pd.DataFrame(best_bets)
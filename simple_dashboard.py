@@ -1,11 +1,21 @@
 from dash import Dash, html, dcc, dash_table, Input, Output
 import pandas as pd
 from betting_analyzer import BettingAnalyzer
+from snapshot_service import SnapshotService
+from profiling import register_routes, timed
+from metrics import add_metrics_endpoint, watch_snapshot_service
 import plotly.graph_objs as go
 
+# Rows per sport table; only these get their display text rendered
+MAX_BETS_PER_SPORT = 50
+
 def create_app():
     app = Dash(__name__)
     analyzer = BettingAnalyzer()
+    snapshot_service = SnapshotService(analyzer).start()
+    register_routes(app.server)
+    add_metrics_endpoint(app.server)
+    watch_snapshot_service(snapshot_service)
     
     app.layout = html.Div(style={'backgroundColor': '#1a1a1a', 'minHeight': '100vh', 'color': 'white', 'padding': '20px'}, children=[
         html.H1('Live Betting Analysis Dashboard', style={'textAlign': 'center', 'color': '#00ff00'}),
@@ -77,7 +87,7 @@ def create_app():
             # Auto-refresh
             dcc.Interval(
                 id='interval-component',
-                interval=5*60*1000,  # 5 minutes in milliseconds
+                interval=60*1000,  # 1 minute; reads the latest snapshot, does not refetch
                 n_intervals=0
             )
         ])
@@ -89,17 +99,21 @@ def create_app():
          Output('debug-info', 'children')],
         Input('interval-component', 'n_intervals')
     )
+    @timed('render')
     def update_tables(_):
         debug_info = []
         try:
-            # Get latest betting opportunities
-            debug_info.append("Fetching best bets...")
-            best_bets = analyzer.get_todays_best_bets()
-            debug_info.append(f"Got {len(best_bets)} total bets")
+            # Get latest betting opportunities from the background snapshot
+            snapshot = snapshot_service.get()
+            age = f"{snapshot.age:.0f}s old" if snapshot.age is not None else "not ready yet"
+            debug_info.append(f"Snapshot v{snapshot.version} ({age}{', stale' if snapshot.is_stale else ''})")
+            if snapshot.error:
+                debug_info.append(f"Last refresh failed: {snapshot.error}")
+            debug_info.append(f"Got {len(snapshot.bets)} total bets")
             
             # Separate NBA and NFL bets
-            nba_bets = [bet for bet in best_bets if bet['sport'] == 'NBA']
-            nfl_bets = [bet for bet in best_bets if bet['sport'] == 'NFL']
+            nba_bets = snapshot.bets_for('NBA', limit=MAX_BETS_PER_SPORT)
+            nfl_bets = snapshot.bets_for('NFL', limit=MAX_BETS_PER_SPORT)
             debug_info.append(f"NBA bets: {len(nba_bets)}")
             debug_info.append(f"NFL bets: {len(nfl_bets)}")
             
@@ -0,0 +1,148 @@
+from dataclasses import dataclass, replace
+from itertools import islice
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+import threading
+import time
+from opportunities import BetOpportunity
+from profiling import span
+import metrics
+
+REFRESH_LATENCY = metrics.histogram('best_bets_refresh_duration_seconds', 'Fetch+analyze refresh time',
+                                    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120))
+REFRESH_ERRORS = metrics.counter('best_bets_refresh_errors_total', 'Refreshes that failed')
+
+@dataclass(frozen=True)
+class BestBetsSnapshot:
+    """Immutable, versioned result of one best-bets refresh"""
+    version: int = 0
+    bets: Tuple[Mapping, ...] = ()
+    generated_at: Optional[float] = None  # Unix time the bets were computed
+    duration: float = 0.0  # Seconds the refresh took
+    error: Optional[str] = None  # Last refresh error, if the latest attempt failed
+    stale_after: float = 600.0
+    
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the bets were computed"""
+        if self.generated_at is None:
+            return None
+        return time.time() - self.generated_at
+    
+    @property
+    def is_stale(self) -> bool:
+        age = self.age
+        return age is None or age > self.stale_after
+    
+    def bets_for(self, sport: str, limit: Optional[int] = None) -> List[Dict]:
+        """Mutable copies of one sport's best bets, ready for a table
+        
+        Bets are stored best first, so ``limit`` keeps the top ones and only
+        those get their display text rendered.
+        """
+        bets = (bet for bet in self.bets if bet['sport'] == sport)
+        return [dict(bet) for bet in islice(bets, limit)]
+    
+    def all_bets(self, limit: Optional[int] = None) -> List[Dict]:
+        """Mutable copies of every bet (or the top ``limit``)"""
+        return [dict(bet) for bet in self.bets[:limit]]
+    
+    def metadata(self) -> Dict:
+        """Staleness information for display"""
+        return {
+            'version': self.version,
+            'generated_at': self.generated_at,
+            'age_seconds': self.age,
+            'stale': self.is_stale,
+            'refresh_seconds': self.duration,
+            'bet_count': len(self.bets),
+            'error': self.error
+        }
+
+def _read_only(bet):
+    # BetOpportunity has no item assignment; plain dicts get a read-only view
+    if isinstance(bet, BetOpportunity):
+        return bet
+    return MappingProxyType(dict(bet))
+
+class SnapshotService:
+    """Refreshes best bets in the background and serves the latest snapshot
+    
+    Page views and dashboard callbacks call get(), which just returns the
+    current snapshot reference, so the number of viewers has no effect on how
+    often the fetch+analyze pipeline runs.
+    """
+    
+    def __init__(self, analyzer, interval: float = 300, stale_after: Optional[float] = None, ledger=None):
+        self.analyzer = analyzer
+        self.ledger = ledger  # Optional BetLedger that keeps every recommendation
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else 2 * interval
+        self._snapshot = BestBetsSnapshot(stale_after=self.stale_after)
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._first_refresh = threading.Event()
+    
+    def start(self) -> 'SnapshotService':
+        """Start the background refresh loop"""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name='best-bets-refresh', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop the background refresh loop"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+    
+    def get(self) -> BestBetsSnapshot:
+        """Latest published snapshot"""
+        return self._snapshot
+    
+    def wait_for_first(self, timeout: Optional[float] = None) -> BestBetsSnapshot:
+        """Block until the first refresh has finished (or timeout) and return the snapshot"""
+        self._first_refresh.wait(timeout)
+        return self._snapshot
+    
+    def refresh(self) -> BestBetsSnapshot:
+        """Run the pipeline now and publish the result"""
+        with self._refresh_lock:
+            start = time.time()
+            try:
+                with span('refresh', version=self._snapshot.version + 1) as attrs:
+                    bets = self.analyzer.get_todays_best_bets()
+                    attrs['bets'] = len(bets)
+                snapshot = BestBetsSnapshot(
+                    version=self._snapshot.version + 1,
+                    bets=tuple(_read_only(bet) for bet in bets),
+                    generated_at=start,
+                    duration=time.time() - start,
+                    stale_after=self.stale_after
+                )
+                REFRESH_LATENCY.observe(snapshot.duration)
+                if self.ledger is not None:
+                    self._record(bets)
+            except Exception as e:
+                print(f"Error refreshing best bets: {e}")
+                REFRESH_ERRORS.inc()
+                # Keep serving the last good bets; the growing age shows they are stale
+                snapshot = replace(self._snapshot, error=str(e))
+            
+            self._snapshot = snapshot  # Single reference swap publishes the new version
+            self._first_refresh.set()
+            return snapshot
+    
+    def _record(self, bets):
+        try:
+            self.ledger.record_many(bet for bet in bets if isinstance(bet, BetOpportunity))
+        except Exception as e:
+            print(f"Error recording recommendations: {e}")
+    
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._stop_event.wait(self.interval)
@@ -2,6 +2,7 @@ from typing import Dict, List, Optional
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
+from odds import american_to_implied
 
 @dataclass
 class BettingOpportunity:
@@ -27,10 +28,7 @@ class BaseStrategy:
 
     def calculate_implied_prob(self, odds: float) -> float:
         """Convert American odds to implied probability"""
-        if odds > 0:
-            return 100 / (odds + 100)
-        else:
-            return abs(odds) / (abs(odds) + 100)
+        return float(american_to_implied(odds))
 
     def calculate_risk_level(self, confidence: float, variance: float) -> float:
         """Calculate risk level based on confidence and historical variance"""
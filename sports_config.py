@@ -54,3 +54,16 @@ STAT_WEIGHTS = {
         'weather_conditions': 0.1
     }
 }
+
+# Sports covered by the best-bets pipeline, keyed by display name. Adding a
+# sport only needs an entry here: its Odds API sport key and prop markets.
+ODDS_API_SPORTS = {
+    'NBA': {
+        'key': 'basketball_nba',
+        'prop_markets': ['player_points', 'player_rebounds', 'player_assists']
+    },
+    'NFL': {
+        'key': 'americanfootball_nfl',
+        'prop_markets': ['player_pass_tds', 'player_receptions']  # Only use supported markets
+    }
+}
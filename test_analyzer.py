@@ -1,7 +1,9 @@
 from betting_analyzer import BettingAnalyzer
+from benchmarks.bench_game_ev import analyze_games_reference, make_game_slate
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import time
 
 def test_live_game_analysis():
     # Sample game data
@@ -75,6 +77,62 @@ def test_player_props():
         print(f"Confidence: {pred['confidence']:.1%}")
         print("Key Factors:", pred['key_factors'])
 
+def test_vectorized_games_match_row_by_row():
+    games = make_game_slate(500, seed=7)
+    analyzer = BettingAnalyzer(fetcher=object())
+    
+    bets = analyzer._analyze_games(games, 'NBA')
+    assert [bet.to_dict() for bet in bets] == analyze_games_reference(games, 'NBA', new_ev=True)
+    assert analyzer._analyze_games(games.iloc[:0], 'NBA') == []
+
+def test_vectorized_props_score_both_sides():
+    props = pd.DataFrame([
+        {'Time': '7:00 PM EST', 'Game': 'Celtics @ Lakers', 'Player': 'LeBron James', 'Type': 'Points',
+         'Line': 25.5, 'Over': 250.0, 'Under': -300.0, 'Bookmaker': 'DraftKings'},
+        {'Time': '7:00 PM EST', 'Game': 'Celtics @ Lakers', 'Player': 'Anthony Davis', 'Type': 'Rebounds',
+         'Line': 11.5, 'Over': np.nan, 'Under': 300.0, 'Bookmaker': 'DraftKings'},
+        {'Time': '7:00 PM EST', 'Game': 'Celtics @ Lakers', 'Player': 'Jayson Tatum', 'Type': 'Blocks',
+         'Line': 0.5, 'Over': -110.0, 'Under': -110.0, 'Bookmaker': 'DraftKings'},
+    ])
+    analyzer = BettingAnalyzer(fetcher=object())
+    
+    bets = analyzer._analyze_props(props, 'NBA')
+    
+    assert [bet['pick'] for bet in bets] == ['LeBron James Over 25.5', 'Anthony Davis Under 11.5']
+    assert np.isclose(bets[0]['expected_value'], 2.5 * 0.35 - 0.65)
+    assert np.isclose(bets[1]['expected_value'], 3.0 * 0.35 - 0.65)
+    assert bets[1]['bet_type'] == 'Player Prop - Rebounds'
+    assert bets[1]['odds'] == 300
+
+class SlowFetcher:
+    """Stand-in fetcher that takes a fixed time per call"""
+    
+    def __init__(self, delay):
+        self.delay = delay
+        self.games = make_game_slate(5, seed=1)
+    
+    def get_upcoming_games(self, sport):
+        time.sleep(self.delay)
+        return self.games
+    
+    def get_player_props(self, sport, markets=None):
+        time.sleep(self.delay)
+        if sport == 'americanfootball_nfl':
+            raise RuntimeError("props unavailable")
+        return pd.DataFrame()
+
+def test_best_bets_runs_sports_in_parallel():
+    analyzer = BettingAnalyzer(fetcher=SlowFetcher(0.2))
+    
+    start = time.perf_counter()
+    bets = analyzer.get_todays_best_bets()
+    elapsed = time.perf_counter() - start
+    
+    assert elapsed < 0.6  # Four 0.2s tasks, not run back to back
+    assert {bet['sport'] for bet in bets} == {'NBA', 'NFL'}
+    evs = [bet['expected_value'] for bet in bets]
+    assert evs == sorted(evs, reverse=True)
+
 def main():
     print("Starting Betting Analyzer Tests...")
     
@@ -0,0 +1,132 @@
+from backtester import Backtester, OfflineFetcher, decision_table
+from benchmarks.synthetic import make_slate
+from data_fetchers.odds_api_fetcher import build_odds_table
+from odds import american_to_decimal
+from odds_history import OddsHistoryStore
+from test_odds_api import SAMPLE_EVENTS
+import copy
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+TAKE_EVERYTHING = {'Moneyline': -1, 'Spread': -1, 'Total': -1, 'Player Prop': -1}
+
+def _history():
+    """e1 priced the morning of the game and again half an hour before it, with one points prop"""
+    frames = []
+    for captured_at, celtics in [('2029-12-31T12:00:00Z', 130), ('2029-12-31T23:30:00Z', 150)]:
+        events = copy.deepcopy(SAMPLE_EVENTS)
+        draftkings = events[0]['bookmakers'][0]['markets']
+        draftkings[0]['outcomes'][0]['price'] = celtics
+        draftkings.append({'key': 'player_points', 'outcomes': [
+            {'name': 'Over', 'description': 'LeBron James', 'price': -110, 'point': 25.5},
+            {'name': 'Under', 'description': 'LeBron James', 'price': -110, 'point': 25.5}
+        ]})
+        table = build_odds_table(events, 'basketball_nba')
+        frames.append(table.assign(captured_at=pd.Timestamp(captured_at)))
+    return pd.concat(frames, ignore_index=True)
+
+RESULTS = pd.DataFrame({'event_id': ['e1'], 'home_score': [110], 'away_score': [100]})
+PROP_RESULTS = pd.DataFrame({'event_id': ['e1'], 'player': ['LeBron James'], 'market': ['player_points'],
+                             'value': [30]})
+
+def test_decisions_use_prices_from_before_the_lead():
+    decisions = decision_table(_history(), lead=3600)
+    celtics = decisions[(decisions['market'] == 'h2h') & (decisions['outcome'] == 'Celtics')
+                        & (decisions['book'] == 'draftkings')]
+    assert celtics['price'].tolist() == [130]
+    assert len(decision_table(_history(), lead=60)) == len(decisions)
+
+def test_bets_are_graded_against_results_and_the_close():
+    backtest = Backtester(_history(), RESULTS, prop_results=PROP_RESULTS)
+    result = backtest.run(ev_thresholds=TAKE_EVERYTHING)
+    bets = result.bets.set_index(['bet_type', 'side'])
+    assert isinstance(backtest.analyzer.fetcher, OfflineFetcher)  # No cache, transport or live history
+
+    # Celtics (the underdog) lose, Lakers cover -3.5, the total goes under 220.5, LeBron goes over 25.5
+    assert bets.loc[('Moneyline', 'Away'), 'profit'] == -1
+    assert np.isclose(bets.loc[('Spread', 'Favorite'), 'profit'], american_to_decimal(-110) - 1)
+    assert bets.loc[('Total', 'Over'), 'profit'] == -1
+    assert bets.loc[('Player Prop - Points', 'Over'), 'result'] == 1
+    assert bets.loc[('Player Prop - Points', 'Under'), 'result'] == -1
+
+    # Celtics drifted from +130 to +150 at DraftKings, so the moneyline lost value against the close
+    assert bets.loc[('Moneyline', 'Away'), 'clv'] < 0
+
+    summary = result.summary
+    assert summary['bets'] == 5 and summary['wins'] == 2 and summary['losses'] == 3
+    assert summary['hit_rate'] == 0.4
+    assert np.isclose(summary['profit'], bets['profit'].sum())
+    assert np.isclose(summary['roi'], summary['profit'] / 5)
+    assert summary['max_drawdown'] >= 1
+    assert result.by_bet_type.loc['Spread', 'roi'] > 0
+
+def test_under_totals_are_paid_at_the_under_price():
+    history = _history()
+    totals = history['market'] == 'totals'
+    history.loc[totals & (history['outcome'] == 'Over'), 'price'] = 105
+    history.loc[totals & (history['outcome'] == 'Under'), 'price'] = -125
+    results = RESULTS.assign(home_score=105, away_score=100)  # 205 goes under 220.5
+
+    bets = Backtester(history, results).run(ev_thresholds=TAKE_EVERYTHING).bets
+    under = bets[bets['bet_type'] == 'Total'].iloc[0]
+    payout = american_to_decimal(-125) - 1
+    assert (under['side'], under['odds'], under['result']) == ('Under', -125, 1)
+    assert np.isclose(under['expected_value'], under['probability'] * (payout + 1) - 1)
+    assert np.isclose(under['profit'], payout)
+
+def test_thresholds_and_prop_adjustments_change_the_bets():
+    backtest = Backtester(_history(), RESULTS, prop_results=PROP_RESULTS)
+
+    # Only the Over clears a zero cutoff with the analyzer's 1.05 Points adjustment
+    props = backtest.run(ev_thresholds={**TAKE_EVERYTHING, 'Player Prop': 0.0}).bets
+    assert props[props['bet_type'] == 'Player Prop - Points']['side'].tolist() == ['Over']
+
+    flat = backtest.run(ev_thresholds={**TAKE_EVERYTHING, 'Player Prop': 0.0}, prop_adjustments={'Points': (1, 1)})
+    assert not (flat.bets['bet_type'] == 'Player Prop - Points').any()
+
+    assert backtest.run().summary['bets'] <= backtest.run(ev_thresholds=TAKE_EVERYTHING).summary['bets']
+
+def test_kelly_staking_sizes_bets_by_edge():
+    backtest = Backtester(_history(), RESULTS, prop_results=PROP_RESULTS)
+    bets = backtest.run(ev_thresholds=TAKE_EVERYTHING, staking='half_kelly').bets
+    payout = american_to_decimal(bets['odds'].to_numpy()) - 1
+    assert np.allclose(bets['stake'], 0.5 * np.maximum(bets['expected_value'] / payout, 0))
+    assert np.allclose(bets['profit'], np.where(bets['result'] > 0, bets['stake'] * payout,
+                                                np.where(bets['result'] < 0, -bets['stake'], 0)))
+
+def test_history_store_season_runs_in_seconds():
+    slate = make_slate(sports=['NBA'], games_per_sport=1230, books=6, players_per_game=0)
+    events = slate.odds['basketball_nba']
+    rng = np.random.default_rng(0)
+    results = pd.DataFrame({'event_id': [event['id'] for event in events],
+                            'home_score': rng.integers(90, 130, len(events)),
+                            'away_score': rng.integers(90, 130, len(events))})
+
+    with tempfile.TemporaryDirectory() as root:
+        store = OddsHistoryStore(root)
+        table = build_odds_table(events, 'basketball_nba')
+        for hours in range(24, 0, -1):
+            moved = table.assign(price=table['price'] + rng.integers(-5, 6, len(table)))
+            store.append(moved, table['commence_time'].min() - pd.Timedelta(hours=hours))
+        store.flush()
+
+        start = time.perf_counter()
+        backtest = Backtester.from_store(store, 'basketball_nba', results)
+        for threshold in (0.0, 0.05, 0.1):
+            result = backtest.run(ev_thresholds={'Moneyline': threshold, 'Spread': threshold, 'Total': threshold})
+        elapsed = time.perf_counter() - start
+
+    assert len(backtest.candidates) == 3 * 1230
+    assert result.summary['bets'] == len(result.bets)
+    assert elapsed < 10
+
+if __name__ == "__main__":
+    test_decisions_use_prices_from_before_the_lead()
+    test_bets_are_graded_against_results_and_the_close()
+    test_under_totals_are_paid_at_the_under_price()
+    test_thresholds_and_prop_adjustments_change_the_bets()
+    test_kelly_staking_sizes_bets_by_edge()
+    test_history_store_season_runs_in_seconds()
+    print("Backtester tests passed!")
@@ -0,0 +1,39 @@
+from benchmarks.synthetic import make_slate
+from benchmarks.bench_pipeline import run_pipeline, compare
+from data_fetchers.odds_api_fetcher import OddsApiFetcher
+
+def test_synthetic_slate_is_seeded_and_api_shaped():
+    slate = make_slate(sports=['NBA'], games_per_sport=3, books=2, players_per_game=2, seed=5)
+    
+    assert slate == make_slate(sports=['NBA'], games_per_sport=3, books=2, players_per_game=2, seed=5)
+    assert slate != make_slate(sports=['NBA'], games_per_sport=3, books=2, players_per_game=2, seed=6)
+    assert slate.outcome_count == 3 * 2 * (6 + 2 * 2 * 3)
+    
+    fetcher = OddsApiFetcher(api_key='test')
+    fetcher._get_json = slate.get_json
+    assert len(fetcher.get_upcoming_games('basketball_nba')) == 3
+    assert len(fetcher.get_player_props('basketball_nba')) == 3 * 2 * 2 * 3
+
+def test_pipeline_reports_every_stage():
+    slate = make_slate(games_per_sport=2, books=2, players_per_game=2)
+    
+    stages = run_pipeline(slate, repeat=1, model_states=2)
+    
+    for name in ['parse_games', 'odds_table', 'parse_props', 'analyze_games', 'analyze_props', 'serialize']:
+        assert stages[name]['seconds'] >= 0
+        assert stages[name]['peak_memory_mb'] > 0
+    assert stages['parse_games']['items'] == 4
+    assert 'model_inference' in stages
+
+def test_compare_flags_slow_stages():
+    baseline = {'stages': {'parse_games': {'seconds': 1.0}, 'serialize': {'seconds': 1.0}}}
+    current = {'stages': {'parse_games': {'seconds': 1.1}, 'serialize': {'seconds': 2.0},
+                          'model_inference': {'skipped': 'not installed'}}}
+    
+    assert compare(current, baseline, tolerance=1.25) == ['serialize']
+
+if __name__ == "__main__":
+    test_synthetic_slate_is_seeded_and_api_shaped()
+    test_pipeline_reports_every_stage()
+    test_compare_flags_slow_stages()
+    print("Benchmark harness tests passed!")
@@ -0,0 +1,95 @@
+from bet_ledger import BetLedger
+from opportunities import BetOpportunity
+from snapshot_service import SnapshotService
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+def _bet(event_id: str, odds: int = 100, market: str = 'Moneyline', selection: str = 'Home') -> BetOpportunity:
+    return BetOpportunity('NBA', '7:00 PM EST', market, selection, odds=odds, probability=0.55,
+                          expected_value=0.1, line=None if market == 'Moneyline' else -3.5,
+                          away='Celtics', home='Lakers', event_id=event_id)
+
+def _expected_history(profits, start=1000.0):
+    balance = start + np.cumsum(profits)
+    peak = np.maximum.accumulate(np.maximum(balance, start))
+    return balance, peak
+
+def test_running_bankroll_and_bet_type_stats():
+    ledger = BetLedger(starting_bankroll=1000)
+    ids = ledger.record_many([_bet('e1'), _bet('e2', odds=-200), _bet('e3', market='Spread', selection='Favorite'),
+                              _bet('e4')], status='open', stake=100, at='2030-01-01')
+    results = ['won', 'lost', 'lost', 'push']
+    for day, (bet_id, result) in enumerate(zip(ids, results), start=2):
+        ledger.settle(bet_id, result, at=f"2030-01-0{day}")
+
+    history = ledger.history()
+    profits = [100.0, -100.0, -100.0, 0.0]
+    balance, peak = _expected_history(profits)
+    assert history['profit_per_bet'].tolist() == profits
+    assert history['cumulative_profit'].tolist() == [100.0, 0.0, -100.0, -100.0]
+    assert np.allclose(history['balance'], balance) and np.allclose(history['peak_balance'], peak)
+    assert history['drawdown'].tolist() == [0.0, 100.0, 200.0, 200.0]
+    assert history.index[0] == pd.Timestamp('2030-01-02', tz='UTC')
+
+    performance = ledger.bet_type_performance()
+    assert performance['Moneyline']['bets'] == 3 and performance['Moneyline']['win_rate'] == 0.5
+    assert np.isclose(performance['Moneyline']['roi'], 0.0)
+    assert performance['Spread']['roi'] == -1.0
+
+    summary = ledger.summary()
+    assert summary['settled_bets'] == 4 and summary['balance'] == 900.0
+    assert summary['max_drawdown'] == 200.0
+
+def test_late_and_corrected_settlements_match_a_rebuild():
+    ledger = BetLedger(starting_bankroll=500)
+    ids = ledger.record_many([_bet(f"e{i}") for i in range(5)], status='open', stake=50)
+    ledger.settle(ids[0], 'won', at='2030-01-01')
+    ledger.settle(ids[1], 'lost', at='2030-01-03')
+    ledger.settle(ids[2], 'lost', at='2030-01-02')  # Dated before the latest settlement
+    ledger.settle(ids[3], 'won', at='2030-01-04')
+    ledger.settle(ids[1], 'won', at='2030-01-03')  # Corrected result
+
+    incremental = ledger.history()
+    assert incremental['profit_per_bet'].tolist() == [50.0, -50.0, 50.0, 50.0]
+    balance, peak = _expected_history([50, -50, 50, 50], start=500)
+    assert np.allclose(incremental['balance'], balance) and np.allclose(incremental['peak_balance'], peak)
+    stats = ledger.bet_type_performance()['Moneyline']
+
+    ledger.rebuild()
+    pd.testing.assert_frame_equal(incremental, ledger.history())
+    assert ledger.bet_type_performance()['Moneyline'] == stats
+    assert stats['wins'] == 3 and stats['losses'] == 1
+
+def test_recommendations_are_deduplicated_and_persisted():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'ledger.db')
+        ledger = BetLedger(path)
+
+        class Analyzer:
+            def get_todays_best_bets(self):
+                return [_bet('e1'), _bet('e2')]
+
+        service = SnapshotService(Analyzer(), interval=60, ledger=ledger)
+        service.refresh()
+        service.refresh()
+        assert len(ledger.bets(status='recommended')) == 2
+
+        bet_id = ledger.record(_bet('e1'))
+        ledger.place(bet_id, stake=25, odds=110, at='2030-01-01T18:00:00Z')
+        ledger.settle(bet_id, 'won', at='2030-01-02T02:00:00Z')
+        ledger.close()
+
+        reopened = BetLedger(path, starting_bankroll=5)
+        assert reopened.starting_bankroll == 1000
+        settled = reopened.bets(sport='NBA', status='won')
+        assert settled['profit'].tolist() == [27.5] and settled['odds'].tolist() == [110]
+        assert reopened.bets(start='2031-01-01').empty
+        assert reopened.summary()['profit'] == 27.5
+
+if __name__ == "__main__":
+    test_running_bankroll_and_bet_type_stats()
+    test_late_and_corrected_settlements_match_a_rebuild()
+    test_recommendations_are_deduplicated_and_persisted()
+    print("Bet ledger tests passed!")
@@ -0,0 +1,78 @@
+from clv import POINT_PROBABILITY, clv_report, compute_clv, load_history
+from data_fetchers.odds_api_fetcher import build_odds_table
+from odds import american_to_decimal, american_to_implied
+from odds_history import OddsHistoryStore
+from opportunities import BetOpportunity
+from test_odds_api import SAMPLE_EVENTS
+import copy
+import tempfile
+import numpy as np
+import pandas as pd
+
+def _history(root):
+    """Lakers moneyline shortening into the start, then a live price after it"""
+    store = OddsHistoryStore(root)
+    for captured_at, dk_home, fd_home, total in [
+        ('2029-12-31T12:00:00Z', -150, -145, 220.5),
+        ('2029-12-31T23:30:00Z', -170, -160, 221.5),
+        ('2030-01-01T00:30:00Z', -400, -380, 225.5),  # In play, must not count as the close
+    ]:
+        events = copy.deepcopy(SAMPLE_EVENTS)
+        markets = events[0]['bookmakers'][0]['markets']
+        markets[0]['outcomes'][1]['price'] = dk_home
+        for outcome in markets[2]['outcomes']:
+            outcome['point'] = total
+        events[0]['bookmakers'][1]['markets'][0]['outcomes'][1]['price'] = fd_home
+        store.append(build_odds_table(events, 'basketball_nba'), pd.Timestamp(captured_at))
+    store.flush()
+    return store
+
+def _bets():
+    return [
+        BetOpportunity('NBA', '7:00 PM EST', 'Moneyline', 'Home', odds=-150, probability=0.65,
+                       expected_value=0.08, away='Celtics', home='Lakers', event_id='e1'),
+        BetOpportunity('NBA', '7:00 PM EST', 'Total', 'Under', odds=-115, probability=0.55,
+                       expected_value=0.03, line=220.5, away='Celtics', home='Lakers', event_id='e1'),
+        BetOpportunity('NBA', '8:00 PM EST', 'Moneyline', 'Away', odds=120, probability=0.5,
+                       expected_value=0.1, away='Heat', home='Knicks', event_id='e2'),
+    ]
+
+def test_bets_join_last_pre_commence_price():
+    with tempfile.TemporaryDirectory() as root:
+        history = load_history(_history(root), 'basketball_nba')
+        clv = compute_clv(_bets(), history)
+
+        moneyline = clv.iloc[0]
+        close = np.median(american_to_implied(np.array([-170, -160])))
+        assert moneyline['close_books'] == 2
+        assert np.isclose(moneyline['close_probability'], close)
+        assert np.isclose(moneyline['clv'], american_to_decimal(-150) * close - 1)
+        assert moneyline['clv'] > 0 and moneyline['clv_probability'] > 0
+
+        # Same price, but the Under closed a point higher: 220.5 was the worse number
+        under = clv.iloc[1]
+        assert under['close_books'] == 1 and under['close_point'] == 221.5
+        assert under['clv_points'] == -1
+        assert np.isclose(under['clv_probability'], -POINT_PROBABILITY)
+        assert under['clv'] < 0
+        assert np.isnan(moneyline['clv_points'])
+
+        # No history for e2
+        assert clv.iloc[2]['close_books'] == 0 and np.isnan(clv.iloc[2]['clv'])
+
+        fanduel = compute_clv(_bets(), history, book='fanduel')
+        assert fanduel.iloc[0]['close_price'] == -160
+
+def test_report_groups():
+    with tempfile.TemporaryDirectory() as root:
+        report = clv_report(compute_clv(_bets(), load_history(_history(root), 'basketball_nba')))
+        assert list(report['sport'].index) == ['NBA']
+        assert report['sport'].loc['NBA', 'bets'] == 2
+        assert report['sport'].loc['NBA', 'beat_close'] == 0.5
+        assert set(report['bet_type'].index) == {'Moneyline', 'Total'}
+        assert report['ev_bucket']['bets'].sum() == 2
+
+if __name__ == "__main__":
+    test_bets_join_last_pre_commence_price()
+    test_report_groups()
+    print("CLV tests passed!")
@@ -0,0 +1,61 @@
+import copy
+from betting_analyzer import BettingAnalyzer
+from data_fetchers.odds_api_fetcher import OddsApiFetcher
+from incremental_scorer import IncrementalScorer
+from test_odds_api import SAMPLE_EVENTS
+
+def make_scorer(events):
+    fetcher = OddsApiFetcher(api_key='test')
+    fetcher._get_json = lambda kind, path, params: events
+    return IncrementalScorer(BettingAnalyzer(fetcher=fetcher), sport='NBA', size=5)
+
+def test_only_moved_games_are_rescored():
+    events = copy.deepcopy(SAMPLE_EVENTS)
+    events[1]['bookmakers'] = copy.deepcopy(events[0]['bookmakers'][:1])
+    scorer = make_scorer(events)
+    notifications = []
+    scorer.subscribe(lambda entered, left: notifications.append(
+        ([bet['pick'] for bet in entered], [bet['pick'] for bet in left])))
+    
+    entered, left = scorer.poll()
+    assert [(bet.event_id, bet.bet_type, bet.pick) for bet in entered] == [('e1', 'Moneyline', 'Away 130')]
+    assert scorer.rescored_games == 2
+    
+    # Nothing moved: no re-scoring at all
+    assert scorer.poll() == ([], [])
+    assert scorer.rescored_games == 2
+    
+    # A spread move on one game re-scores just that game
+    spreads = events[0]['bookmakers'][0]['markets'][1]
+    spreads['last_update'] = '2029-12-31T23:30:00Z'
+    spreads['outcomes'][1]['price'] = 150
+    scorer.poll()
+    assert scorer.rescored_games == 3
+    assert [bet.pick for bet in scorer.best()] == ['Favorite -3.5', 'Away 130']
+    
+    # Game drops off the board: its bets leave the list
+    del events[0]
+    scorer.poll()
+    assert scorer.best() == []
+    assert notifications == [
+        (['Away 130'], []),
+        (['Favorite -3.5'], []),
+        ([], ['Favorite -3.5', 'Away 130'])
+    ]
+
+def test_ranked_index_limits_best_list():
+    events = copy.deepcopy(SAMPLE_EVENTS)
+    spreads = events[0]['bookmakers'][0]['markets'][1]
+    spreads['outcomes'][1]['price'] = 150
+    scorer = make_scorer(events)
+    scorer.size = 1
+    
+    entered, _ = scorer.poll()
+    
+    assert [bet.pick for bet in entered] == ['Favorite -3.5']
+    assert len(scorer.best(k=10)) == 2
+
+if __name__ == "__main__":
+    test_only_moved_games_are_rescored()
+    test_ranked_index_limits_best_list()
+    print("Incremental scorer tests passed!")
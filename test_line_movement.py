@@ -0,0 +1,98 @@
+from data_fetchers.odds_api_fetcher import build_odds_table, diff_odds_tables
+from line_movement import LineMovementDetector
+from test_odds_api import SAMPLE_EVENTS
+import copy
+import itertools
+
+BOOKS = ['draftkings', 'fanduel', 'betmgm', 'caesars']
+_versions = itertools.count()  # A fresh last_update per table, so every diff sees the event move
+
+def _table(home_prices, total_point=220.5):
+    """One game offered by every book in BOOKS with the given Lakers moneylines"""
+    event = copy.deepcopy(SAMPLE_EVENTS[0])
+    template = event['bookmakers'][0]
+    event['bookmakers'] = []
+    version = next(_versions)
+    for book, price in zip(BOOKS, home_prices):
+        bookmaker = copy.deepcopy(template)
+        bookmaker['key'] = book
+        bookmaker['markets'][0]['outcomes'][1]['price'] = price
+        for outcome in bookmaker['markets'][2]['outcomes']:
+            outcome['point'] = total_point
+        bookmaker['last_update'] = f"2029-12-31T{version // 60 % 24:02d}:{version % 60:02d}:00Z"
+        event['bookmakers'].append(bookmaker)
+    return build_odds_table([event], 'basketball_nba')
+
+def _feed(detector, snapshots):
+    """Diff successive tables and feed the deltas, 30 seconds apart"""
+    previous = _table([-150] * 4)
+    detector.apply(diff_odds_tables('basketball_nba', previous.iloc[:0], previous), captured_at=0)
+    alerts = []
+    for i, current in enumerate(snapshots, start=1):
+        alerts.append(detector.apply(diff_odds_tables('basketball_nba', previous, current), captured_at=30 * i))
+        previous = current
+    return alerts
+
+def test_single_book_move_alerts_once():
+    detector = LineMovementDetector(steam_books=3)
+    alerts = _feed(detector, [_table([-200, -150, -150, -150]), _table([-210, -150, -150, -150])])
+
+    assert [alert.kind for alert in alerts[0]] == ['move']
+    move = alerts[0][0]
+    assert (move.event_id, move.market, move.outcome, move.books) == ('e1', 'h2h', 'Lakers', ['draftkings'])
+    assert move.direction == 1 and move.price_from == -150 and move.price_to == -200
+    assert move.probability_change > 0.05
+    assert alerts[1] == []  # Still moved against the same reference, but already reported
+
+def test_steam_across_books_and_point_moves():
+    detector = LineMovementDetector(steam_books=3, steam_window=90)
+    received = []
+    detector.subscribe(received.append)
+    alerts = _feed(detector, [
+        _table([-160, -150, -150, -150]),
+        _table([-160, -162, -150, -150]),
+        _table([-160, -162, -161, -150]),
+        _table([-160, -162, -161, -150], total_point=222.5),
+    ])
+
+    assert alerts[0] == [] and alerts[1] == []  # Below the single-book threshold
+    steam = [alert for alert in alerts[2] if alert.kind == 'steam']
+    assert len(steam) == 1
+    assert steam[0].books == ['betmgm', 'draftkings', 'fanduel']
+    assert steam[0].seconds == 90
+
+    # Totals moving up two points at four books: a move per book and steam toward the Over
+    over = [alert for alert in alerts[3] if alert.outcome == 'Over']
+    assert sorted(alert.kind for alert in over) == ['move'] * 4 + ['steam']
+    assert all(alert.direction == 1 and alert.point_change == 2.0 for alert in over)
+    assert all(alert.direction == -1 for alert in alerts[3] if alert.outcome == 'Under')
+    assert received == [batch for batch in alerts if batch]
+
+def test_move_after_a_quiet_gap_longer_than_the_window():
+    detector = LineMovementDetector(window=600, steam_books=3)
+    first = _table([-150] * 4)
+    detector.apply(diff_odds_tables('basketball_nba', first.iloc[:0], first), captured_at=0)
+    alerts = detector.apply(diff_odds_tables('basketball_nba', first, _table([-250] * 4)), captured_at=1200)
+
+    lakers = [alert for alert in alerts if alert.outcome == 'Lakers']
+    assert sorted(alert.kind for alert in lakers) == ['move'] * 4 + ['steam']
+    assert all(alert.price_from == -150 and alert.price_to == -250 for alert in lakers)
+    assert all(alert.seconds == 1200 for alert in lakers if alert.kind == 'move')
+
+def test_state_is_bounded():
+    detector = LineMovementDetector(capacity=4)
+    _feed(detector, [_table([-150 - i] * 4) for i in range(20)])
+    ring = next(iter(detector._outcomes.values())).rings['draftkings']
+    assert len(ring.times) == 4
+    assert detector.tracked_outcomes == 6
+
+    table = _table([-150] * 4)
+    detector.apply(diff_odds_tables('basketball_nba', table, table.iloc[:0]))
+    assert detector.tracked_outcomes == 0
+
+if __name__ == "__main__":
+    test_single_book_move_alerts_once()
+    test_steam_across_books_and_point_moves()
+    test_move_after_a_quiet_gap_longer_than_the_window()
+    test_state_is_bounded()
+    print("Line movement tests passed!")
@@ -0,0 +1,106 @@
+import tempfile
+import threading
+from flask import Flask
+import metrics
+from metrics import MetricsRegistry
+from data_fetchers.replay import ReplayServer
+from data_fetchers.transport import HttpTransport, UPSTREAM_REQUESTS
+from snapshot_service import SnapshotService
+
+def test_counter_sums_per_thread_shards():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ['kind'])
+    
+    def work():
+        for _ in range(1000):
+            requests.inc(kind='odds')
+    
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests.inc(5, kind='events')
+    
+    assert requests.value(kind='odds') == 8000
+    assert requests.value(kind='events') == 5
+    # Exited threads' shards are folded into the retired total
+    assert len(requests._shards) == 1
+    assert requests.value(kind='odds') == 8000
+
+def test_histogram_exposition_is_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ['route'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, route='/')
+    
+    text = registry.exposition()
+    
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="/",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 4' in text
+    assert 'latency_seconds_sum{route="/"} 3.65' in text
+    assert latency.count(route='/') == 4
+
+def test_gauges_and_label_checks():
+    registry = MetricsRegistry()
+    registry.gauge('age_seconds', 'Age', fn=lambda: 12.5)
+    registry.gauge('unknown', 'Not ready', fn=lambda: None)
+    quota = registry.gauge('quota', 'Quota', ['sport'])
+    quota.set(3, sport='nba')
+    
+    text = registry.exposition()
+    
+    assert 'age_seconds 12.5' in text
+    assert '\nunknown ' not in text
+    assert 'quota{sport="nba"} 3.0' in text
+    try:
+        registry.counter('quota', 'Clash')
+        assert False, "Type clash should be rejected"
+    except ValueError:
+        pass
+    try:
+        registry.counter('labelled', 'Labels', ['kind']).inc(other='x')
+        assert False, "Wrong labels should be rejected"
+    except ValueError:
+        pass
+
+def test_transport_counts_upstream_requests():
+    with ReplayServer(tempfile.mkdtemp()) as server:
+        host = server.base_url.split('://')[1]
+        before = UPSTREAM_REQUESTS.value(host=host, status=404)
+        HttpTransport(max_retries=0).get(f"{server.base_url}/sports")
+    
+    assert UPSTREAM_REQUESTS.value(host=host, status=404) == before + 1
+
+class StaticAnalyzer:
+    def get_todays_best_bets(self):
+        return [{'sport': 'NBA', 'pick': 'Away 130', 'expected_value': 0.3}]
+
+def test_metrics_endpoint_serves_service_gauges():
+    app = Flask(__name__)
+    app.add_url_rule('/', 'index', lambda: 'ok')
+    service = SnapshotService(StaticAnalyzer(), interval=60)
+    service.refresh()
+    metrics.add_metrics_endpoint(app)
+    metrics.watch_snapshot_service(service)
+    client = app.test_client()
+    
+    client.get('/')
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+    
+    assert response.mimetype == 'text/plain'
+    assert 'best_bets_snapshot_version 1.0' in text
+    assert 'best_bets_snapshot_bets 1.0' in text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in text
+    assert 'best_bets_refresh_duration_seconds_count' in text
+
+if __name__ == "__main__":
+    test_counter_sums_per_thread_shards()
+    test_histogram_exposition_is_cumulative()
+    test_gauges_and_label_checks()
+    test_transport_counts_upstream_requests()
+    test_metrics_endpoint_serves_service_gauges()
+    print("Metrics tests passed!")
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from odds import (american_to_decimal, decimal_to_american, american_to_implied, implied_to_american,
+                  expected_value, no_vig_probabilities, consensus_probability, consensus_price)
+
+def test_conversions_round_trip():
+    american = np.array([-300.0, -150.0, -110.0, 100.0, 130.0, 450.0])
+    
+    assert np.allclose(decimal_to_american(american_to_decimal(american)), american)
+    assert np.allclose(implied_to_american(american_to_implied(american)), american)
+    assert np.isclose(american_to_decimal(-150), 1 + 100/150)
+    assert np.isclose(american_to_implied(130), 100/230)
+    assert np.isnan(american_to_implied(np.nan))
+
+def test_expected_value_is_per_unit_stake():
+    # A fair coin at +100 breaks even, at -110 it loses the vig
+    assert np.isclose(expected_value(100, 0.5), 0.0)
+    assert np.isclose(expected_value(-110, 0.5), 0.5 * (1 + 100/110) - 1)
+    assert np.allclose(expected_value([150, -200], [0.4, 2/3]), [0.0, 0.0])
+
+def test_expected_value_of_favorites_is_per_unit_stake():
+    # The pre-odds.py formula, p - |odds|/100 * (1 - p), gave EV per 100 to win for favorites
+    probability = np.array([0.75, 0.6, 0.55])
+    american = np.array([-200, -150, 130])
+    legacy = np.where(american > 0, american / 100 * probability - (1 - probability),
+                      probability - np.abs(american) / 100 * (1 - probability))
+    ev = expected_value(american, probability)
+
+    assert np.isclose(ev[0], 0.125) and np.isclose(legacy[0], 0.25)
+    assert np.allclose(ev[:2], legacy[:2] * 100 / np.abs(american[:2]))
+    assert np.isclose(ev[2], legacy[2])  # Underdog prices are unchanged
+
+@pytest.mark.parametrize('method', ['multiplicative', 'additive', 'power'])
+def test_no_vig_probabilities_sum_to_one(method):
+    implied = american_to_implied(np.array([[-110, -110], [-200, 170], [-400, 300]]))
+    
+    fair = no_vig_probabilities(implied, method=method)
+    
+    assert np.allclose(fair.sum(axis=1), 1.0)
+    assert np.allclose(fair[0], [0.5, 0.5])
+    assert np.all(fair[1:, 0] > fair[1:, 1])
+
+def test_power_method_shifts_margin_to_longshot():
+    implied = american_to_implied(np.array([-400, 300]))
+    
+    multiplicative = no_vig_probabilities(implied, method='multiplicative')
+    power = no_vig_probabilities(implied, method='power')
+    
+    assert power[1] < multiplicative[1]
+    with pytest.raises(ValueError):
+        no_vig_probabilities(implied, method='bogus')
+
+def test_consensus_skips_missing_books_and_applies_weights():
+    prices = np.array([
+        [[-110, -110], [-120, 100], [np.nan, np.nan]],
+        [[150, -170], [np.nan, -160], [140, -160]],
+    ])
+    
+    fair = consensus_probability(prices, weights=[1.0, 1.0, 2.0])
+    
+    assert fair.shape == (2, 2)
+    assert np.allclose(fair.sum(axis=1), 1.0)
+    book_a = no_vig_probabilities(american_to_implied(prices[0, 0]))
+    book_b = no_vig_probabilities(american_to_implied(prices[0, 1]))
+    assert np.allclose(fair[0], (book_a + book_b) / 2)
+    # Single-market input gives per-outcome prices back
+    assert np.allclose(consensus_price(prices[0, :1]), [100, 100])
+
+if __name__ == "__main__":
+    test_conversions_round_trip()
+    test_expected_value_is_per_unit_stake()
+    test_expected_value_of_favorites_is_per_unit_stake()
+    for method in ['multiplicative', 'additive', 'power']:
+        test_no_vig_probabilities_sum_to_one(method)
+    test_power_method_shifts_margin_to_longshot()
+    test_consensus_skips_missing_books_and_applies_weights()
+    print("All odds math tests passed")
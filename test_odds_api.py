@@ -1,5 +1,9 @@
-from data_fetchers.odds_api_fetcher import OddsApiFetcher
+from data_fetchers.odds_api_fetcher import (
+    OddsApiFetcher, PlannedRequest, RequestPlanner, build_odds_table, format_game_odds
+)
 import pandas as pd
+import copy
+import time
 
 def test_odds_api():
     fetcher = OddsApiFetcher()
@@ -14,7 +18,7 @@ def test_odds_api():
     games = fetcher.get_upcoming_games('basketball_nba')
     if not games.empty:
         print("\nNBA Games:")
-        print(games[['Time', 'Home', 'Away', 'Spread', 'Total', 'ML']])
+        print(format_game_odds(games)[['Time', 'Home', 'Away', 'Spread', 'Total', 'ML']])
     else:
         print("No upcoming NBA games found")
     
@@ -23,9 +27,187 @@ def test_odds_api():
     games = fetcher.get_upcoming_games('americanfootball_nfl')
     if not games.empty:
         print("\nNFL Games:")
-        print(games[['Time', 'Home', 'Away', 'Spread', 'Total', 'ML']])
+        print(format_game_odds(games)[['Time', 'Home', 'Away', 'Spread', 'Total', 'ML']])
     else:
         print("No upcoming NFL games found")
 
+def test_event_markets_fetched_concurrently_in_order():
+    fetcher = OddsApiFetcher(api_key='test')
+    fetcher.max_concurrent_requests = 4
+    
+    def fake_fetch(request):
+        time.sleep(0.05)
+        if request.event_id == 'bad':
+            return None
+        return {'id': request.event_id}
+    
+    fetcher._fetch_planned = fake_fetch
+    event_ids = [f"e{i}" for i in range(8)] + ['bad']
+    pairs = [PlannedRequest('basketball_nba', event_id, ('player_points',)) for event_id in event_ids]
+    
+    start = time.perf_counter()
+    results = fetcher._fetch_event_markets(pairs)
+    elapsed = time.perf_counter() - start
+    
+    assert [r['id'] for r in results[:-1]] == [f"e{i}" for i in range(8)]
+    assert results[-1] is None
+    assert elapsed < 0.05 * len(pairs)
+
+def test_planner_coalesces_markets():
+    planner = RequestPlanner()
+    needs = [
+        ('basketball_nba', 'e1', 'h2h'),
+        ('basketball_nba', 'e2', 'spreads'),
+        ('basketball_nba', 'e1', 'player_points'),
+        ('basketball_nba', 'e1', 'player_assists'),
+        ('basketball_nba', 'e1', 'player_points'),
+        ('basketball_nba', 'e2', 'player_points'),
+    ]
+    in_hand = {('basketball_nba', 'e2', 'player_points')}
+    
+    planned = planner.plan(needs, in_hand)
+    
+    assert planned == [
+        PlannedRequest('basketball_nba', None, ('h2h', 'spreads')),
+        PlannedRequest('basketball_nba', 'e1', ('player_points', 'player_assists')),
+    ]
+    assert planned[1].path == '/sports/basketball_nba/events/e1/odds'
+
+SAMPLE_EVENTS = [
+    {
+        'id': 'e1',
+        'commence_time': '2030-01-01T00:00:00Z',
+        'home_team': 'Lakers',
+        'away_team': 'Celtics',
+        'bookmakers': [
+            {
+                'key': 'draftkings',
+                'title': 'DraftKings',
+                'last_update': '2029-12-31T23:00:00Z',
+                'markets': [
+                    {'key': 'h2h', 'outcomes': [
+                        {'name': 'Celtics', 'price': 130},
+                        {'name': 'Lakers', 'price': -150}
+                    ]},
+                    {'key': 'spreads', 'outcomes': [
+                        {'name': 'Celtics', 'price': -110, 'point': 3.5},
+                        {'name': 'Lakers', 'price': -110, 'point': -3.5}
+                    ]},
+                    {'key': 'totals', 'outcomes': [
+                        {'name': 'Over', 'price': -105, 'point': 220.5},
+                        {'name': 'Under', 'price': -115, 'point': 220.5}
+                    ]}
+                ]
+            },
+            {
+                'key': 'fanduel',
+                'title': 'FanDuel',
+                'markets': [
+                    {'key': 'h2h', 'last_update': '2029-12-31T23:05:00Z', 'outcomes': [
+                        {'name': 'Celtics', 'price': 125},
+                        {'name': 'Lakers', 'price': -145}
+                    ]}
+                ]
+            }
+        ]
+    },
+    {
+        'id': 'e2',
+        'commence_time': '2030-01-01T01:00:00Z',
+        'home_team': 'Knicks',
+        'away_team': 'Heat',
+        'bookmakers': []
+    }
+]
+
+def test_odds_table_keeps_every_bookmaker():
+    table = build_odds_table(SAMPLE_EVENTS, 'basketball_nba')
+    
+    assert len(table) == 8
+    assert list(table['book'].cat.categories) == ['draftkings', 'fanduel']
+    assert isinstance(table['event_id'].dtype, pd.CategoricalDtype)
+    assert table['point'].isna().sum() == 4
+    fanduel = table[table['book'] == 'fanduel']
+    assert list(fanduel['price']) == [125, -145]
+    assert str(fanduel['last_update'].iloc[0]) == '2029-12-31 23:05:00+00:00'
+    assert str(table['last_update'].iloc[0]) == '2029-12-31 23:00:00+00:00'
+
+def test_upcoming_games_have_numeric_odds():
+    fetcher = OddsApiFetcher(api_key='test')
+    fetcher._get_json = lambda kind, path, params: SAMPLE_EVENTS
+    
+    games = fetcher.get_upcoming_games('basketball_nba')
+    
+    assert len(games) == 1
+    game = games.iloc[0]
+    assert (game['Away ML'], game['Home ML']) == (130, -150)
+    assert (game['Spread Point'], game['Spread Price']) == (-3.5, -110)
+    assert (game['Total Point'], game['Over Price'], game['Under Price']) == (220.5, -105, -115)
+    assert games['Home ML'].dtype == 'float64'
+    
+    display = format_game_odds(games).iloc[0]
+    assert display['ML'] == '+130/-150'
+    assert display['Spread'] == '-3.5 (-110)'
+    assert display['Total'] == 'O/U 220.5 (-105)'
+
+def test_odds_update_reports_only_moved_outcomes():
+    fetcher = OddsApiFetcher(api_key='test')
+    events = copy.deepcopy(SAMPLE_EVENTS)
+    fetcher._get_json = lambda kind, path, params: events
+    
+    _, delta = fetcher.get_odds_update('basketball_nba')
+    assert delta.added_events == ['e1']
+    assert len(delta.added) == 8
+    
+    _, delta = fetcher.get_odds_update('basketball_nba')
+    assert delta.is_empty
+    
+    fanduel_h2h = events[0]['bookmakers'][1]['markets'][0]
+    fanduel_h2h['last_update'] = '2029-12-31T23:10:00Z'
+    fanduel_h2h['outcomes'][0]['price'] = 120
+    table, delta = fetcher.get_odds_update('basketball_nba')
+    
+    assert len(table) == 8
+    assert delta.changed_events == ['e1']
+    assert list(delta.changed['price']) == [120]
+    assert delta.added.empty and delta.removed.empty
+
+def test_player_props_pair_over_and_under():
+    fetcher = OddsApiFetcher(api_key='test')
+    event_odds = {'bookmakers': [{'key': 'draftkings', 'title': 'DraftKings', 'markets': [
+        {'key': 'player_points', 'outcomes': [
+            {'name': 'Over', 'description': 'LeBron James', 'price': -115, 'point': 25.5},
+            {'name': 'Under', 'description': 'LeBron James', 'price': -105, 'point': 25.5},
+            {'name': 'Over', 'description': 'Anthony Davis', 'price': 120, 'point': 27.5}
+        ]}
+    ]}]}
+    requested = []
+    
+    def fake_get_json(kind, path, params):
+        requested.append((kind, params.get('markets')))
+        return SAMPLE_EVENTS if kind == 'events' else event_odds
+    
+    fetcher._get_json = fake_get_json
+    props = fetcher.get_player_props('basketball_nba')
+    
+    # One event list plus one request per game covering every prop market
+    assert requested == [('events', None)] + [('event_odds', 'player_points,player_rebounds,player_assists')] * 2
+    props = props[props['Game'] == 'Celtics @ Lakers']
+    assert len(props) == 2
+    lebron = props[props['Player'] == 'LeBron James'].iloc[0]
+    assert (lebron['Over'], lebron['Under'], lebron['Line']) == (-115, -105, 25.5)
+    assert pd.isna(props[props['Player'] == 'Anthony Davis'].iloc[0]['Under'])
+    
+    # Markets fetched moments ago are in hand: only the new market is requested
+    requested.clear()
+    again = fetcher.get_player_props('basketball_nba', ['player_points', 'player_threes'])
+    assert requested == [('events', None)] + [('event_odds', 'player_threes')] * 2
+    assert len(again[again['Game'] == 'Celtics @ Lakers']) == 2
+    
+    fetcher.prop_markets_max_age = 0
+    requested.clear()
+    fetcher.get_player_props('basketball_nba', ['player_points'])
+    assert requested == [('events', None)] + [('event_odds', 'player_points')] * 2
+
 if __name__ == "__main__":
     test_odds_api()
@@ -0,0 +1,159 @@
+from data_fetchers.odds_api_fetcher import OddsApiFetcher, build_odds_table
+from odds_history import OddsHistoryStore
+from test_odds_api import SAMPLE_EVENTS
+from datetime import datetime, timedelta, timezone
+import copy
+import os
+import tempfile
+import pandas as pd
+
+def _snapshots(n: int):
+    """SAMPLE_EVENTS with the DraftKings Celtics moneyline moving each capture"""
+    start = datetime(2029, 12, 31, 12, 0, tzinfo=timezone.utc)
+    for i in range(n):
+        events = copy.deepcopy(SAMPLE_EVENTS)
+        events[0]['bookmakers'][0]['markets'][0]['outcomes'][0]['price'] = 130 + 5 * i
+        yield start + timedelta(minutes=10 * i), build_odds_table(events, 'basketball_nba')
+
+def test_batched_segments_round_trip():
+    with tempfile.TemporaryDirectory() as root:
+        store = OddsHistoryStore(root, batch_rows=20)
+        for captured_at, table in _snapshots(5):
+            store.append(table, captured_at)
+        store.flush()
+
+        # 8 rows per snapshot: batches of 20+ rows become 2 segments, not 5
+        assert store.partitions('basketball_nba') == ['2030-01-01']
+        partition = os.path.join(root, 'basketball_nba', '2030-01-01')
+        assert len([name for name in os.listdir(partition) if name.startswith('seg-')]) == 2
+
+        history = store.event_history('basketball_nba', 'e1')
+        assert len(history) == 40
+        assert history['captured_at'].is_monotonic_increasing
+        moneyline = history[(history['book'] == 'draftkings') & (history['market'] == 'h2h')
+                            & (history['outcome'] == 'Celtics')]
+        assert moneyline['price'].tolist() == [130, 135, 140, 145, 150]
+        totals = history[(history['market'] == 'totals') & (history['outcome'] == 'Under')]
+        assert totals['price'].tolist() == [-115] * 5
+        assert totals['point'].tolist() == [220.5] * 5
+
+        # Games without odds are not stored
+        assert store.event_history('basketball_nba', 'e2').empty
+
+def test_column_pruning_price_series_and_compaction():
+    with tempfile.TemporaryDirectory() as root:
+        store = OddsHistoryStore(root, batch_rows=1)
+        for captured_at, table in _snapshots(3):
+            store.append(table, captured_at)
+
+        history = store.event_history('basketball_nba', 'e1', commence_date='2030-01-01',
+                                      columns=['captured_at', 'price'])
+        assert list(history.columns) == ['captured_at', 'price']
+
+        series = store.price_series('basketball_nba', 'e1', 'h2h', 'Celtics')
+        assert list(series.columns) == ['draftkings', 'fanduel']
+        assert series['draftkings'].tolist() == [130, 135, 140]
+        assert series['fanduel'].tolist() == [125, 125, 125]
+
+        # A capture quoted by one book only leaves that segment with fewer book categories
+        draftkings = table[table['book'] == 'draftkings']
+        store.append(draftkings, captured_at + timedelta(minutes=10))
+
+        before = store.event_history('basketball_nba', 'e1')
+        store.compact('basketball_nba', '2030-01-01')
+        partition = os.path.join(root, 'basketball_nba', '2030-01-01')
+        assert len(os.listdir(partition)) == 1
+        after = store.event_history('basketball_nba', 'e1')
+        pd.testing.assert_frame_equal(before, after)
+        assert list(after['book'].cat.categories) == ['draftkings', 'fanduel']
+
+        teams = store.event_history('basketball_nba', 'e1', columns=['home_team', 'away_team', 'commence_time'])
+        assert set(teams['home_team']) == {'Lakers'}
+        assert set(teams['commence_time']) == {pd.Timestamp('2030-01-01', tz='UTC')}
+
+def test_buffered_captures_are_readable_before_flush():
+    with tempfile.TemporaryDirectory() as root:
+        store = OddsHistoryStore(root, batch_rows=20)
+        for captured_at, table in _snapshots(5):
+            store.append(table, captured_at)
+
+        # The first 3 snapshots are one segment; the last 2 are still buffered
+        partition = os.path.join(root, 'basketball_nba', '2030-01-01')
+        assert len(os.listdir(partition)) == 1
+        series = store.price_series('basketball_nba', 'e1', 'h2h', 'Celtics')
+        assert series['draftkings'].tolist() == [130, 135, 140, 145, 150]
+        history = store.event_history('basketball_nba', 'e1')
+        assert len(history) == 40 and history['captured_at'].is_monotonic_increasing
+
+        # Reads write out buffers older than max_buffer_seconds, even with no further appends
+        store.max_buffer_seconds = 0
+        assert len(store.read_partition('basketball_nba', '2030-01-01', ['price'])) == 40
+        assert not store._buffers and len(os.listdir(partition)) == 2
+
+        # A fresh store finds events through its index, reading each segment's meta once
+        reopened = OddsHistoryStore(root)
+        assert len(reopened.event_history('basketball_nba', 'e1')) == 40
+        loaded = len(reopened._meta_cache)
+        assert reopened.event_history('basketball_nba', 'e2').empty
+        assert len(reopened.event_history('basketball_nba', 'e1')) == 40
+        assert len(reopened._meta_cache) == loaded == 2
+
+def test_compaction_during_a_read_keeps_its_segments():
+    with tempfile.TemporaryDirectory() as root:
+        store = OddsHistoryStore(root, batch_rows=1)
+        for captured_at, table in _snapshots(3):
+            store.append(table, captured_at)
+        before = store.read_partition('basketball_nba', '2030-01-01')
+        partition = os.path.join(root, 'basketball_nba', '2030-01-01')
+
+        # Compact after the read has listed its segments but before it opens them
+        read_segment = store._read_segment
+        compacted = []
+        def compact_first(path, *args):
+            if not compacted:
+                compacted.append(path)
+                store.compact('basketball_nba', '2030-01-01')
+                assert len(store._segments('basketball_nba', '2030-01-01')) == 1
+            return read_segment(path, *args)
+        store._read_segment = compact_first
+
+        during = store.read_partition('basketball_nba', '2030-01-01')
+        pd.testing.assert_frame_equal(before, during)
+        assert len(os.listdir(partition)) == 1  # Old segments go once the read is done
+        after = store.read_partition('basketball_nba', '2030-01-01')
+        order = ['captured_at', 'book', 'market', 'outcome', 'description']
+        pd.testing.assert_frame_equal(before.sort_values(order, ignore_index=True),
+                                      after.sort_values(order, ignore_index=True))
+
+def test_fetcher_records_network_responses_only():
+    with tempfile.TemporaryDirectory() as root:
+        class Response:
+            status_code = 200
+            ok = True
+            headers = {}
+            content = b'[]'
+
+            def json(self):
+                return SAMPLE_EVENTS
+
+            def raise_for_status(self):
+                pass
+
+        class Transport:
+            def get(self, url, params=None, timeout=None):
+                return Response()
+
+        store = OddsHistoryStore(root, batch_rows=1)
+        fetcher = OddsApiFetcher(api_key='test', transport=Transport(), history=store)
+        fetcher.get_odds_table('basketball_nba', upcoming_only=False)
+        fetcher.get_odds_table('basketball_nba', upcoming_only=False)  # Served from the cache
+
+        assert len(store.event_history('basketball_nba', 'e1')) == 8
+
+if __name__ == "__main__":
+    test_batched_segments_round_trip()
+    test_column_pruning_price_series_and_compaction()
+    test_buffered_captures_are_readable_before_flush()
+    test_compaction_during_a_read_keeps_its_segments()
+    test_fetcher_records_network_responses_only()
+    print("Odds history tests passed!")
@@ -0,0 +1,67 @@
+import sys
+from opportunities import BetOpportunity, top_k, sort_by_expected_value
+from snapshot_service import SnapshotService
+
+def make_bets():
+    return [
+        BetOpportunity('NBA', '7:00 PM EST', 'Moneyline', 'Away', odds=150, probability=0.6,
+                       expected_value=0.5, away='Celtics', home='Lakers'),
+        BetOpportunity('NBA', '7:00 PM EST', 'Spread', 'Favorite', odds=-110, probability=0.55,
+                       expected_value=0.05, line=-3.5, away='Celtics', home='Lakers'),
+        BetOpportunity('NFL', '1:00 PM EST', 'Pass Tds', 'Over', odds=120, probability=0.5,
+                       expected_value=0.1, line=1.5, game='Bills @ Jets', player='Josh Allen'),
+    ]
+
+def test_renders_the_analyzer_dict_fields_on_access():
+    moneyline, spread, prop = make_bets()
+    
+    assert moneyline.to_dict() == {
+        'sport': 'NBA', 'time': '7:00 PM EST', 'matchup': 'Celtics @ Lakers', 'bet_type': 'Moneyline',
+        'pick': 'Away 150', 'line': None, 'odds': 150, 'expected_value': 0.5,
+        'analysis': 'Strong value on Away ML (150) - 60.0% win probability'
+    }
+    assert spread['pick'] == 'Favorite -3.5'
+    assert spread['analysis'] == 'Strong spread value on Favorite -3.5 (-110) - 55.0% cover probability'
+    assert dict(prop)['bet_type'] == 'Player Prop - Pass Tds'
+    assert prop['matchup'] == 'Bills @ Jets'
+    assert prop['analysis'] == 'Strong value on Josh Allen Over 1.5 Pass Tds (120) - 50.0% probability'
+    assert prop.get('missing', 'n/a') == 'n/a'
+
+def test_compact_and_interned():
+    moneyline, spread, _ = make_bets()
+    
+    assert not hasattr(moneyline, '__dict__')
+    assert sys.getsizeof(moneyline) < sys.getsizeof(moneyline.to_dict())
+    assert moneyline.home is spread.home
+
+def test_top_k_and_sorting():
+    bets = make_bets()
+    
+    assert [bet.expected_value for bet in top_k(bets, 2)] == [0.5, 0.1]
+    assert [bet.market for bet in top_k(bets, 5, sport='NBA')] == ['Moneyline', 'Spread']
+    sort_by_expected_value(bets)
+    assert [bet.expected_value for bet in bets] == [0.5, 0.1, 0.05]
+
+class StaticAnalyzer:
+    def get_todays_best_bets(self):
+        bets = make_bets()
+        sort_by_expected_value(bets)
+        return bets
+
+def test_snapshot_serves_opportunities_read_only():
+    snapshot = SnapshotService(StaticAnalyzer(), interval=60).refresh()
+    
+    try:
+        snapshot.bets[0]['pick'] = 'changed'
+        assert False, "Snapshot bets should be read-only"
+    except TypeError:
+        pass
+    assert [bet['pick'] for bet in snapshot.bets_for('NBA', limit=1)] == ['Away 150']
+    assert len(snapshot.all_bets(limit=2)) == 2
+
+if __name__ == "__main__":
+    test_renders_the_analyzer_dict_fields_on_access()
+    test_compact_and_interned()
+    test_top_k_and_sorting()
+    test_snapshot_serves_opportunities_read_only()
+    print("Opportunity tests passed!")
@@ -0,0 +1,61 @@
+from backtester import Backtester
+from parameter_sweep import ParameterSweep, parameter_grid
+from test_backtester import PROP_RESULTS, RESULTS, _history
+import json
+import os
+import tempfile
+import numpy as np
+
+GRID = parameter_grid(ev_thresholds={'Moneyline': [-1, 0.5], 'Spread': [-1, 0.5]},
+                      prop_adjustments={'Points': [(1.05, 0.95), (1.0, 1.0)]},
+                      staking=['flat', 'half_kelly'])
+
+def _backtester():
+    return Backtester(_history(), RESULTS, prop_results=PROP_RESULTS)
+
+def test_grid_covers_every_combination():
+    assert len(GRID) == 16
+    assert GRID[0] == {'ev_thresholds': {'Moneyline': -1, 'Spread': -1},
+                       'prop_adjustments': {'Points': (1.05, 0.95)}, 'staking': 'flat'}
+    assert len({json.dumps(params, sort_keys=True) for params in GRID}) == 16
+    assert parameter_grid() == [{'ev_thresholds': {}, 'prop_adjustments': {}, 'staking': 'flat'}]
+
+def test_pool_matches_serial_backtests():
+    backtester = _backtester()
+    results = ParameterSweep(backtester, workers=2).run(GRID)
+
+    assert len(results) == 16
+    for params, (_, row) in zip(GRID, results.iterrows()):
+        expected = backtester.run(ev_thresholds=params['ev_thresholds'],
+                                  prop_adjustments=params['prop_adjustments'], staking=params['staking']).summary
+        assert row['bets'] == expected['bets']
+        assert np.isclose(row['profit'], expected['profit'])
+        assert row['staking'] == params['staking'] and row['prop_Points'] == params['prop_adjustments']['Points']
+
+def test_interrupted_sweep_resumes_from_checkpoint():
+    backtester = _backtester()
+    with tempfile.TemporaryDirectory() as root:
+        checkpoint = os.path.join(root, 'sweep.jsonl')
+        ParameterSweep(backtester, checkpoint=checkpoint, workers=0).run(GRID[:5])
+
+        # Mark a finished combination, and leave a half-written line as a kill mid-write would
+        with open(checkpoint) as f:
+            records = [json.loads(line) for line in f]
+        records[0]['summary']['bets'] = -1
+        with open(checkpoint, 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+            f.write('{"params": {"ev_thre')
+
+        results = ParameterSweep(backtester, checkpoint=checkpoint, workers=2).run(GRID)
+        assert results['bets'].iloc[0] == -1  # Taken from the checkpoint, not rerun
+        assert (results['bets'].iloc[1:] >= 0).all()
+
+        with open(checkpoint) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 16 and all(json.loads(line) for line in lines)
+
+if __name__ == "__main__":
+    test_grid_covers_every_combination()
+    test_pool_matches_serial_backtests()
+    test_interrupted_sweep_resumes_from_checkpoint()
+    print("Parameter sweep tests passed!")
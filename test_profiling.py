@@ -0,0 +1,114 @@
+import json
+import logging
+import time
+import pytest
+from flask import Flask
+import profiling
+from profiling import Profiler
+
+def test_spans_aggregate_durations_and_numeric_attributes():
+    profiler = Profiler()
+    
+    for rows in (10, 20):
+        with profiler.span('parse', sport='nba') as attrs:
+            attrs['rows'] = rows
+    with pytest.raises(ValueError):
+        with profiler.span('parse'):
+            raise ValueError("bad payload")
+    
+    stats = profiler.summary()['spans']['parse']
+    assert stats['count'] == 3
+    assert stats['errors'] == 1
+    assert stats['totals'] == {'rows': 30}
+    assert stats['min_ms'] <= stats['mean_ms'] <= stats['max_ms']
+
+def test_nested_spans_are_logged_with_their_path(tmp_path):
+    log_path = tmp_path / 'spans.jsonl'
+    profiling.configure_log(str(log_path))
+    profiler = Profiler()
+    try:
+        with profiler.span('refresh'):
+            with profiler.span('http', kind='odds', bytes=512):
+                pass
+    finally:
+        for handler in list(profiling.logger.handlers):
+            profiling.logger.removeHandler(handler)
+            handler.close()
+        profiling.logger.setLevel(logging.NOTSET)
+    
+    lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [line['path'] for line in lines] == ['refresh/http', 'refresh']
+    assert lines[0]['bytes'] == 512 and lines[0]['kind'] == 'odds'
+
+@pytest.mark.parametrize('mode', ['cprofile', 'sampling'])
+def test_capture_profiles_only_the_next_matching_span(mode):
+    profiler = Profiler()
+    profiler.capture_next('refresh', mode=mode, interval=0.001)
+    
+    with profiler.span('other'):
+        pass
+    with profiler.span('refresh'):
+        time.sleep(0.05)
+    with profiler.span('refresh'):
+        pass
+    
+    assert len(profiler.captures) == 1
+    capture = profiler.captures[0]
+    assert capture['mode'] == mode and capture['report']
+    assert profiler.summary()['armed_capture'] is None
+    with pytest.raises(ValueError):
+        profiler.capture_next(mode='bogus')
+
+def test_timed_records_result_size():
+    @profiling.timed('test_timed_stage')
+    def stage():
+        return [1, 2, 3]
+    
+    assert stage() == [1, 2, 3]
+    assert profiling.get_profiler().summary()['spans']['test_timed_stage']['totals']['items'] >= 3
+
+def test_flask_routes_expose_summary_and_arm_captures():
+    app = Flask(__name__)
+    app.add_url_rule('/page/<int:page_id>', 'page', lambda page_id: 'x' * 100)
+    assert profiling.register_routes(app, token='secret', enabled=True)
+    client = app.test_client()
+    auth = {'Authorization': 'Bearer secret'}
+    
+    assert client.get('/page/1').status_code == 200
+    assert client.get('/page/2').status_code == 200
+    summary = client.get('/debug/profile', headers=auth).get_json()
+    assert summary['spans']['request:/page/<int:page_id>']['count'] >= 2
+    assert summary['spans']['request:/page/<int:page_id>']['totals']['bytes'] >= 200
+    assert not any(name.startswith('request:/page/1') for name in summary['spans'])
+    
+    assert client.get('/debug/profile').status_code == 403
+    assert client.get('/debug/profile', headers={'X-Profile-Token': 'wrong'}).status_code == 403
+    assert client.get('/debug/profile/capture', headers=auth).status_code == 405
+    armed = client.post('/debug/profile/capture?mode=sampling', headers={'X-Profile-Token': 'secret'}).get_json()
+    assert armed['armed']['mode'] == 'sampling'
+    assert client.post('/debug/profile/capture?mode=nope', headers=auth).status_code == 400
+    profiling.get_profiler().cancel_capture()
+
+def test_flask_routes_need_the_flag_and_a_token(monkeypatch):
+    monkeypatch.delenv('PIPELINE_PROFILE_ROUTES', raising=False)
+    monkeypatch.delenv('PIPELINE_PROFILE_TOKEN', raising=False)
+    app = Flask(__name__)
+    assert not profiling.register_routes(app)
+    assert not profiling.register_routes(Flask(__name__), enabled=True)  # No token
+    assert app.test_client().get('/debug/profile').status_code == 404
+    
+    monkeypatch.setenv('PIPELINE_PROFILE_ROUTES', '1')
+    monkeypatch.setenv('PIPELINE_PROFILE_TOKEN', 'from-env')
+    app = Flask(__name__)
+    assert profiling.register_routes(app)
+    assert app.test_client().get('/debug/profile', headers={'X-Profile-Token': 'from-env'}).status_code == 200
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_spans_aggregate_durations_and_numeric_attributes()
+    test_nested_spans_are_logged_with_their_path(pathlib.Path(tempfile.mkdtemp()))
+    for mode in ['cprofile', 'sampling']:
+        test_capture_profiles_only_the_next_matching_span(mode)
+    test_timed_records_result_size()
+    test_flask_routes_expose_summary_and_arm_captures()
+    print("Profiling tests passed!")
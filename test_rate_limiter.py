@@ -0,0 +1,139 @@
+from data_fetchers.odds_api_fetcher import OddsApiFetcher
+from data_fetchers.rate_limiter import QuotaRateLimiter, RateLimitExceeded, parse_retry_after
+from data_fetchers.transport import SERVER_ERROR_STATUSES, get_transport
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import requests
+import threading
+import time
+
+def test_unknown_budget_is_not_paced():
+    limiter = QuotaRateLimiter(burst=2)
+    for _ in range(10):
+        limiter.acquire()
+    assert limiter.state()['remaining'] is None
+
+def test_budget_spread_over_period():
+    period_end = datetime.now(timezone.utc) + timedelta(hours=1)
+    limiter = QuotaRateLimiter(burst=3, max_wait=0.01, period_end=period_end)
+    limiter.update_from_headers({'x-requests-remaining': '360', 'x-requests-used': '140', 'x-requests-last': '3'})
+    
+    state = limiter.state()
+    assert state['remaining'] == 360
+    assert state['used'] == 140
+    assert abs(state['requests_per_hour'] - 360) < 1
+    
+    limiter.acquire(3)
+    try:
+        limiter.acquire(1)
+        assert False, "Expected the bucket to be empty"
+    except RateLimitExceeded:
+        pass
+
+def test_exhausted_quota_and_backoff():
+    limiter = QuotaRateLimiter(max_wait=0.5, backoff_base=0.1)
+    limiter.update_from_headers({'x-requests-remaining': '0'})
+    try:
+        limiter.acquire()
+        assert False, "Expected quota exhaustion"
+    except RateLimitExceeded:
+        pass
+    
+    limiter = QuotaRateLimiter(max_wait=0.5, backoff_base=0.1)
+    limiter.on_rate_limited()
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+    limiter.on_rate_limited(retry_after=5)
+    assert limiter.state()['backoff_seconds'] > 4
+    try:
+        limiter.acquire()
+        assert False, "Expected backoff to exceed max_wait"
+    except RateLimitExceeded:
+        pass
+
+def test_retry_after_seconds_and_http_date():
+    assert parse_retry_after('30') == 30.0
+    assert parse_retry_after(None) is None and parse_retry_after('soon') is None
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 < parse_retry_after(in_a_minute) <= 60
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+def test_429_reaches_the_limiter_without_transport_retries():
+    hits = []
+    
+    class RateLimited(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(429)
+            self.send_header('Retry-After', format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30),
+                                                            usegmt=True))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RateLimited)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        fetcher = OddsApiFetcher(api_key='test', base_url=f"http://127.0.0.1:{server.server_port}/v4")
+        assert fetcher.transport is get_transport(SERVER_ERROR_STATUSES)
+        assert 429 not in fetcher.transport.session.get_adapter('https://x').max_retries.status_forcelist
+        
+        assert fetcher.get_upcoming_games('basketball_nba').empty
+        assert len(hits) == 1
+        state = fetcher.get_quota_state()
+        assert state['consecutive_429s'] == 1 and state['backoff_seconds'] > 25
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class _SlateTransport:
+    """A 12-game slate: /events plus one player props response per event, with a large quota"""
+    
+    def get(self, url, params=None, timeout=None):
+        if url.endswith('/events'):
+            payload = [{'id': f"g{i}", 'commence_time': '2030-01-01T00:00:00Z', 'home_team': f"Home {i}",
+                        'away_team': f"Away {i}"} for i in range(12)]
+        else:
+            outcomes = [{'name': side, 'description': 'Player', 'price': -110, 'point': 10.5}
+                        for side in ('Over', 'Under')]
+            payload = {'bookmakers': [{'key': 'draftkings', 'title': 'DraftKings', 'markets': [
+                {'key': market, 'outcomes': outcomes} for market in params['markets'].split(',')]}]}
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(payload).encode()
+        response.headers['x-requests-remaining'] = '10000'
+        return response
+
+def test_a_slate_fits_the_default_burst():
+    fetcher = OddsApiFetcher(api_key='test', transport=_SlateTransport())
+    props = fetcher.get_player_props('basketball_nba')
+    
+    assert props['Game'].nunique() == 12 and len(props) == 36
+    assert fetcher.skipped_requests['basketball_nba'] == [] and props.attrs['skipped'] == []
+
+def test_rate_limited_planned_requests_are_reported():
+    fetcher = OddsApiFetcher(api_key='test', transport=_SlateTransport(),
+                             rate_limiter=QuotaRateLimiter(burst=6))
+    fetcher.planned_max_wait = 0.01
+    props = fetcher.get_player_props('basketball_nba')
+    
+    assert props['Game'].nunique() == 2
+    skipped = fetcher.skipped_requests['basketball_nba']
+    assert len(skipped) == 10 and props.attrs['skipped'] == skipped
+    assert {request['reason'] for request in skipped} == {'rate_limited'}
+    assert skipped[0]['markets'] == ['player_points', 'player_rebounds', 'player_assists']
+
+if __name__ == "__main__":
+    test_unknown_budget_is_not_paced()
+    test_budget_spread_over_period()
+    test_exhausted_quota_and_backoff()
+    test_retry_after_seconds_and_http_date()
+    test_429_reaches_the_limiter_without_transport_retries()
+    test_a_slate_fits_the_default_burst()
+    test_rate_limited_planned_requests_are_reported()
+    print("Rate limiter tests passed!")
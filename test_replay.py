@@ -0,0 +1,64 @@
+from data_fetchers.odds_api_fetcher import OddsApiFetcher
+from data_fetchers.replay import RecordingTransport, ReplayServer, save_fixture
+from data_fetchers.transport import HttpTransport
+from test_odds_api import SAMPLE_EVENTS
+import json
+import os
+import tempfile
+
+ODDS_PARAMS = {
+    'regions': 'us',
+    'markets': 'h2h,spreads,totals',
+    'oddsFormat': 'american',
+    'sport': 'basketball_nba',
+    'dateFormat': 'iso'
+}
+
+def make_fetcher(server):
+    return OddsApiFetcher(api_key='test', transport=HttpTransport(max_retries=0),
+                          base_url=server.base_url + '/v4')
+
+def test_replay_serves_recorded_odds_with_quota():
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        save_fixture(fixture_dir, 'GET', '/v4/sports/basketball_nba/odds', ODDS_PARAMS,
+                     200, json.dumps(SAMPLE_EVENTS), {'Content-Type': 'application/json'})
+        
+        with ReplayServer(fixture_dir, quota=100, latency=0.01) as server:
+            fetcher = make_fetcher(server)
+            games = fetcher.get_upcoming_games('basketball_nba')
+            
+            assert list(games['Home']) == ['Lakers']
+            assert fetcher.get_quota_state()['remaining'] == 97
+            assert fetcher.get_quota_state()['last_cost'] == 3
+
+def test_replay_injects_errors():
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        save_fixture(fixture_dir, 'GET', '/v4/sports/basketball_nba/odds', ODDS_PARAMS,
+                     200, json.dumps(SAMPLE_EVENTS))
+        
+        with ReplayServer(fixture_dir, error_rate=1.0) as server:
+            games = make_fetcher(server).get_upcoming_games('basketball_nba')
+            assert games.empty
+            assert server.request_count == 1
+
+def test_recording_transport_round_trip():
+    with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as record_dir:
+        save_fixture(source_dir, 'GET', '/v4/sports', None, 200, '[{"key": "basketball_nba"}]')
+        
+        with ReplayServer(source_dir) as server:
+            transport = RecordingTransport(record_dir, max_retries=0)
+            fetcher = OddsApiFetcher(api_key='secret', transport=transport, base_url=server.base_url + '/v4')
+            assert fetcher.get_available_sports() == ['basketball_nba']
+        
+        recorded = os.listdir(record_dir)
+        assert len(recorded) == 1
+        with open(os.path.join(record_dir, recorded[0])) as f:
+            fixture = json.load(f)
+        assert fixture['path'] == '/v4/sports'
+        assert 'secret' not in json.dumps(fixture)
+
+if __name__ == "__main__":
+    test_replay_serves_recorded_odds_with_quota()
+    test_replay_injects_errors()
+    test_recording_transport_round_trip()
+    print("Replay harness tests passed!")
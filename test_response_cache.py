@@ -0,0 +1,106 @@
+from data_fetchers.response_cache import ResponseCache
+from concurrent.futures import ThreadPoolExecutor
+import os
+import tempfile
+import threading
+import time
+
+def test_fresh_stale_and_expired():
+    cache = ResponseCache(ttls={'odds': 0.2}, stale_ttl=0.5)
+    calls = []
+    
+    def fetch():
+        calls.append(time.time())
+        return {'version': len(calls)}
+    
+    params = {'apiKey': 'secret', 'markets': 'h2h'}
+    assert cache.get('odds', '/sports/nba/odds', params, fetch) == {'version': 1}
+    assert cache.get('odds', '/sports/nba/odds', {'markets': 'h2h'}, fetch) == {'version': 1}
+    
+    # Past the TTL the stale value is served while a refresh runs in the background
+    time.sleep(0.25)
+    assert cache.get('odds', '/sports/nba/odds', params, fetch) == {'version': 1}
+    time.sleep(0.1)
+    assert cache.get('odds', '/sports/nba/odds', params, fetch) == {'version': 2}
+    
+    # Past TTL + stale window the fetch is synchronous
+    time.sleep(0.8)
+    assert cache.get('odds', '/sports/nba/odds', params, fetch) == {'version': 3}
+    
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['stale_hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['refreshes'] == 1
+
+def test_disk_store_survives_restart():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        ResponseCache(cache_dir=cache_dir).get('events', '/sports/nba/events', None, lambda: [1, 2, 3])
+        
+        restarted = ResponseCache(cache_dir=cache_dir)
+        assert restarted.get('events', '/sports/nba/events', None, lambda: []) == [1, 2, 3]
+        assert restarted.stats()['hits'] == 1
+
+def test_concurrent_misses_share_one_fetch():
+    cache = ResponseCache()
+    calls = []
+    release = threading.Event()
+    
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return {'events': 3}
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(cache.get, 'odds', '/sports/nba/odds', None, fetch) for _ in range(8)]
+        time.sleep(0.1)
+        release.set()
+        assert [future.result() for future in futures] == [{'events': 3}] * 8
+    
+    assert len(calls) == 1
+    assert cache.stats()['coalesced'] == 7
+    
+    # A failed fetch is raised to every waiter and not cached
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError('upstream down')
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(cache.get, 'odds', '/sports/nfl/odds', None, fail) for _ in range(2)]
+        for future in futures:
+            try:
+                future.result()
+                assert False, "Expected the fetch error"
+            except RuntimeError:
+                pass
+    assert cache.get('odds', '/sports/nfl/odds') is None
+
+def test_memory_and_disk_are_bounded():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir=cache_dir, max_entries=2, max_disk_entries=3)
+        cache.get('odds', '/a', None, lambda: 'a')
+        cache.get('odds', '/b', None, lambda: 'b')
+        cache.get('odds', '/a', None, lambda: 'unused')  # /a is now the most recently used
+        cache.get('odds', '/c', None, lambda: 'c')
+        
+        stats = cache.stats()
+        assert stats['entries'] == 2 and stats['evictions'] == 1
+        assert set(cache._entries) == {'/a?', '/c?'}
+        
+        for i in range(5):
+            cache.get('odds', f"/more/{i}", None, lambda: i)
+            time.sleep(0.01)
+        assert len(os.listdir(cache_dir)) == 8
+        
+        # Pruning runs on start (and every 64 writes), oldest files first
+        restarted = ResponseCache(cache_dir=cache_dir, max_disk_entries=3)
+        assert len(os.listdir(cache_dir)) == 3
+        assert restarted.get('odds', '/more/4') == 4
+        assert restarted.get('odds', '/a') is None
+
+if __name__ == "__main__":
+    test_fresh_stale_and_expired()
+    test_disk_store_survives_restart()
+    test_concurrent_misses_share_one_fetch()
+    test_memory_and_disk_are_bounded()
+    print("Response cache tests passed!")
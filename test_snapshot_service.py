@@ -0,0 +1,55 @@
+from snapshot_service import SnapshotService
+
+class CountingAnalyzer:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+    
+    def get_todays_best_bets(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return [
+            {'sport': 'NBA', 'pick': 'Away 130', 'expected_value': 0.3},
+            {'sport': 'NFL', 'pick': 'Home 110', 'expected_value': 0.2}
+        ]
+
+def test_readers_share_background_snapshot():
+    analyzer = CountingAnalyzer()
+    service = SnapshotService(analyzer, interval=60).start()
+    try:
+        snapshot = service.wait_for_first(timeout=5)
+        for _ in range(100):
+            assert service.get() is snapshot
+        
+        assert analyzer.calls == 1
+        assert snapshot.version == 1
+        assert not snapshot.is_stale
+        assert [bet['pick'] for bet in snapshot.bets_for('NBA')] == ['Away 130']
+    finally:
+        service.stop()
+
+def test_snapshot_is_immutable_and_survives_errors():
+    analyzer = CountingAnalyzer()
+    service = SnapshotService(analyzer, interval=60)
+    first = service.refresh()
+    
+    try:
+        first.bets[0]['pick'] = 'changed'
+        assert False, "Snapshot bets should be read-only"
+    except TypeError:
+        pass
+    copies = first.all_bets()
+    copies[0]['pick'] = 'changed'
+    assert first.bets[0]['pick'] == 'Away 130'
+    
+    analyzer.fail = True
+    second = service.refresh()
+    assert second.version == first.version
+    assert second.bets == first.bets
+    assert second.error == "upstream down"
+
+if __name__ == "__main__":
+    test_readers_share_background_snapshot()
+    test_snapshot_is_immutable_and_survives_errors()
+    print("Snapshot service tests passed!")
@@ -0,0 +1,55 @@
+from data_fetchers.transport import HttpTransport, RETRY_STATUSES
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+class _Flaky(BaseHTTPRequestHandler):
+    """Answers 503 until a path has been hit ``failures`` times, then 200"""
+    failures = 2
+    hits = {}
+
+    def _respond(self):
+        count = self.hits[self.command, self.path] = self.hits.get((self.command, self.path), 0) + 1
+        self.send_response(503 if count <= self.failures else 200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+def _serve():
+    _Flaky.hits = {}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Flaky)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def test_retry_and_pool_configuration():
+    transport = HttpTransport(timeout=4, max_retries=5, pool_connections=3, pool_maxsize=7)
+    adapter = transport.session.get_adapter('https://api.the-odds-api.com')
+    retry = adapter.max_retries
+
+    assert retry.total == 5 and retry.respect_retry_after_header
+    assert set(retry.status_forcelist) == set(RETRY_STATUSES)
+    assert 'GET' in retry.allowed_methods and 'POST' not in retry.allowed_methods
+    assert (adapter._pool_connections, adapter._pool_maxsize, adapter._pool_block) == (3, 7, True)
+    assert transport.session.get_adapter('http://localhost') is adapter
+    assert transport.timeout == 4
+
+def test_get_is_retried_but_post_is_not():
+    server, url = _serve()
+    try:
+        transport = HttpTransport(max_retries=3, backoff_factor=0)
+        assert transport.get(url + '/odds').status_code == 200
+        assert _Flaky.hits['GET', '/odds'] == 3
+
+        assert transport.post(url + '/auth').status_code == 503
+        assert _Flaky.hits['POST', '/auth'] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    test_retry_and_pool_configuration()
+    test_get_is_retried_but_post_is_not()
+    print("Transport tests passed!")